@@ -1,6 +1,9 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from typing import Any, Callable, Dict, Optional, Union
 import os
 
 # SQLite database URL
@@ -8,15 +11,145 @@ SQLALCHEMY_DATABASE_URL = os.getenv(
     "DATABASE_URL", "sqlite:///./database.db"
 )
 
+# Engine profile: "tuned" (WAL + pragmas below) or "default" (plain SQLite settings)
+DB_PROFILE = os.getenv("DB_PROFILE", "tuned")
+
+
+def sqlite_pragmas(profile: str = DB_PROFILE) -> Dict[str, str]:
+    """
+    Connect-time pragmas for an engine profile
+
+    The tuned profile uses WAL so readers are not blocked while an admin
+    writes, synchronous=NORMAL (safe with WAL), a busy timeout so concurrent
+    writers wait instead of failing, and larger mmap/page caches. Each value
+    can be overridden with its SQLITE_* environment variable.
+
+    Args:
+        profile: "tuned" or "default"
+
+    Returns:
+        Mapping of pragma name to value (empty for the default profile)
+    """
+    if profile != "tuned":
+        return {}
+    return {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+        "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+        "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),  # Negative = KiB, i.e. 64 MiB
+        "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+    }
+
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL, profile: Optional[str] = None) -> Engine:
+    """
+    Create an engine with the configured profile
+
+    For file-based SQLite the pragmas from sqlite_pragmas() are applied to
+    every new connection. The pool is sized per process (each uvicorn worker
+    has its own) via DB_POOL_SIZE, DB_MAX_OVERFLOW and DB_POOL_TIMEOUT.
+
+    Args:
+        url: Database URL
+        profile: Engine profile (defaults to DB_PROFILE)
+
+    Returns:
+        SQLAlchemy engine
+    """
+    profile = profile or DB_PROFILE
+    database_url = make_url(url)
+    if database_url.get_backend_name() != "sqlite":
+        return create_engine(url, pool_pre_ping=True)
+
+    sqlite_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},  # Needed for SQLite
+        **_sqlite_pool_kwargs(database_url)
+    )
+    _apply_sqlite_pragmas(sqlite_engine, database_url, profile)
+    return sqlite_engine
+
+
+def async_database_url(url: str = SQLALCHEMY_DATABASE_URL) -> str:
+    """
+    Async driver URL for a database URL (sqlite:// -> sqlite+aiosqlite://)
+
+    Args:
+        url: Database URL
+
+    Returns:
+        Database URL using an asyncio driver
+    """
+    database_url = make_url(url)
+    if database_url.get_backend_name() == "sqlite" and database_url.get_driver_name() != "aiosqlite":
+        database_url = database_url.set(drivername="sqlite+aiosqlite")
+    return database_url.render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str = SQLALCHEMY_DATABASE_URL, profile: Optional[str] = None) -> AsyncEngine:
+    """
+    Create an asyncio engine with the configured profile (same pragmas and pool sizing as create_db_engine)
+
+    Args:
+        url: Database URL (a sync driver URL is converted with async_database_url)
+        profile: Engine profile (defaults to DB_PROFILE)
+
+    Returns:
+        SQLAlchemy async engine
+    """
+    profile = profile or DB_PROFILE
+    database_url = make_url(async_database_url(url))
+    if database_url.get_backend_name() != "sqlite":
+        return create_async_engine(database_url, pool_pre_ping=True)
+
+    sqlite_engine = create_async_engine(database_url, **_sqlite_pool_kwargs(database_url))
+    _apply_sqlite_pragmas(sqlite_engine.sync_engine, database_url, profile)
+    return sqlite_engine
+
+
+def _is_in_memory(database_url) -> bool:
+    return database_url.database in (None, "", ":memory:")
+
+
+def _sqlite_pool_kwargs(database_url) -> Dict[str, Any]:
+    """Pool sizing for file-based SQLite (in-memory databases keep SQLAlchemy's default pool)"""
+    if _is_in_memory(database_url):
+        return {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    }
+
+
+def _apply_sqlite_pragmas(sqlite_engine: Engine, database_url, profile: str) -> None:
+    """Run the profile's pragmas on every new connection of a (sync) engine"""
+    pragmas = sqlite_pragmas(profile)
+    if _is_in_memory(database_url):
+        # WAL and mmap do not apply to in-memory databases
+        pragmas = {name: value for name, value in pragmas.items() if name not in ("journal_mode", "mmap_size")}
+    if not pragmas:
+        return
+
+    @event.listens_for(sqlite_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
 # Create engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and session factory used by the API routers
+async_engine = create_async_db_engine(SQLALCHEMY_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
@@ -30,7 +163,74 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency for getting an async database session (does not block the event loop)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def run_db(db: Union[Session, AsyncSession, None], fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run synchronous ORM code fn(session, *args) with a sync or async session
+    Lets services shared with scripts (which use SessionLocal) be called from
+    async routes without blocking the event loop.
+
+    Args:
+        db: Sync session, async session or None (passed through to fn)
+        fn: Callable taking the sync session as first argument
+        *args: Further arguments for fn
+
+    Returns:
+        Return value of fn
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args)
+    return fn(db, *args)
+
+
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    migrate_db(bind=engine)
+
+
+def migrate_db(bind=engine):
+    """
+    Add columns and indexes that were introduced after a table was first created
+    create_all() only creates missing tables, so new nullable columns on
+    existing tables are added here with ALTER TABLE, and missing indexes
+    are created.
+    
+    Args:
+        bind: Engine to migrate
+    """
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                connection.execute(
+                    text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+                )
+            existing_indexes = _index_names(connection, table.name)
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=connection)
+
+
+def _index_names(connection, table_name):
+    """Names of the indexes on a table (including expression indexes)"""
+    if connection.dialect.name == "sqlite":
+        # The SQLite inspector skips expression indexes, read them from the schema table
+        rows = connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"),
+            {"table": table_name}
+        )
+        return {row[0] for row in rows}
+    return {index["name"] for index in inspect(connection).get_indexes(table_name)}
 
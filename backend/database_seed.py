@@ -4,12 +4,13 @@ This creates default admin user and pre-populates 3 curriculum files.
 """
 
 from sqlalchemy.orm import Session
-from backend.database import SessionLocal, engine, Base
+from backend.database import SessionLocal, engine, Base, migrate_db
 from backend.models.user import User, UserRole
 from backend.models.curriculum import Curriculum
 from backend.models.preferences import Preferences
-from backend.services.curriculum_parser import parse_markdown_keywords
-from backend.utils.security import get_password_hash
+from backend.services.curriculum_parser import parse_markdown_keyword_entries
+from backend.services.keyword_index import build_keyword_index
+from backend.utils.security import SEED_BCRYPT_ROUNDS, get_password_hash
 from pathlib import Path
 import os
 import json
@@ -22,13 +23,15 @@ def seed_database():
     """Seed the database with initial data"""
     # Create tables if they don't exist
     Base.metadata.create_all(bind=engine)
+    migrate_db(bind=engine)
 
     db = SessionLocal()
     try:
         # Get all admin users
         admin_users = db.query(User).filter(User.role == UserRole.ADMIN).all()
 
-        # Create default test accounts
+        # Create default test accounts (hashed at a low cost for a fast first boot,
+        # upgraded to BCRYPT_ROUNDS on first login)
         test_accounts = [
             ("admin_test", "admin123", UserRole.ADMIN),
             ("user_test", "user123", UserRole.STUDENT),
@@ -39,7 +42,7 @@ def seed_database():
             if not existing:
                 test_user = User(
                     username=username,
-                    password_hash=get_password_hash(password),
+                    password_hash=get_password_hash(password, rounds=SEED_BCRYPT_ROUNDS),
                     role=role,
                 )
                 db.add(test_user)
@@ -51,7 +54,7 @@ def seed_database():
         if not admin_users:
             default_admin = User(
                 username="demo_admin",
-                password_hash=get_password_hash("demo123"),
+                password_hash=get_password_hash("demo123", rounds=SEED_BCRYPT_ROUNDS),
                 role=UserRole.ADMIN,
             )
             db.add(default_admin)
@@ -226,8 +229,12 @@ def seed_database():
                     )
                     continue
 
-                # Parse keywords
-                keywords = parse_markdown_keywords(content)
+                # Parse keywords and precompute their index
+                entries = parse_markdown_keyword_entries(content)
+                keywords = [keyword for keyword, _ in entries]
+                keyword_index = build_keyword_index(
+                    keywords, [category for _, category in entries]
+                )
 
                 # Save file to uploads directory (with user-specific naming to avoid conflicts)
                 upload_dir = PROJECT_ROOT / "backend" / "uploads" / "curriculum"
@@ -243,6 +250,7 @@ def seed_database():
                     filename=filename,  # Keep original filename for display
                     file_path=str(saved_file_path),
                     keywords=keywords,
+                    keyword_index=keyword_index,
                 )
 
                 db.add(curriculum)
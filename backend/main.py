@@ -1,13 +1,24 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from backend.routers import auth, curriculum, preferences, rednote, rewrite, seed
-from backend.database import init_db
+from backend.database import SessionLocal, async_engine, init_db
+from backend.services.llm_client import close_async_llm_client
+from backend.services.platform_http import close_platform_http_client
+from backend.services.platform_registry import create_platform_adapter
+from backend.services.pre_rewrite import PRE_REWRITE_ENABLED, PreRewriteWorker
+from backend.services.rewriter import RewriterService
+from backend.services.token_revocation import purge_refresh_tokens, revoked_tokens
+from backend.utils.security import PasswordHasher
+from backend.utils.metrics import MetricsMiddleware, instrument_engines, registry
 import os
 
 # Import models to ensure they're registered with Base
 from backend.models import user
 from backend.models import curriculum as curriculum_model
 from backend.models import preferences as preferences_model
+from backend.models import rewrite as rewrite_model
+from backend.models import token as token_model
 
 app = FastAPI(title="TAL Hackathon API", version="0.1.0")
 
@@ -30,8 +41,14 @@ app.add_middleware(
     allow_credentials=not allow_all_origins,  # Can't use credentials with allow_origins=["*"]
     allow_methods=["*"],
     allow_headers=["*"],
+    # Feed pagination cursor (see routers/rednote.py)
+    expose_headers=[rednote.NEXT_CURSOR_HEADER],
 )
 
+# Per-route latency/status metrics and SQL statement timing, served at /metrics
+app.add_middleware(MetricsMiddleware)
+instrument_engines()
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(curriculum.router)
@@ -45,9 +62,19 @@ app.include_router(seed.router)
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    # Load revoked access tokens (checked in memory on every request, and
+    # re-read every REVOCATION_SYNC_SECONDS to see other workers' logouts)
+    with SessionLocal() as db:
+        revoked_tokens.load(db)
+        purge_refresh_tokens(db)
+    revoked_tokens.session_factory = SessionLocal
+    # App-scoped services, built once per process and injected via Depends
+    # (replace app.state.rewriter here to swap the LLM backend per deployment)
+    app.state.rewriter = RewriterService()
+    app.state.password_hasher = PasswordHasher()
+    app.state.platform_adapter = create_platform_adapter()
     # Seed database with initial data for demo (only if database is empty)
     try:
-        from backend.database import SessionLocal
         from backend.models.user import User
         from backend.database_seed import seed_database
         
@@ -67,6 +94,29 @@ async def startup_event():
         print(f"Warning: Database seeding failed: {e}")
         import traceback
         traceback.print_exc()
+    # Rewrite new feed posts in the background (after seeding, so the demo
+    # curriculum exists), before students open the feed; opt-in per process
+    if PRE_REWRITE_ENABLED:
+        app.state.pre_rewrite_worker = PreRewriteWorker(app.state.platform_adapter, app.state.rewriter)
+        app.state.pre_rewrite_worker.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Stop the pre-rewrite worker, then close pooled platform, LLM and
+    # database connections and the bcrypt worker threads
+    worker = getattr(app.state, "pre_rewrite_worker", None)
+    if worker is not None:
+        await worker.stop()
+    adapter = getattr(app.state, "platform_adapter", None)
+    if adapter is not None:
+        await adapter.aclose()
+    await close_platform_http_client()
+    await close_async_llm_client()
+    await async_engine.dispose()
+    hasher = getattr(app.state, "password_hasher", None)
+    if hasher is not None:
+        hasher.shutdown()
 
 
 @app.get("/")
@@ -77,3 +127,9 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Process metrics in Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
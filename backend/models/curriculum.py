@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from backend.database import Base
@@ -7,12 +7,19 @@ from backend.database import Base
 class Curriculum(Base):
     """Curriculum model for storing uploaded markdown files"""
     __tablename__ = "curricula"
+    __table_args__ = (
+        # Per-admin listing/counting and the seed's (user_id, filename) lookups
+        Index("ix_curricula_user_id_filename", "user_id", "filename"),
+        # "Most recent curriculum" (ORDER BY created_at DESC LIMIT 1)
+        Index("ix_curricula_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     filename = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     keywords = Column(JSON, nullable=False)  # JSON array of keywords
+    keyword_index = Column(JSON, nullable=True)  # Precomputed index, see services/keyword_index.py
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationship to User
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from backend.database import Base
@@ -19,3 +19,10 @@ class Preferences(Base):
     # Relationship to User
     user = relationship("User", back_populates="preferences")
 
+
+# "Most recent preferences" orders by coalesce(updated_at, created_at); an
+# expression index lets SQLite read the newest row instead of sorting the table
+Index(
+    "ix_preferences_recency",
+    func.coalesce(Preferences.updated_at, Preferences.created_at)
+)
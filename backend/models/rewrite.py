@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, UniqueConstraint, Index
+from sqlalchemy.sql import func
+from backend.database import Base
+
+
+class Rewrite(Base):
+    """Rewrite model for persisting rewrite outputs across restarts"""
+    __tablename__ = "rewrites"
+    __table_args__ = (
+        UniqueConstraint("text_hash", "curriculum_id", "preferences_version", name="uq_rewrites_lookup"),
+        # Deleting a curriculum's stored rewrites
+        Index("ix_rewrites_curriculum_id", "curriculum_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    text_hash = Column(String(64), nullable=False)  # sha256 of the original text
+    curriculum_id = Column(Integer, ForeignKey("curricula.id"), nullable=False)
+    preferences_version = Column(String(64), nullable=False)  # fingerprint of preference keywords
+    rewritten_text = Column(Text, nullable=False)
+    keywords_used = Column(JSON, nullable=False)  # JSON array of keywords
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,84 @@
+"""
+Bulk-warm the persistent rewrite store.
+Pre-rewrites every post in the RedNote feed for every curriculum, so the first
+students after a deploy are served stored rewrites instead of waiting on the LLM.
+
+Usage (from project root):
+    python -m backend.rewrite_warmup
+"""
+
+import asyncio
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from backend.database import SessionLocal, engine, Base, migrate_db
+from backend.models.curriculum import Curriculum
+from backend.models.rewrite import Rewrite  # noqa: F401 - register table with Base
+from backend.services.active_config import load_active_preferences
+from backend.services.keyword_index import KeywordIndex
+from backend.services.mock_rednote import MockRedNoteAdapter
+from backend.services.platform_adapter import PlatformAdapter
+from backend.services.rewriter import RewriterService
+
+
+async def _warm_curricula(
+    rewriter: RewriterService,
+    texts: List[str],
+    curricula: List[Curriculum],
+    preference_keywords: List[str],
+    db: Session
+) -> int:
+    """Rewrite texts for each curriculum in turn, on one event loop (so one pooled LLM client)"""
+    total = 0
+    for curriculum in curricula:
+        results = await rewriter.rewrite_batch_detailed(
+            original_texts=texts,
+            curriculum_keywords=curriculum.keywords or [],
+            preference_keywords=preference_keywords,
+            db=db,
+            curriculum_id=curriculum.id,
+            curriculum_index=KeywordIndex.from_stored(
+                curriculum.keyword_index, curriculum.keywords or []
+            )
+        )
+        stored = sum(1 for result in results if result.persisted)
+        total += stored
+        print(
+            f"Warmed {stored} of {len(texts)} rewrites for curriculum {curriculum.filename} "
+            f"(id: {curriculum.id})"
+        )
+    return total
+
+
+def warm_rewrite_store(adapter: Optional[PlatformAdapter] = None) -> int:
+    """
+    Rewrite every feed post for every curriculum and persist the results
+    Mock rewrites (LLM disabled or failed) are not stored and not counted.
+
+    Args:
+        adapter: Platform adapter to read the feed from (defaults to MockRedNoteAdapter)
+
+    Returns:
+        Number of (curriculum, post) rewrites now available in the store
+    """
+    # Create tables if they don't exist
+    Base.metadata.create_all(bind=engine)
+    migrate_db(bind=engine)
+
+    adapter = adapter or MockRedNoteAdapter()
+    texts = [post.text for post in adapter.get_feed()]
+
+    db = SessionLocal()
+    try:
+        preferences = load_active_preferences(db)
+        preference_keywords = preferences.keywords if preferences and preferences.keywords else []
+        total = asyncio.run(_warm_curricula(
+            RewriterService(), texts, db.query(Curriculum).all(), preference_keywords, db
+        ))
+        print(f"Rewrite store warm-up complete ({total} rewrites).")
+        return total
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    warm_rewrite_store()
@@ -1,34 +1,70 @@
+from datetime import datetime, timedelta
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from backend.database import get_db
-from backend.models.user import User, UserRole
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import get_async_db
+from backend.models.token import RefreshToken
+from backend.models.user import User
 from backend.schemas.auth import (
     UserRegister,
     UserLogin,
     Token,
     UserResponse,
     RegisterResponse,
+    RefreshRequest,
+    LogoutRequest,
 )
 from backend.utils.security import (
-    verify_password,
-    get_password_hash,
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    PasswordHasher,
     create_access_token,
+    create_refresh_token,
+    hash_refresh_token,
+    user_token_claims,
 )
-from backend.utils.dependencies import get_current_user
+from backend.services.token_revocation import revoked_tokens
+from backend.services.user_cache import user_cache
+from backend.utils.dependencies import get_current_user, get_password_hasher, get_token_payload
+from backend.utils.metrics import PASSWORD_REHASHES, TOKEN_REFRESHES
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
+def add_refresh_token(db: AsyncSession, user: User) -> str:
+    """
+    Issue a refresh token for a user (added to the session, not committed)
+
+    Args:
+        db: Async database session
+        user: User the token is issued to
+
+    Returns:
+        The refresh token (only its hash is stored)
+    """
+    token = create_refresh_token()
+    db.add(RefreshToken(
+        token_hash=hash_refresh_token(token),
+        user_id=user.id,
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+
 @router.post(
     "/register", response_model=RegisterResponse, status_code=status.HTTP_200_OK
 )
-async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(
+    user_data: UserRegister,
+    db: AsyncSession = Depends(get_async_db),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+):
     """Register a new user"""
     try:
         # Check if username already exists
-        existing_user = (
-            db.query(User).filter(User.username == user_data.username).first()
+        existing_user = await db.scalar(
+            select(User).where(User.username == user_data.username)
         )
         if existing_user:
             raise HTTPException(
@@ -46,7 +82,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
                 password_bytes = user_data.password.encode("utf-8")
                 print(f"Password bytes length: {len(password_bytes)}")
 
-            hashed_password = get_password_hash(user_data.password)
+            hashed_password = await hasher.hash(user_data.password)
         except Exception as e:
             print(f"Password hashing error: {e}")
             import traceback
@@ -64,8 +100,9 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
         )
 
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
+        user_cache.invalidate(new_user.username)
 
         return RegisterResponse(
             message="User registered successfully", user_id=new_user.id
@@ -84,13 +121,17 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
 
 
 @router.post("/login")
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(
+    user_data: UserLogin,
+    db: AsyncSession = Depends(get_async_db),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+):
     """Login and get JWT token - returns JSONResponse directly"""
     print(f"=== LOGIN REQUEST START === Username: {user_data.username}")
     
     try:
         # Find user
-        user = db.query(User).filter(User.username == user_data.username).first()
+        user = await db.scalar(select(User).where(User.username == user_data.username))
         if not user:
             print(f"Login failed: User {user_data.username} not found")
             raise HTTPException(
@@ -100,7 +141,7 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
 
         # Verify password
         try:
-            if not verify_password(user_data.password, user.password_hash):
+            if not await hasher.verify(user_data.password, user.password_hash):
                 print(f"Login failed: Invalid password for {user_data.username}")
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -117,8 +158,10 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
                 detail="Incorrect username or password",
             )
 
-        # Create access token
-        access_token = create_access_token(data={"sub": user.username})
+        # Create access token (user ID and role claims let requests skip the user lookup)
+        access_token = create_access_token(data=user_token_claims(user))
+        refresh_token = add_refresh_token(db, user)
+        await db.commit()
 
         # Ensure role is a string value (UserRole enum has .value attribute)
         role_value = user.role.value if hasattr(user.role, 'value') else str(user.role)
@@ -126,6 +169,7 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
         # Create response dict
         response_data = {
             "access_token": access_token,
+            "refresh_token": refresh_token,
             "token_type": "bearer",
             "user": {
                 "id": user.id,
@@ -134,8 +178,19 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
             }
         }
         
-        print(f"Login successful for {user.username} (id: {user.id}), role: {role_value}")
-        print(f"Response data: {response_data}")
+        # Upgrade hashes made with a different bcrypt cost than the current policy
+        # (after the response is built: a failed upgrade expires the user)
+        if hasher.needs_rehash(user.password_hash):
+            try:
+                user.password_hash = await hasher.hash(user_data.password)
+                await db.commit()
+                PASSWORD_REHASHES.inc()
+            except Exception as e:
+                # Never fail a login because the upgrade failed, it is retried next time
+                await db.rollback()
+                print(f"Warning: Failed to rehash password for {user_data.username}: {e}")
+
+        print(f"Login successful for {response_data['user']['username']} (id: {response_data['user']['id']}), role: {role_value}")
         print("=== LOGIN REQUEST END ===")
         
         # Return JSONResponse directly to ensure proper serialization
@@ -159,3 +214,73 @@ async def get_me(current_user: User = Depends(get_current_user)):
     return UserResponse(
         id=current_user.id, username=current_user.username, role=current_user.role.value
     )
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(request: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Exchange a refresh token for a new access token and refresh token
+    No password check (and no bcrypt). Refresh tokens are single use: the one
+    sent is revoked, so a token can only be redeemed once.
+    """
+    invalid_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    now = datetime.utcnow()
+    stored = await db.scalar(
+        select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(request.refresh_token))
+    )
+    if stored is None or stored.revoked_at is not None or stored.expires_at <= now:
+        TOKEN_REFRESHES.labels(outcome="rejected").inc()
+        raise invalid_exception
+
+    # Only the request that revokes the token gets a new pair (concurrent reuse loses)
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
+    user = await db.get(User, stored.user_id)
+    if result.rowcount != 1 or user is None:
+        await db.rollback()
+        TOKEN_REFRESHES.labels(outcome="rejected").inc()
+        raise invalid_exception
+
+    claims = user_token_claims(user)
+    refresh_token = add_refresh_token(db, user)
+    await db.commit()
+    TOKEN_REFRESHES.labels(outcome="renewed").inc()
+
+    return Token(
+        access_token=create_access_token(data=claims),
+        refresh_token=refresh_token,
+        user=UserResponse(id=user.id, username=user.username, role=claims["role"]),
+    )
+
+
+@router.post("/logout")
+async def logout(
+    request: Optional[LogoutRequest] = None,
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Revoke the current access token and, if sent, the refresh token"""
+    if request is not None and request.refresh_token:
+        await db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == hash_refresh_token(request.refresh_token),
+                RefreshToken.revoked_at.is_(None),
+            )
+            .values(revoked_at=datetime.utcnow())
+        )
+
+    jti, expires_at = payload.get("jti"), payload.get("exp")
+    if jti is not None and isinstance(expires_at, (int, float)):
+        await revoked_tokens.arevoke(db, jti, expires_at)
+    else:
+        # Tokens issued before the jti claim existed cannot be revoked, they just expire
+        await db.commit()
+    return {"message": "Logged out"}
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+import codecs
 import os
 from pathlib import Path
 
-from backend.database import get_db
+from backend.database import get_async_db
 from backend.models.curriculum import Curriculum
 from backend.schemas.curriculum import (
     CurriculumUploadResponse,
@@ -13,7 +15,11 @@ from backend.schemas.curriculum import (
 )
 from backend.utils.dependencies import get_admin_user
 from backend.models.user import User
-from backend.services.curriculum_parser import parse_markdown_keywords
+from backend.services.curriculum_parser import KeywordParser
+from backend.services.keyword_index import build_keyword_index
+from backend.services.rewrite_cache import rewrite_cache
+from backend.services.active_config import active_config
+from backend.services.rewrite_store import delete_rewrites_for_curriculum
 
 router = APIRouter(prefix="/api/curriculum", tags=["curriculum"])
 
@@ -21,12 +27,15 @@ router = APIRouter(prefix="/api/curriculum", tags=["curriculum"])
 UPLOAD_DIR = Path("backend/uploads/curriculum")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+# Uploads are read, saved and parsed in chunks of this many bytes
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
 
 @router.post("/upload", response_model=CurriculumUploadResponse, status_code=status.HTTP_200_OK)
 async def upload_curriculum(
     file: UploadFile = File(...),
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload a markdown curriculum file (Admin only)"""
     # Validate file extension
@@ -36,29 +45,55 @@ async def upload_curriculum(
             detail="Only markdown (.md) files are allowed"
         )
     
-    # Read file content
-    content = await file.read()
-    content_str = content.decode('utf-8')
+    # Save the file and parse keywords (with the heading each came from) in
+    # one pass over the upload, without holding the whole file in memory
+    file_path = UPLOAD_DIR / file.filename
+    partial_path = file_path.with_name(file_path.name + ".part")
+    parser = KeywordParser()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with open(partial_path, 'wb') as f:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+                parser.feed(decoder.decode(chunk))
+            parser.feed(decoder.decode(b"", final=True))
+    except UnicodeDecodeError:
+        partial_path.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Curriculum file must be UTF-8 encoded"
+        )
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
+    # Only replace an existing file of the same name once the upload is complete
+    os.replace(partial_path, file_path)
     
-    # Parse markdown to extract keywords
-    keywords = parse_markdown_keywords(content_str)
+    entries = parser.close()
+    keywords = [keyword for keyword, _ in entries]
     
-    # Save file to uploads directory
-    file_path = UPLOAD_DIR / file.filename
-    with open(file_path, 'wb') as f:
-        f.write(content)
+    # Precompute the keyword index used on the rewrite hot path
+    keyword_index = build_keyword_index(keywords, [category for _, category in entries])
     
     # Create curriculum record in database
     curriculum = Curriculum(
         user_id=current_user.id,
         filename=file.filename,
         file_path=str(file_path),
-        keywords=keywords
+        keywords=keywords,
+        keyword_index=keyword_index
     )
     
     db.add(curriculum)
-    db.commit()
-    db.refresh(curriculum)
+    await db.commit()
+    await db.refresh(curriculum)
+    
+    # Active curriculum changed, cached rewrites and config snapshots are stale
+    rewrite_cache.clear()
+    active_config.invalidate()
     
     return CurriculumUploadResponse(
         id=curriculum.id,
@@ -71,10 +106,12 @@ async def upload_curriculum(
 @router.get("", response_model=List[CurriculumListItem], status_code=status.HTTP_200_OK)
 async def list_curricula(
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List all curricula (Admin only)"""
-    curricula = db.query(Curriculum).filter(Curriculum.user_id == current_user.id).all()
+    curricula = (await db.scalars(
+        select(Curriculum).where(Curriculum.user_id == current_user.id)
+    )).all()
     
     return [
         CurriculumListItem(
@@ -91,13 +128,13 @@ async def list_curricula(
 async def get_curriculum(
     curriculum_id: int,
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get curriculum by ID (Admin only)"""
-    curriculum = db.query(Curriculum).filter(
+    curriculum = await db.scalar(select(Curriculum).where(
         Curriculum.id == curriculum_id,
         Curriculum.user_id == current_user.id
-    ).first()
+    ))
     
     if not curriculum:
         raise HTTPException(
@@ -118,13 +155,13 @@ async def get_curriculum(
 async def delete_curriculum(
     curriculum_id: int,
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a curriculum (Admin only)"""
-    curriculum = db.query(Curriculum).filter(
+    curriculum = await db.scalar(select(Curriculum).where(
         Curriculum.id == curriculum_id,
         Curriculum.user_id == current_user.id
-    ).first()
+    ))
     
     if not curriculum:
         raise HTTPException(
@@ -141,9 +178,14 @@ async def delete_curriculum(
             # Log error but continue with database deletion
             print(f"Warning: Failed to delete file {file_path}: {e}")
     
-    # Delete from database
-    db.delete(curriculum)
-    db.commit()
+    # Delete from database (including rewrites stored for this curriculum)
+    await db.run_sync(delete_rewrites_for_curriculum, curriculum.id)
+    await db.delete(curriculum)
+    await db.commit()
+    
+    # Active curriculum may have changed, cached rewrites and config snapshots are stale
+    rewrite_cache.clear()
+    active_config.invalidate()
     
     return {"message": "Curriculum deleted successfully"}
 
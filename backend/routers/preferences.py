@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from backend.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import get_async_db
 from backend.models.preferences import Preferences
 from backend.models.user import User
 from backend.schemas.preferences import (
@@ -9,6 +10,8 @@ from backend.schemas.preferences import (
     PreferencesResponse
 )
 from backend.utils.dependencies import get_admin_user
+from backend.services.rewrite_cache import rewrite_cache
+from backend.services.active_config import active_config
 
 router = APIRouter(prefix="/api/preferences", tags=["preferences"])
 
@@ -17,13 +20,13 @@ router = APIRouter(prefix="/api/preferences", tags=["preferences"])
 async def create_preferences(
     preferences_data: PreferencesCreate,
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create preferences for current admin user"""
     # Check if preferences already exist for this user
-    existing_preferences = db.query(Preferences).filter(
+    existing_preferences = await db.scalar(select(Preferences).where(
         Preferences.user_id == current_user.id
-    ).first()
+    ))
     
     if existing_preferences:
         raise HTTPException(
@@ -40,8 +43,12 @@ async def create_preferences(
     )
     
     db.add(new_preferences)
-    db.commit()
-    db.refresh(new_preferences)
+    await db.commit()
+    await db.refresh(new_preferences)
+    
+    # Active preferences changed, cached rewrites and config snapshots are stale
+    rewrite_cache.clear()
+    active_config.invalidate()
     
     return new_preferences
 
@@ -49,12 +56,12 @@ async def create_preferences(
 @router.get("", response_model=PreferencesResponse)
 async def get_preferences(
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current admin user's preferences"""
-    preferences = db.query(Preferences).filter(
+    preferences = await db.scalar(select(Preferences).where(
         Preferences.user_id == current_user.id
-    ).first()
+    ))
     
     if not preferences:
         raise HTTPException(
@@ -70,12 +77,12 @@ async def update_preferences(
     preferences_id: int,
     preferences_data: PreferencesUpdate,
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update preferences for current admin user"""
-    preferences = db.query(Preferences).filter(
+    preferences = await db.scalar(select(Preferences).where(
         Preferences.id == preferences_id
-    ).first()
+    ))
     
     if not preferences:
         raise HTTPException(
@@ -95,8 +102,12 @@ async def update_preferences(
     preferences.keywords = preferences_data.keywords
     preferences.subject_preferences = preferences_data.subject_preferences
     
-    db.commit()
-    db.refresh(preferences)
+    await db.commit()
+    await db.refresh(preferences)
+    
+    # Active preferences changed, cached rewrites and config snapshots are stale
+    rewrite_cache.clear()
+    active_config.invalidate()
     
     return preferences
 
@@ -104,12 +115,12 @@ async def update_preferences(
 @router.delete("", status_code=status.HTTP_200_OK)
 async def delete_preferences(
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete preferences for current admin user"""
-    preferences = db.query(Preferences).filter(
+    preferences = await db.scalar(select(Preferences).where(
         Preferences.user_id == current_user.id
-    ).first()
+    ))
     
     if not preferences:
         raise HTTPException(
@@ -118,8 +129,12 @@ async def delete_preferences(
         )
     
     # Delete from database
-    db.delete(preferences)
-    db.commit()
+    await db.delete(preferences)
+    await db.commit()
+    
+    # Active preferences changed, cached rewrites and config snapshots are stale
+    rewrite_cache.clear()
+    active_config.invalidate()
     
     return {"message": "Preferences deleted successfully"}
 
@@ -1,38 +1,91 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-from backend.services.mock_rednote import MockRedNoteAdapter
+import asyncio
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from typing import List, Optional
+from backend.services.platform_adapter import AsyncPlatformAdapter
+from backend.services.platform_registry import create_platform_adapter
 from backend.schemas.post import Post
 
 router = APIRouter(prefix="/api/rednote", tags=["rednote"])
 
-# Initialize adapter (in production, this would be injected via dependency)
-_adapter = MockRedNoteAdapter()
+# Feed page sizes (the default covers the whole curated demo feed)
+DEFAULT_FEED_PAGE_SIZE = 20
+MAX_FEED_PAGE_SIZE = 100
+
+# Response header carrying the cursor of the next feed page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def get_adapter(request: Request) -> AsyncPlatformAdapter:
+    """Dependency to get the app-scoped platform adapter (created on startup, see PLATFORM_ADAPTER)"""
+    adapter = getattr(request.app.state, "platform_adapter", None)
+    if adapter is None:
+        # Startup hook has not run (e.g. TestClient used without a context manager)
+        adapter = create_platform_adapter()
+        request.app.state.platform_adapter = adapter
+    return adapter
 
 
 @router.get("/feed", response_model=List[Post])
-async def get_feed():
-    """Get feed of RedNote posts"""
+async def get_feed(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(DEFAULT_FEED_PAGE_SIZE, ge=1, le=MAX_FEED_PAGE_SIZE),
+    adapter: AsyncPlatformAdapter = Depends(get_adapter)
+):
+    """
+    Get one page of the RedNote feed, newest first
+    The cursor of the next page is returned in the X-Next-Cursor header.
+    Platform API failures are reported as 502, timeouts as 503.
+    """
     try:
-        feed = _adapter.get_feed()
-        return feed
+        page = await adapter.get_feed_page(cursor, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except (httpx.TimeoutException, asyncio.TimeoutError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Platform API timed out. Please try again."
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Platform API request failed: {str(e)}"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch feed: {str(e)}"
         )
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.posts
 
 
 @router.get("/posts/{post_id}", response_model=Post)
-async def get_post(post_id: str):
-    """Get a single RedNote post by ID"""
+async def get_post(post_id: str, adapter: AsyncPlatformAdapter = Depends(get_adapter)):
+    """Get a single RedNote post by ID (502/503 if the platform API fails or times out)"""
     try:
-        post = _adapter.get_post(post_id)
+        post = await adapter.get_post(post_id)
         return post
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
+    except (httpx.TimeoutException, asyncio.TimeoutError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Platform API timed out. Please try again."
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Platform API request failed: {str(e)}"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,71 +1,68 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy.sql import func
-from typing import Optional
-
-from backend.database import get_db
-from backend.models.curriculum import Curriculum
-from backend.models.preferences import Preferences
+import asyncio
+import json
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List, Optional
+
+from backend.database import get_async_db
 from backend.models.user import User
-from backend.schemas.rewrite import RewriteRequest, RewriteResponse
-from backend.utils.dependencies import get_current_user
+from backend.schemas.rewrite import (
+    RewriteRequest,
+    RewriteResponse,
+    BatchRewriteRequest,
+    BatchRewriteResult,
+    BatchRewriteResponse,
+    RewrittenPost,
+)
+from backend.utils.dependencies import get_current_user, get_rewriter_service
 from backend.services.rewriter import RewriterService
+from backend.services.active_config import ActiveConfig, active_config
+from backend.services.platform_adapter import AsyncPlatformAdapter
+from backend.routers.rednote import (
+    DEFAULT_FEED_PAGE_SIZE,
+    MAX_FEED_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    get_adapter,
+)
 
 router = APIRouter(prefix="/api/rewrite", tags=["rewrite"])
 
 
-def get_active_curriculum(db: Session, curriculum_id: Optional[int] = None) -> Curriculum:
+async def resolve_keywords(
+    db: AsyncSession, curriculum_id: Optional[int] = None
+) -> ActiveConfig:
     """
-    Get active curriculum (from any admin)
+    Resolve curriculum and preference keywords for a rewrite request
+    Served from the in-process active configuration snapshot; the database is
+    only read after a curriculum/preferences change (or snapshot expiry).
     
     Args:
-        db: Database session
-        curriculum_id: Optional specific curriculum ID, otherwise uses most recent from any admin
+        db: Async database session
+        curriculum_id: Optional specific curriculum ID
         
     Returns:
-        Curriculum object
+        ActiveConfig with the curriculum/preference keywords and their merged keyword index
         
     Raises:
         HTTPException: If curriculum not found
     """
-    if curriculum_id:
-        curriculum = db.query(Curriculum).filter(
-            Curriculum.id == curriculum_id
-        ).first()
-    else:
-        # Get most recent curriculum from any admin
-        curriculum = db.query(Curriculum).order_by(Curriculum.created_at.desc()).first()
-    
-    if not curriculum:
+    config = await active_config.aget(db, curriculum_id)
+    if config is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Curriculum not found. Please ask an admin to upload a curriculum first."
         )
-    
-    return curriculum
-
-
-def get_active_preferences(db: Session) -> Optional[Preferences]:
-    """
-    Get active preferences (from any admin)
-    
-    Args:
-        db: Database session
-        
-    Returns:
-        Preferences object or None if not found
-    """
-    # Get most recent preferences from any admin (by updated_at, fallback to created_at)
-    return db.query(Preferences).order_by(
-        func.coalesce(Preferences.updated_at, Preferences.created_at).desc()
-    ).first()
+    return config
 
 
 @router.post("", response_model=RewriteResponse, status_code=status.HTTP_200_OK)
 async def rewrite_text(
     request: RewriteRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    rewriter: RewriterService = Depends(get_rewriter_service)
 ):
     """
     Rewrite text to incorporate curriculum keywords
@@ -74,30 +71,27 @@ async def rewrite_text(
     Args:
         request: Rewrite request with text and optional curriculum_id
         current_user: Current authenticated user (from dependency)
-        db: Database session
+        db: Async database session
+        rewriter: App-scoped rewriter service
         
     Returns:
         RewriteResponse with original text, rewritten text, and keywords used
     """
-    # Get curriculum (from any admin)
-    curriculum = get_active_curriculum(
+    # Get curriculum and preferences keywords (from any admin)
+    config = await resolve_keywords(
         db=db,
         curriculum_id=request.curriculum_id
     )
     
-    # Get preferences (optional, from any admin)
-    preferences = get_active_preferences(db=db)
-    
-    # Extract keywords
-    curriculum_keywords = curriculum.keywords if curriculum.keywords else []
-    preference_keywords = preferences.keywords if preferences and preferences.keywords else []
-    
     # Rewrite text
-    rewriter = RewriterService()
-    rewritten_text, keywords_used = rewriter.rewrite(
+    rewritten_text, keywords_used = await rewriter.arewrite(
         original_text=request.text,
-        curriculum_keywords=curriculum_keywords,
-        preference_keywords=preference_keywords
+        curriculum_keywords=config.curriculum_keywords,
+        preference_keywords=config.preference_keywords,
+        db=db,
+        curriculum_id=config.curriculum_id,
+        curriculum_index=config.curriculum_index,
+        keyword_index=config.keyword_index
     )
     
     return RewriteResponse(
@@ -106,3 +100,234 @@ async def rewrite_text(
         keywords_used=keywords_used
     )
 
+
+
+@router.post("/batch", response_model=BatchRewriteResponse, status_code=status.HTTP_200_OK)
+async def rewrite_batch(
+    request: BatchRewriteRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    adapter: AsyncPlatformAdapter = Depends(get_adapter),
+    rewriter: RewriterService = Depends(get_rewriter_service)
+):
+    """
+    Rewrite many texts (or RedNote posts) in one request
+    Curriculum and preferences are resolved once and the texts are rewritten
+    concurrently; results are returned in request order.
+    
+    Args:
+        request: Batch rewrite request with texts or post_ids and optional curriculum_id
+        current_user: Current authenticated user (from dependency)
+        db: Async database session
+        adapter: Platform adapter used to resolve post_ids
+        rewriter: App-scoped rewriter service
+        
+    Returns:
+        BatchRewriteResponse with one result per requested item
+    """
+    # Resolve post IDs to texts before doing any rewriting
+    if request.post_ids is not None:
+        try:
+            texts = [post.text for post in await adapter.get_posts_bulk(request.post_ids)]
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=str(e)
+            )
+        except (httpx.TimeoutException, asyncio.TimeoutError):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Platform API timed out. Please try again."
+            )
+        except httpx.HTTPError as e:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Platform API request failed: {str(e)}"
+            )
+        post_ids = request.post_ids
+    else:
+        texts = request.texts
+        post_ids = [None] * len(texts)
+    
+    config = await resolve_keywords(
+        db=db,
+        curriculum_id=request.curriculum_id
+    )
+    
+    rewrites = await rewriter.rewrite_batch(
+        original_texts=texts,
+        curriculum_keywords=config.curriculum_keywords,
+        preference_keywords=config.preference_keywords,
+        db=db,
+        curriculum_id=config.curriculum_id,
+        curriculum_index=config.curriculum_index,
+        keyword_index=config.keyword_index
+    )
+    
+    return BatchRewriteResponse(results=[
+        BatchRewriteResult(
+            post_id=post_id,
+            original_text=text,
+            rewritten_text=rewritten_text,
+            keywords_used=keywords_used
+        )
+        for post_id, text, (rewritten_text, keywords_used) in zip(post_ids, texts, rewrites)
+    ])
+
+
+@router.get("/feed", response_model=List[RewrittenPost], status_code=status.HTTP_200_OK)
+async def rewrite_feed(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(DEFAULT_FEED_PAGE_SIZE, ge=1, le=MAX_FEED_PAGE_SIZE),
+    curriculum_id: Optional[int] = Query(None, description="Optional curriculum ID. Uses most recent if not provided"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    adapter: AsyncPlatformAdapter = Depends(get_adapter),
+    rewriter: RewriterService = Depends(get_rewriter_service)
+):
+    """
+    Get one page of the RedNote feed with every post already rewritten
+    Rewrites come from the cache/store where present, the rest are computed
+    concurrently (see RewriterService.rewrite_batch), so a feed renders
+    from one request. Paged like GET /api/rednote/feed.
+    
+    Args:
+        response: Response (carries the X-Next-Cursor header)
+        cursor: Cursor of the page to fetch (None for the first page)
+        limit: Maximum number of posts
+        curriculum_id: Optional curriculum ID
+        current_user: Current authenticated user (from dependency)
+        db: Async database session
+        adapter: Platform adapter the feed is read from
+        rewriter: App-scoped rewriter service
+        
+    Returns:
+        Posts with rewritten_text and keywords_used, in feed order
+        
+    Raises:
+        HTTPException: If the cursor is invalid or the curriculum not found (4xx),
+            or the platform API failed (502) or timed out (503)
+    """
+    try:
+        page = await adapter.get_feed_page(cursor, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except (httpx.TimeoutException, asyncio.TimeoutError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Platform API timed out. Please try again."
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Platform API request failed: {str(e)}"
+        )
+    
+    config = await resolve_keywords(
+        db=db,
+        curriculum_id=curriculum_id
+    )
+    
+    rewrites = await rewriter.rewrite_batch(
+        original_texts=[post.text for post in page.posts],
+        curriculum_keywords=config.curriculum_keywords,
+        preference_keywords=config.preference_keywords,
+        db=db,
+        curriculum_id=config.curriculum_id,
+        curriculum_index=config.curriculum_index,
+        keyword_index=config.keyword_index
+    )
+    
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return [
+        RewrittenPost(**post.model_dump(), rewritten_text=rewritten_text, keywords_used=keywords_used)
+        for post, (rewritten_text, keywords_used) in zip(page.posts, rewrites)
+    ]
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_rewrite_response(
+    text: str,
+    curriculum_id: Optional[int],
+    db: AsyncSession,
+    rewriter: RewriterService
+) -> StreamingResponse:
+    """
+    Build the SSE response for a streaming rewrite
+    Keywords are resolved before the stream starts so a missing curriculum
+    is still reported as a normal 404.
+    
+    Events:
+        token: {"text": chunk} for each generated chunk
+        done: {"original_text", "rewritten_text", "keywords_used"} once at the end
+        error: {"detail": message} if the LLM fails mid-stream
+    """
+    config = await resolve_keywords(
+        db=db,
+        curriculum_id=curriculum_id
+    )
+    
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for event, data in rewriter.astream(
+                original_text=text,
+                curriculum_keywords=config.curriculum_keywords,
+                preference_keywords=config.preference_keywords,
+                db=db,
+                curriculum_id=config.curriculum_id,
+                curriculum_index=config.curriculum_index,
+                keyword_index=config.keyword_index
+            ):
+                if event == "token":
+                    yield format_sse("token", {"text": data})
+                else:
+                    rewritten_text, keywords_used = data
+                    yield format_sse("done", {
+                        "original_text": text,
+                        "rewritten_text": rewritten_text,
+                        "keywords_used": keywords_used
+                    })
+        except Exception:
+            yield format_sse("error", {"detail": "Rewrite failed. Please try again."})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/stream")
+async def rewrite_stream(
+    request: RewriteRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    rewriter: RewriterService = Depends(get_rewriter_service)
+):
+    """
+    Stream a rewrite as Server-Sent Events
+    Tokens are sent as the LLM generates them, followed by a final "done"
+    event carrying keywords_used.
+    
+    Args:
+        request: Rewrite request with text and optional curriculum_id
+        current_user: Current authenticated user (from dependency)
+        db: Async database session
+        rewriter: App-scoped rewriter service
+        
+    Returns:
+        text/event-stream response
+        
+    Raises:
+        HTTPException: If curriculum not found
+    """
+    return await stream_rewrite_response(request.text, request.curriculum_id, db, rewriter)
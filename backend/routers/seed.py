@@ -8,6 +8,9 @@ from backend.database import get_db
 from backend.utils.dependencies import get_admin_user
 from backend.models.user import User
 from backend.database_seed import seed_database
+from backend.services.rewrite_cache import rewrite_cache
+from backend.services.active_config import active_config
+from backend.services.user_cache import user_cache
 
 router = APIRouter(prefix="/api/seed", tags=["seed"])
 
@@ -20,6 +23,10 @@ async def run_seed(
     """Manually trigger database seeding (Admin only)"""
     try:
         seed_database()
+        # Seeding may add users, curricula and preferences
+        rewrite_cache.clear()
+        active_config.invalidate()
+        user_cache.invalidate()
         return {"message": "Database seeding completed successfully"}
     except Exception as e:
         raise HTTPException(
@@ -29,6 +29,7 @@ class UserResponse(BaseModel):
 class Token(BaseModel):
     """Schema for JWT token response"""
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
     user: UserResponse  # Use actual type instead of forward reference
 
@@ -38,3 +39,13 @@ class RegisterResponse(BaseModel):
     message: str
     user_id: int
 
+
+
+class RefreshRequest(BaseModel):
+    """Schema for renewing an access token"""
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    """Schema for logout (the refresh token to revoke, if the client has one)"""
+    refresh_token: Optional[str] = None
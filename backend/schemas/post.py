@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 
 class Post(BaseModel):
@@ -17,3 +17,11 @@ class Post(BaseModel):
     class Config:
         from_attributes = True
 
+
+
+class FeedPage(BaseModel):
+    """One page of a platform feed"""
+    posts: List[Post]
+    next_cursor: Optional[str] = Field(
+        default=None, description="Opaque cursor for the next page, None on the last page"
+    )
@@ -1,5 +1,9 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional
+from backend.schemas.post import Post
+
+# Upper bound on items per batch rewrite request (a full feed page)
+MAX_BATCH_SIZE = 100
 
 
 class RewriteRequest(BaseModel):
@@ -14,3 +18,35 @@ class RewriteResponse(BaseModel):
     rewritten_text: str
     keywords_used: List[str]
 
+
+
+class BatchRewriteRequest(BaseModel):
+    """Schema for batch rewrite request (either texts or post_ids)"""
+    texts: Optional[List[str]] = Field(None, description="Texts to be rewritten, in order")
+    post_ids: Optional[List[str]] = Field(None, description="RedNote post IDs whose text should be rewritten, in order")
+    curriculum_id: Optional[int] = Field(None, description="Optional curriculum ID. Uses most recent if not provided")
+
+    @model_validator(mode="after")
+    def check_texts_or_post_ids(self):
+        if (self.texts is None) == (self.post_ids is None):
+            raise ValueError("Provide exactly one of 'texts' or 'post_ids'")
+        items = self.texts if self.texts is not None else self.post_ids
+        if len(items) > MAX_BATCH_SIZE:
+            raise ValueError(f"At most {MAX_BATCH_SIZE} items can be rewritten per batch")
+        return self
+
+
+class BatchRewriteResult(RewriteResponse):
+    """Schema for a single batch rewrite result"""
+    post_id: Optional[str] = None
+
+
+class BatchRewriteResponse(BaseModel):
+    """Schema for batch rewrite response (results are in request order)"""
+    results: List[BatchRewriteResult]
+
+
+class RewrittenPost(Post):
+    """Schema for a feed post together with its rewrite"""
+    rewritten_text: str
+    keywords_used: List[str]
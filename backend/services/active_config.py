@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from backend.models.curriculum import Curriculum
+from backend.models.preferences import Preferences
+from backend.services.keyword_index import KeywordIndex, get_keyword_index
+from backend.utils.metrics import ACTIVE_CONFIG_LOOKUPS
+
+
+def load_curriculum(db: Session, curriculum_id: Optional[int] = None) -> Optional[Curriculum]:
+    """
+    Load a curriculum by ID, or the most recent curriculum from any admin
+
+    Args:
+        db: Database session
+        curriculum_id: Optional specific curriculum ID
+
+    Returns:
+        Curriculum object or None if not found
+    """
+    if curriculum_id:
+        return db.query(Curriculum).filter(Curriculum.id == curriculum_id).first()
+    return db.query(Curriculum).order_by(Curriculum.created_at.desc()).first()
+
+
+def load_active_preferences(db: Session) -> Optional[Preferences]:
+    """
+    Load the most recent preferences from any admin (by updated_at, fallback to created_at)
+
+    Args:
+        db: Database session
+
+    Returns:
+        Preferences object or None if not found
+    """
+    return db.query(Preferences).order_by(
+        func.coalesce(Preferences.updated_at, Preferences.created_at).desc()
+    ).first()
+
+
+class ActiveConfig:
+    """
+    Snapshot of the keyword configuration a rewrite runs with
+    Treat as read-only: it is shared between requests.
+    """
+
+    def __init__(
+        self,
+        curriculum_id: int,
+        curriculum_keywords: List[str],
+        curriculum_index: KeywordIndex,
+        preference_keywords: List[str]
+    ):
+        self.curriculum_id = curriculum_id
+        self.curriculum_keywords = curriculum_keywords
+        self.curriculum_index = curriculum_index
+        self.preference_keywords = preference_keywords
+        # Merged and deduplicated keywords (curriculum first), as used by the rewriter
+        self.keyword_index = curriculum_index.merge(get_keyword_index(preference_keywords))
+        self.keywords = self.keyword_index.keywords
+
+
+class ActiveConfigCache:
+    """
+    In-process cache of ActiveConfig snapshots, keyed by requested curriculum ID
+    (None for "most recent curriculum")
+
+    The curriculum and preferences routers call invalidate() after every write,
+    so steady-state rewrites do no database reads. ttl_seconds bounds how stale
+    a snapshot can get when another process made the write.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 64,
+        ttl_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Optional[int], tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on invalidate() so loads that raced with a write are not cached
+        self._generation = 0
+
+    def get(self, db: Session, curriculum_id: Optional[int] = None) -> Optional[ActiveConfig]:
+        """
+        Get the active configuration, loading it from the database on a miss
+
+        Args:
+            db: Database session (only used on a miss)
+            curriculum_id: Optional specific curriculum ID, otherwise the most recent curriculum
+
+        Returns:
+            ActiveConfig, or None if the curriculum does not exist
+        """
+        key = curriculum_id or None
+        generation, config = self._cached(key)
+        if config is not None:
+            return config
+        return self._remember(key, generation, self._load(db, curriculum_id))
+
+    async def aget(self, db: AsyncSession, curriculum_id: Optional[int] = None) -> Optional[ActiveConfig]:
+        """
+        Async version of get (the database is only read on a miss)
+
+        Args:
+            db: Async database session (only used on a miss)
+            curriculum_id: Optional specific curriculum ID, otherwise the most recent curriculum
+
+        Returns:
+            ActiveConfig, or None if the curriculum does not exist
+        """
+        key = curriculum_id or None
+        generation, config = self._cached(key)
+        if config is not None:
+            return config
+        return self._remember(key, generation, await db.run_sync(self._load, curriculum_id))
+
+    def _cached(self, key: Optional[int]) -> Tuple[int, Optional[ActiveConfig]]:
+        """Current generation and the live snapshot for key, if any"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() < entry[0]:
+                self._entries.move_to_end(key)
+                ACTIVE_CONFIG_LOOKUPS.labels(result="hit").inc()
+                return self._generation, entry[1]
+            generation = self._generation
+        ACTIVE_CONFIG_LOOKUPS.labels(result="miss").inc()
+        return generation, None
+
+    def _remember(
+        self, key: Optional[int], generation: int, config: Optional[ActiveConfig]
+    ) -> Optional[ActiveConfig]:
+        """Cache a freshly loaded snapshot unless invalidate() ran while it was loading"""
+        if config is None or self.max_size <= 0:
+            return config
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (self._clock() + self.ttl_seconds, config)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return config
+
+    @staticmethod
+    def _load(db: Session, curriculum_id: Optional[int]) -> Optional[ActiveConfig]:
+        curriculum = load_curriculum(db, curriculum_id)
+        if not curriculum:
+            return None
+        preferences = load_active_preferences(db)
+
+        curriculum_keywords = list(curriculum.keywords) if curriculum.keywords else []
+        preference_keywords = list(preferences.keywords) if preferences and preferences.keywords else []
+        # Load the index stored at upload time (rebuilt for curricula that predate it)
+        curriculum_index = KeywordIndex.from_stored(curriculum.keyword_index, curriculum_keywords)
+        return ActiveConfig(curriculum.id, curriculum_keywords, curriculum_index, preference_keywords)
+
+    def invalidate(self) -> None:
+        """Drop all snapshots (called when curricula or preferences change)"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+# Process-wide snapshot cache used by the rewrite routes
+active_config = ActiveConfigCache(
+    ttl_seconds=float(os.getenv("ACTIVE_CONFIG_TTL_SECONDS", "300")),
+)
@@ -1,5 +1,32 @@
 import re
-from typing import List
+from typing import List, Optional, Tuple
+
+# Filter out broad/generic keywords (grade levels, general categories)
+BROAD_KEYWORDS_PATTERNS = [
+    r'^(elementary|middle|high)\s*(school)?',
+    r'grade[s]?\s*(k-?\d+|\d+-\d+)',
+    r'^overview$',
+    r'^core components$',
+    r'^key concepts$',
+    r'^assessment methods$',
+    r'^resources$',
+    r'^grade levels?$',
+    r'^level$',
+    r'^process$',
+    r'^skills?$',
+    r'^genres?$',
+    r'^study$',
+    r'^development$',
+]
+
+# One alternation, matched once per keyword
+BROAD_KEYWORDS_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in BROAD_KEYWORDS_PATTERNS))
+
+STOP_WORDS = {'the', 'and', 'or', 'for', 'with', 'from', 'that', 'this', 'are', 'was', 'were', 'has', 'have', 'had'}
+
+HEADING_RE = re.compile(r'^(#{1,3})\s+(.+)$')
+BOLD_RE = re.compile(r'\*\*(.+?)\*\*|__(.+?)__')
+LIST_ITEM_RE = re.compile(r'^[-*]\s+(.+)$')
 
 
 def parse_markdown_keywords(content: str) -> List[str]:
@@ -17,110 +44,183 @@ def parse_markdown_keywords(content: str) -> List[str]:
     Returns:
         List of extracted keywords
     """
-    keywords = []
+    return [keyword for keyword, _ in parse_markdown_keyword_entries(content)]
+
+
+def parse_markdown_keyword_entries(content: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    Parse markdown content and extract keywords with the heading they came from.
     
-    # Extract headings (# ## ###)
-    heading_pattern = r'^#{1,3}\s+(.+)$'
-    for line in content.split('\n'):
-        match = re.match(heading_pattern, line.strip())
-        if match:
-            heading_text = match.group(1).strip()
+    Args:
+        content: Markdown content as string
+        
+    Returns:
+        List of (keyword, category) tuples, in the same order as
+        parse_markdown_keywords; category is the nearest enclosing heading
+        (for headings, the parent heading) or None
+    """
+    parser = KeywordParser()
+    parser.feed(content)
+    return parser.close()
+
+
+class KeywordParser:
+    """
+    Incremental markdown keyword parser (single pass, constant memory per line)
+
+    feed() takes the document in chunks of any size, e.g. as an upload is
+    read; close() returns the same entries as parse_markdown_keyword_entries
+    would for the whole document. Keywords are filtered and deduplicated as
+    lines arrive, so only distinct keywords are kept, not the document.
+    """
+
+    def __init__(self):
+        # Output order is headings, then bold text, then list items
+        self._headings = _KeywordBucket()
+        self._bold = _KeywordBucket()
+        self._list_items = _KeywordBucket()
+        # Stack of (level, heading_text) for the headings enclosing the current line
+        self._heading_stack: List[Tuple[int, str]] = []
+        # Trailing text of the last chunk (a line without its newline yet)
+        self._pending = ""
+        self._closed = False
+
+    def feed(self, text: str) -> None:
+        """Parse the next chunk of the document"""
+        if self._closed:
+            raise ValueError("feed() after close()")
+        lines = (self._pending + text).split('\n')
+        self._pending = lines.pop()
+        for line in lines:
+            self._parse_line(line)
+
+    def close(self) -> List[Tuple[str, Optional[str]]]:
+        """
+        Finish parsing (the last line needs no trailing newline)
+
+        Returns:
+            List of (keyword, category) tuples, see parse_markdown_keyword_entries
+        """
+        if not self._closed:
+            self._parse_line(self._pending)
+            self._pending = ""
+            self._closed = True
+
+        seen = set()
+        entries = []
+        for bucket in (self._headings, self._bold, self._list_items):
+            for key, keyword, category in bucket.entries:
+                if key not in seen:
+                    seen.add(key)
+                    entries.append((keyword, category))
+        return entries
+
+    def _parse_line(self, line: str) -> None:
+        stripped = line.strip()
+        heading_stack = self._heading_stack
+        
+        # Extract headings (# ## ###)
+        heading_match = HEADING_RE.match(stripped)
+        if heading_match:
+            level = len(heading_match.group(1))
+            heading_text = heading_match.group(2).strip()
+            while heading_stack and heading_stack[-1][0] >= level:
+                heading_stack.pop()
+            parent = heading_stack[-1][1] if heading_stack else None
             if heading_text:
-                keywords.append(heading_text)
-    
-    # Extract bold text (**text** or __text__)
-    bold_pattern = r'\*\*(.+?)\*\*|__(.+?)__'
-    bold_matches = re.findall(bold_pattern, content)
-    for match in bold_matches:
-        # match is a tuple, get the non-empty one
-        bold_text = match[0] if match[0] else match[1]
-        if bold_text.strip():
-            keywords.append(bold_text.strip())
-    
-    # Extract list items (lines starting with - or *)
-    list_pattern = r'^[-*]\s+(.+)$'
-    for line in content.split('\n'):
-        match = re.match(list_pattern, line.strip())
-        if match:
-            list_item = match.group(1).strip()
-            # Remove bold markers if present
-            list_item = re.sub(r'\*\*(.+?)\*\*|__(.+?)__', r'\1\2', list_item)
-            # Split by colon if present (e.g., "**Variables**: x, y" -> "Variables", "x", "y")
-            if ':' in list_item:
-                parts = list_item.split(':', 1)
-                keyword_part = parts[0].strip()
-                if keyword_part:
-                    keywords.append(keyword_part)
-                # Also extract comma-separated values after colon
-                value_part = parts[1].strip()
-                if value_part:
-                    for value in value_part.split(','):
-                        value = value.strip()
-                        if value:
-                            keywords.append(value)
-            else:
-                # Check if list item contains comma-separated words (e.g., "Silver, Gold, Bronze")
-                if ',' in list_item:
-                    # Split by comma and add each as a separate keyword
-                    for item in list_item.split(','):
-                        item = item.strip()
-                        if item:
-                            keywords.append(item)
-                else:
-                    if list_item:
-                        keywords.append(list_item)
-    
-    # Filter out broad/generic keywords (grade levels, general categories)
-    broad_keywords_patterns = [
-        r'^(elementary|middle|high)\s*(school)?',
-        r'grade[s]?\s*(k-?\d+|\d+-\d+)',
-        r'^overview$',
-        r'^core components$',
-        r'^key concepts$',
-        r'^assessment methods$',
-        r'^resources$',
-        r'^grade levels?$',
-        r'^level$',
-        r'^process$',
-        r'^skills?$',
-        r'^genres?$',
-        r'^study$',
-        r'^development$',
-    ]
-    
-    # Also filter out very long phrases (likely section headers, not specific terms)
-    filtered_keywords = []
-    for keyword in keywords:
-        keyword_lower = keyword.lower().strip()
-        # Skip if matches broad patterns
-        is_broad = any(re.match(pattern, keyword_lower) for pattern in broad_keywords_patterns)
-        # Skip if too long (likely a sentence or description, not a specific term)
-        is_too_long = len(keyword) > 50
-        # Skip if contains "and" or "or" with multiple words (likely a category)
-        is_category = ' and ' in keyword_lower or ' or ' in keyword_lower
+                self._headings.add(heading_text, parent)
+                heading_stack.append((level, heading_text))
+        category = heading_stack[-1][1] if heading_stack else None
         
-        if not is_broad and not is_too_long and not is_category:
-            # If keyword is already a single word or short phrase, add it directly
-            # (comma-separated items are already split in the extraction phase)
-            if len(keyword.split()) <= 3:  # Single word or short phrase (max 3 words)
-                filtered_keywords.append(keyword)
-            else:
-                # For longer phrases, extract meaningful individual words
-                words = keyword.split()
-                for word in words:
-                    word = word.strip('.,!?;:')
-                    # Only add if it's a meaningful word (not too short, not a stop word)
-                    if len(word) > 2 and word.lower() not in ['the', 'and', 'or', 'for', 'with', 'from', 'that', 'this', 'are', 'was', 'were', 'has', 'have', 'had']:
-                        filtered_keywords.append(word)
-    
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_keywords = []
-    for keyword in filtered_keywords:
-        keyword_lower = keyword.lower().strip()
-        if keyword_lower and keyword_lower not in seen and len(keyword_lower) > 2:
-            seen.add(keyword_lower)
-            unique_keywords.append(keyword.strip())
+        # Extract bold text (**text** or __text__)
+        if '**' in line or '__' in line:
+            for match in BOLD_RE.finditer(line):
+                bold_text = (match.group(1) or match.group(2)).strip()
+                if bold_text:
+                    self._bold.add(bold_text, category)
+        
+        # Extract list items (lines starting with - or *)
+        list_match = LIST_ITEM_RE.match(stripped)
+        if list_match:
+            for item in _split_list_item(list_match.group(1).strip()):
+                self._list_items.add(item, category)
+
+
+class _KeywordBucket:
+    """Filtered keywords of one kind, first occurrence of each kept"""
+
+    def __init__(self):
+        self.entries: List[Tuple[str, str, Optional[str]]] = []  # (lowercase key, keyword, category)
+        self._seen = set()
+        # Raw keywords already filtered: a repeat can never add an entry
+        self._added = set()
+
+    def add(self, keyword: str, category: Optional[str]) -> None:
+        if keyword in self._added:
+            return
+        self._added.add(keyword)
+        for term in _filter_keyword(keyword):
+            key = term.lower().strip()
+            if key and key not in self._seen and len(key) > 2:
+                self._seen.add(key)
+                self.entries.append((key, term.strip(), category))
+
+
+def _filter_keyword(keyword: str) -> List[str]:
+    """Drop broad/long/category keywords and split long phrases into words"""
+    keyword_lower = keyword.lower().strip()
+    # Skip if matches broad patterns
+    if BROAD_KEYWORDS_RE.match(keyword_lower):
+        return []
+    # Skip if too long (likely a sentence or description, not a specific term)
+    if len(keyword) > 50:
+        return []
+    # Skip if contains "and" or "or" with multiple words (likely a category)
+    if ' and ' in keyword_lower or ' or ' in keyword_lower:
+        return []
     
-    return unique_keywords
+    # If keyword is already a single word or short phrase, add it directly
+    # (comma-separated items are already split in the extraction phase)
+    words = keyword.split()
+    if len(words) <= 3:  # Single word or short phrase (max 3 words)
+        return [keyword]
+    # For longer phrases, extract meaningful individual words
+    terms = []
+    for word in words:
+        word = word.strip('.,!?;:')
+        # Only add if it's a meaningful word (not too short, not a stop word)
+        if len(word) > 2 and word.lower() not in STOP_WORDS:
+            terms.append(word)
+    return terms
+
 
+def _split_list_item(list_item: str) -> List[str]:
+    """Split a markdown list item into keywords"""
+    items = []
+    # Remove bold markers if present
+    list_item = BOLD_RE.sub(r'\1\2', list_item)
+    # Split by colon if present (e.g., "**Variables**: x, y" -> "Variables", "x", "y")
+    if ':' in list_item:
+        parts = list_item.split(':', 1)
+        keyword_part = parts[0].strip()
+        if keyword_part:
+            items.append(keyword_part)
+        # Also extract comma-separated values after colon
+        value_part = parts[1].strip()
+        if value_part:
+            for value in value_part.split(','):
+                value = value.strip()
+                if value:
+                    items.append(value)
+    else:
+        # Check if list item contains comma-separated words (e.g., "Silver, Gold, Bronze")
+        if ',' in list_item:
+            # Split by comma and add each as a separate keyword
+            for item in list_item.split(','):
+                item = item.strip()
+                if item:
+                    items.append(item)
+        else:
+            if list_item:
+                items.append(list_item)
+    return items
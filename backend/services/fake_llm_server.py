@@ -0,0 +1,121 @@
+"""
+Local fake OpenAI-compatible chat completion server for tests and load testing.
+
+The "model" returns the original text from the rewrite prompt followed by the
+requested keywords, after an optional artificial latency. Requests with
+"stream": true get the completion as word-sized SSE chunks. The first
+fail_first requests can be answered with 503 to simulate an LLM outage.
+
+Usage (from project root):
+    FAKE_LLM_LATENCY_MS=200 uvicorn backend.services.fake_llm_server:app --port 9000
+    LLM_FORCE_MOCK=false DEEPSEEK_API_KEY=fake LLM_API_BASE_URL=http://localhost:9000/v1 \
+        uvicorn backend.main:app
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def fake_completion_text(prompt: str) -> str:
+    """Build the fake rewrite for a rewrite prompt"""
+    keywords_match = re.search(r"educational keywords: (.*)", prompt)
+    original_match = re.search(r"Original text: (.*)", prompt, flags=re.DOTALL)
+    original_text = original_match.group(1).strip() if original_match else prompt
+    keywords = keywords_match.group(1).strip() if keywords_match else ""
+    return f"{original_text} [{keywords}]" if keywords else original_text
+
+
+async def stream_chunks(content: str, model: str):
+    """Yield an OpenAI-style chat.completion.chunk SSE stream for content"""
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    pieces = re.findall(r"\s*\S+|\s+", content)
+    for piece in pieces + [None]:
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"content": piece} if piece is not None else {},
+                    "finish_reason": None if piece is not None else "stop",
+                }
+            ],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(0)
+    yield "data: [DONE]\n\n"
+
+
+def create_fake_llm_app(latency_seconds: float = 0.0, fail_first: int = 0) -> FastAPI:
+    """
+    Create a fake OpenAI-compatible server
+
+    Args:
+        latency_seconds: Artificial delay added to every completion
+        fail_first: Number of initial requests answered with 503
+
+    Returns:
+        FastAPI app; app.state.requests and app.state.max_in_flight record load
+    """
+    fake_app = FastAPI(title="Fake LLM Server")
+    fake_app.state.latency_seconds = latency_seconds
+    fake_app.state.fail_first = fail_first
+    fake_app.state.requests = 0
+    fake_app.state.in_flight = 0
+    fake_app.state.max_in_flight = 0
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        state = fake_app.state
+        state.requests += 1
+        state.in_flight += 1
+        state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            if state.latency_seconds:
+                await asyncio.sleep(state.latency_seconds)
+            prompt = body["messages"][-1]["content"]
+            content = fake_completion_text(prompt)
+        finally:
+            state.in_flight -= 1
+        if state.requests <= state.fail_first:
+            return JSONResponse(
+                status_code=503,
+                content={"error": {"message": "Temporarily unavailable", "type": "server_error"}}
+            )
+
+        if body.get("stream"):
+            return StreamingResponse(
+                stream_chunks(content, body.get("model", "fake-model")),
+                media_type="text/event-stream"
+            )
+
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake-model"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    fake_app.add_api_route("/chat/completions", chat_completions, methods=["POST"])
+    fake_app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+    return fake_app
+
+
+app = create_fake_llm_app(float(os.getenv("FAKE_LLM_LATENCY_MS", "0")) / 1000)
@@ -0,0 +1,89 @@
+"""
+Local fake platform API server for tests and load testing.
+
+Serves a PlatformAdapter (the mock RedNote feed by default) over the JSON API
+HTTPPlatformAdapter expects, after an optional artificial latency. The first
+fail_first requests can be answered with 503 to exercise client retries.
+
+Usage (from project root):
+    FAKE_PLATFORM_LATENCY_MS=50 uvicorn backend.services.fake_platform_server:app --port 9100
+    PLATFORM_ADAPTER=http PLATFORM_API_BASE_URL=http://localhost:9100 uvicorn backend.main:app
+"""
+
+import asyncio
+import os
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Query
+from backend.schemas.post import FeedPage, Post
+from backend.services.mock_rednote import MockRedNoteAdapter
+from backend.services.platform_adapter import PlatformAdapter
+
+
+def create_fake_platform_app(
+    adapter: Optional[PlatformAdapter] = None,
+    latency_seconds: float = 0.0,
+    fail_first: int = 0
+) -> FastAPI:
+    """
+    Create a fake platform API server
+
+    Args:
+        adapter: Adapter whose posts are served (defaults to MockRedNoteAdapter)
+        latency_seconds: Artificial delay added to every request
+        fail_first: Number of initial requests answered with 503
+
+    Returns:
+        FastAPI app; app.state.requests and app.state.max_in_flight record load
+    """
+    fake_app = FastAPI(title="Fake Platform Server")
+    fake_app.state.adapter = adapter or MockRedNoteAdapter()
+    fake_app.state.latency_seconds = latency_seconds
+    fake_app.state.fail_first = fail_first
+    fake_app.state.requests = 0
+    fake_app.state.in_flight = 0
+    fake_app.state.max_in_flight = 0
+
+    async def handle_request() -> None:
+        state = fake_app.state
+        state.requests += 1
+        state.in_flight += 1
+        state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            if state.latency_seconds:
+                await asyncio.sleep(state.latency_seconds)
+        finally:
+            state.in_flight -= 1
+        if state.requests <= state.fail_first:
+            raise HTTPException(status_code=503, detail="Temporarily unavailable")
+
+    @fake_app.get("/feed", response_model=FeedPage)
+    async def feed(cursor: Optional[str] = None, limit: int = Query(20, ge=1)):
+        await handle_request()
+        try:
+            return fake_app.state.adapter.get_feed_page(cursor, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @fake_app.get("/posts")
+    async def posts_bulk(ids: List[str] = Query(...)):
+        await handle_request()
+        found = []
+        for post_id in ids:
+            try:
+                found.append(fake_app.state.adapter.get_post(post_id))
+            except ValueError:
+                continue
+        return {"posts": [post.model_dump(mode="json") for post in found]}
+
+    @fake_app.get("/posts/{post_id}", response_model=Post)
+    async def post(post_id: str):
+        await handle_request()
+        try:
+            return fake_app.state.adapter.get_post(post_id)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+    return fake_app
+
+
+app = create_fake_platform_app(latency_seconds=float(os.getenv("FAKE_PLATFORM_LATENCY_MS", "0")) / 1000)
@@ -0,0 +1,93 @@
+import asyncio
+import os
+from typing import Dict, List, Optional
+from urllib.parse import quote
+import httpx
+from backend.schemas.post import FeedPage, Post
+from backend.services.platform_adapter import AsyncPlatformAdapter
+from backend.services.platform_http import PlatformHTTPClient, get_platform_http_client
+
+# Base URL of the platform API used by HTTPPlatformAdapter (PLATFORM_ADAPTER=http)
+PLATFORM_API_BASE_URL = os.getenv("PLATFORM_API_BASE_URL", "http://localhost:9100")
+
+# Maximum number of post IDs per bulk request
+BULK_CHUNK_SIZE = 100
+
+
+class HTTPPlatformAdapter(AsyncPlatformAdapter):
+    """
+    Adapter for a platform served over a JSON HTTP API
+
+    Expects the API served by backend.services.fake_platform_server:
+        GET /feed?cursor=&limit=  -> {"posts": [...], "next_cursor": ...}
+        GET /posts/{id}           -> post (404 if not found)
+        GET /posts?ids=...        -> {"posts": [...]} (found posts only)
+    Requests go through the shared pooled PlatformHTTPClient unless a client is given.
+    """
+
+    def __init__(self, base_url: str = PLATFORM_API_BASE_URL, client: Optional[PlatformHTTPClient] = None):
+        """
+        Args:
+            base_url: Base URL of the platform API
+            client: HTTP client (defaults to the process-wide platform client)
+        """
+        self.base_url = base_url.rstrip("/")
+        self._client = client
+
+    @property
+    def client(self) -> PlatformHTTPClient:
+        return self._client or get_platform_http_client()
+
+    async def get_feed(self) -> List[Post]:
+        """Get the whole feed by following next_cursor"""
+        posts: List[Post] = []
+        cursor: Optional[str] = None
+        while True:
+            page = await self.get_feed_page(cursor, limit=100)
+            posts.extend(page.posts)
+            cursor = page.next_cursor
+            if not cursor:
+                return posts
+
+    async def get_feed_page(self, cursor: Optional[str] = None, limit: int = 20) -> FeedPage:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        try:
+            data = await self.client.get_json(f"{self.base_url}/feed", params=params)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in (400, 422):
+                raise ValueError(f"Invalid cursor: {cursor}")
+            raise
+        return FeedPage.model_validate(data)
+
+    async def get_post(self, post_id: str) -> Post:
+        try:
+            data = await self.client.get_json(f"{self.base_url}/posts/{quote(post_id, safe='')}")
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                raise ValueError(f"Post not found: {post_id}")
+            raise
+        return Post.model_validate(data)
+
+    async def get_posts_bulk(self, post_ids: List[str]) -> List[Post]:
+        """Fetch each distinct ID once, in chunks of BULK_CHUNK_SIZE requested concurrently"""
+        distinct = list(dict.fromkeys(post_ids))
+        chunks = [distinct[i:i + BULK_CHUNK_SIZE] for i in range(0, len(distinct), BULK_CHUNK_SIZE)]
+        responses = await asyncio.gather(*[
+            self.client.get_json(f"{self.base_url}/posts", params={"ids": chunk}) for chunk in chunks
+        ])
+        found: Dict[str, Post] = {}
+        for data in responses:
+            for item in data["posts"]:
+                post = Post.model_validate(item)
+                found[post.id] = post
+        for post_id in post_ids:
+            if post_id not in found:
+                raise ValueError(f"Post not found: {post_id}")
+        return [found[post_id] for post_id in post_ids]
+
+    async def aclose(self) -> None:
+        # The shared client is closed on shutdown (close_platform_http_client)
+        if self._client is not None:
+            await self._client.aclose()
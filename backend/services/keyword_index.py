@@ -0,0 +1,135 @@
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from backend.services.keyword_matcher import KeywordMatcher
+
+# Bump when the stored index layout changes; older indexes are rebuilt from keywords
+KEYWORD_INDEX_VERSION = 1
+
+# Generic words the mock rewrite never picks as keywords
+MOCK_STOPWORDS = ["and", "the", "for", "with", "from", "are", "was", "were"]
+
+
+def detect_language(keyword: str) -> str:
+    """Classify a keyword as "zh", "en", "mixed" or "other" by its characters"""
+    has_chinese = any("\u4e00" <= char <= "\u9fff" for char in keyword)
+    has_latin = any(char.isascii() and char.isalpha() for char in keyword)
+    if has_chinese and has_latin:
+        return "mixed"
+    if has_chinese:
+        return "zh"
+    if has_latin:
+        return "en"
+    return "other"
+
+
+def build_keyword_entry(keyword: str, category: Optional[str] = None) -> Dict[str, Any]:
+    """Precompute everything the rewrite path needs to know about one keyword"""
+    normalized = keyword.lower().strip()
+    return {
+        "keyword": keyword,
+        "normalized": normalized,
+        "language": detect_language(keyword),
+        "token_count": len(keyword.split()),
+        "category": category,
+        "length": len(normalized),
+        "is_stopword": normalized in MOCK_STOPWORDS,
+        # Words matched individually when checking which keywords a rewrite used
+        "words": [word for word in normalized.split() if len(word) > 2],
+    }
+
+
+def build_keyword_index(
+    keywords: Sequence[str],
+    categories: Optional[Sequence[Optional[str]]] = None
+) -> Dict[str, Any]:
+    """
+    Build the stored keyword index for a curriculum (computed once at upload time)
+
+    Args:
+        keywords: Curriculum keywords, in order
+        categories: Optional heading each keyword came from, aligned with keywords
+
+    Returns:
+        JSON-compatible index with per-keyword entries and the serialized matcher
+    """
+    if categories is None:
+        categories = [None] * len(keywords)
+    entries = [build_keyword_entry(keyword, category) for keyword, category in zip(keywords, categories)]
+    return {
+        "version": KEYWORD_INDEX_VERSION,
+        "entries": entries,
+        "matcher": _build_entries_matcher(entries).to_dict(),
+    }
+
+
+def _build_entries_matcher(entries: Iterable[Dict[str, Any]]) -> KeywordMatcher:
+    patterns = []
+    for entry in entries:
+        patterns.append(entry["normalized"])
+        patterns.extend(entry["words"])
+    return KeywordMatcher(patterns)
+
+
+class KeywordIndex:
+    """
+    Loaded keyword index used on the rewrite hot path
+
+    Holds per-keyword entries (aligned with .keywords) and one or more compiled
+    matchers; matched() reports every normalized keyword and keyword word that
+    occurs in a text.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], matchers: List[KeywordMatcher]):
+        self.entries = entries
+        self.matchers = matchers
+        self.keywords = [entry["keyword"] for entry in entries]
+        self.normalized = [entry["normalized"] for entry in entries]
+        # Last merge() result; the same preferences index is merged on every rewrite
+        self._last_merge: Optional[Tuple["KeywordIndex", "KeywordIndex"]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KeywordIndex":
+        """Load a stored index without recomputing it"""
+        return cls(data["entries"], [KeywordMatcher.from_dict(data["matcher"])])
+
+    @classmethod
+    def from_stored(cls, data: Optional[Dict[str, Any]], keywords: Sequence[str]) -> "KeywordIndex":
+        """Load a stored index, rebuilding it from keywords if missing or outdated"""
+        if data and data.get("version") == KEYWORD_INDEX_VERSION:
+            return cls.from_dict(data)
+        return get_keyword_index(keywords)
+
+    def matched(self, text: str) -> Set[str]:
+        """Return the normalized keywords and keyword words that occur in text"""
+        if len(self.matchers) == 1:
+            return self.matchers[0].matched(text)
+        found = set()
+        for matcher in self.matchers:
+            found |= matcher.matched(text)
+        return found
+
+    def merge(self, other: "KeywordIndex") -> "KeywordIndex":
+        """
+        Combine two indexes without recompiling either matcher
+        Keywords already present in this index are dropped from other.
+        """
+        if not other.entries:
+            return self
+        last_merge = self._last_merge
+        if last_merge is not None and last_merge[0] is other:
+            return last_merge[1]
+        seen = set(self.keywords)
+        entries = self.entries + [entry for entry in other.entries if entry["keyword"] not in seen]
+        merged = KeywordIndex(entries, self.matchers + other.matchers)
+        self._last_merge = (other, merged)
+        return merged
+
+
+@lru_cache(maxsize=32)
+def _cached_keyword_index(keywords: Tuple[str, ...]) -> KeywordIndex:
+    return KeywordIndex.from_dict(build_keyword_index(keywords))
+
+
+def get_keyword_index(keywords: Sequence[str]) -> KeywordIndex:
+    """Build (or reuse) an index for an ad-hoc keyword list such as preference keywords"""
+    return _cached_keyword_index(tuple(keywords))
@@ -0,0 +1,130 @@
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+
+
+class KeywordMatcher:
+    """
+    Aho–Corasick automaton for matching many keywords in a single pass
+
+    Patterns are matched case-insensitively against text.lower(); they are
+    expected to be lowercase already. Building is O(total pattern length) and
+    each scan is O(len(text) + number of matches), independent of how many
+    patterns there are.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        Build the automaton
+
+        Args:
+            patterns: Lowercase patterns to match (empty strings and duplicates are ignored)
+        """
+        self.patterns: List[str] = list(dict.fromkeys(p for p in patterns if p))
+
+        # Trie of patterns: goto[state][char] -> state, out[state] -> pattern indices ending there
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    out.append([])
+                state = next_state
+            out[state].append(index)
+
+        # Failure links, computed breadth-first; outputs inherit the failure state's outputs
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                if out[fail[next_state]]:
+                    out[next_state] = out[next_state] + out[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the compiled automaton to JSON-compatible data"""
+        return {
+            "patterns": self.patterns,
+            "goto": self._goto,
+            "fail": self._fail,
+            "out": self._out,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KeywordMatcher":
+        """Restore a matcher serialized with to_dict without rebuilding it"""
+        matcher = cls.__new__(cls)
+        matcher.patterns = list(data["patterns"])
+        matcher._goto = [dict(transitions) for transitions in data["goto"]]
+        matcher._fail = list(data["fail"])
+        matcher._out = [list(outputs) for outputs in data["out"]]
+        return matcher
+
+    def _scan(self, text: str):
+        """Yield (end_index, pattern_index) for every match in text.lower()"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for position, char in enumerate(text.lower()):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in out[state]:
+                yield position + 1, index
+
+    def find_all(self, text: str) -> List[Tuple[str, int, int]]:
+        """
+        Find every occurrence of every pattern
+
+        Args:
+            text: Text to search
+
+        Returns:
+            List of (pattern, start, end) tuples, ordered by end position
+        """
+        return [
+            (self.patterns[index], end - len(self.patterns[index]), end)
+            for end, index in self._scan(text)
+        ]
+
+    def matched(self, text: str) -> Set[str]:
+        """Return the set of patterns that occur in text"""
+        return {self.patterns[index] for _, index in self._scan(text)}
+
+    def contains_any(self, text: str) -> bool:
+        """Return True if any pattern occurs in text"""
+        for _ in self._scan(text):
+            return True
+        return False
+
+
+@lru_cache(maxsize=32)
+def _build_matcher(patterns: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(patterns)
+
+
+def get_matcher(patterns: Sequence[str]) -> KeywordMatcher:
+    """
+    Get a compiled matcher for a pattern list, reusing recently built automatons
+    (the same curriculum/preferences keyword set is matched on every rewrite)
+
+    Args:
+        patterns: Lowercase patterns to match
+
+    Returns:
+        KeywordMatcher for the patterns
+    """
+    return _build_matcher(tuple(patterns))
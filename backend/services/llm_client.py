@@ -0,0 +1,149 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, Optional
+import httpx
+from openai import AsyncOpenAI
+
+
+class AsyncLLMClient:
+    """
+    Shared async client for OpenAI-compatible chat completion APIs
+
+    Wraps one AsyncOpenAI client backed by a pooled httpx.AsyncClient, with a
+    semaphore capping the number of in-flight LLM calls and a per-call timeout.
+    The HTTP client and semaphore are bound to the running event loop and are
+    rebuilt (closing the old HTTP client) if the client is used from a different loop.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+        self.max_connections = max_connections or int(
+            os.getenv("LLM_MAX_CONNECTIONS", str(self.max_concurrency))
+        )
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", "2"))
+        self._transport = transport
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[AsyncOpenAI] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _ensure_client(self) -> None:
+        """Build the HTTP client and semaphore for the running event loop, closing any built for another loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is loop:
+            return
+
+        stale, stale_loop = self._client, self._loop
+        http_client = httpx.AsyncClient(
+            transport=self._transport,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            ),
+            timeout=self.timeout
+        )
+        self._client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=http_client,
+            max_retries=self.max_retries
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._loop = loop
+        if stale is not None:
+            if stale_loop.is_running():
+                # Still serving another thread: close it there
+                asyncio.run_coroutine_threadsafe(stale.close(), stale_loop)
+            else:
+                await stale.close()
+
+    async def chat_completion(self, **kwargs: Any) -> Any:
+        """
+        Create a chat completion, waiting for a free slot if max_concurrency calls are in flight
+
+        Args:
+            **kwargs: Arguments for chat.completions.create (model, messages, ...)
+
+        Returns:
+            The chat completion response
+
+        Raises:
+            asyncio.TimeoutError: If the call (including retries) exceeds the timeout
+        """
+        await self._ensure_client()
+        async with self._semaphore:
+            return await asyncio.wait_for(
+                self._client.chat.completions.create(timeout=self.timeout, **kwargs),
+                timeout=self.timeout
+            )
+
+    async def stream_chat_completion(self, **kwargs: Any) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding content deltas as they arrive
+        The concurrency slot is held until the stream is exhausted or closed.
+
+        Args:
+            **kwargs: Arguments for chat.completions.create (model, messages, ...)
+
+        Yields:
+            Non-empty content chunks
+
+        Raises:
+            asyncio.TimeoutError: If the first response does not arrive within the timeout
+        """
+        await self._ensure_client()
+        async with self._semaphore:
+            stream = await asyncio.wait_for(
+                self._client.chat.completions.create(stream=True, timeout=self.timeout, **kwargs),
+                timeout=self.timeout
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    async def aclose(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.close()
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+
+_shared_client: Optional[AsyncLLMClient] = None
+
+
+def get_async_llm_client() -> Optional[AsyncLLMClient]:
+    """
+    Get the process-wide async LLM client
+
+    Returns:
+        Shared AsyncLLMClient, or None if no API key is configured
+    """
+    global _shared_client
+    if _shared_client is None:
+        api_key = os.getenv("DEEPSEEK_API_KEY") or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            return None
+        base_url = os.getenv("LLM_API_BASE_URL", "https://api.deepseek.com")
+        _shared_client = AsyncLLMClient(api_key=api_key, base_url=base_url)
+    return _shared_client
+
+
+async def close_async_llm_client() -> None:
+    """Close the process-wide async LLM client (called on shutdown)"""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
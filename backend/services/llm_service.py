@@ -1,28 +1,111 @@
 import os
 import re
-from typing import List, Tuple
+import time
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from openai import OpenAI
+from backend.services.llm_client import AsyncLLMClient, get_async_llm_client
+from backend.services.keyword_matcher import KeywordMatcher, get_matcher
+from backend.services.keyword_index import KeywordIndex, get_keyword_index
+from backend.utils.metrics import LLM_REQUEST_DURATION, LLM_REQUESTS, MOCK_REWRITES
+
+# Indicator lists used by the mock rewrite, compiled once into matchers
+POETRY_INDICATORS = ["做", "不会", "难", "后来", "终于", "明白", "走错", "绕", "找到", "发现"]
+IDIOM_HELPING_INDICATORS = ["帮助", "互相", "朋友", "助人"]  # "助人为乐" - helping others brings joy
+IDIOM_PRACTICE_INDICATORS = ["练习", "坚持", "做对", "越来越好", "多练习"]  # "熟能生巧" - practice makes perfect
+
+# Education/learning related terms
+EDUCATION_TERMS = [
+    "reading",
+    "writing",
+    "learning",
+    "education",
+    "study",
+    "teach",
+    "learn",
+    "book",
+    "literature",
+    "language",
+    "vocabulary",
+    "comprehension",
+    "阅读",
+    "写作",
+    "学习",
+    "教育",
+    "读书",
+    "文学",
+    "语言",
+    "词汇",
+    "历史",
+    "科学",
+    "数学",
+    "艺术",
+    "文化",
+    "思维",
+    "分析",
+    "理解",
+]
+
+_POETRY_INDICATOR_MATCHER = KeywordMatcher(POETRY_INDICATORS)
+_IDIOM_HELPING_MATCHER = KeywordMatcher(IDIOM_HELPING_INDICATORS)
+_IDIOM_PRACTICE_MATCHER = KeywordMatcher(IDIOM_PRACTICE_INDICATORS)
+_EDUCATION_TERMS_MATCHER = KeywordMatcher(EDUCATION_TERMS)
+
+
+def split_stream_chunks(text: str) -> List[str]:
+    """
+    Split text into word-sized chunks for streaming
+    Each chunk is a word (or run of CJK characters) or punctuation mark with
+    its leading whitespace, so "".join(chunks) == text.
+    """
+    return re.findall(r"\s*(?:\w+|\S)|\s+", text)
+
+
+class LLMUnavailable(Exception):
+    """
+    Raised instead of returning the mock rewrite when the caller asked to be told
+    (report_fallback=True), so it can avoid caching or storing mock output
+    """
+
+    def __init__(self, fallback: Tuple[str, List[str]], reason: str):
+        """
+        Args:
+            fallback: The mock rewrite (rewritten_text, keywords_used)
+            reason: "disabled" (no LLM configured) or "fallback" (the LLM call failed)
+        """
+        super().__init__(f"LLM rewrite unavailable ({reason})")
+        self.fallback = fallback
+        self.reason = reason
 
 
 class LLMService:
     """Service for interacting with LLM (OpenAI/DeepSeek) for text rewriting"""
 
-    def __init__(self):
-        """Initialize LLM service with API key from environment"""
+    def __init__(self, async_client: Optional[AsyncLLMClient] = None):
+        """
+        Initialize LLM service with API key from environment
+
+        Args:
+            async_client: Optional async client to use instead of the shared one
+        """
         api_key = os.getenv("DEEPSEEK_API_KEY") or os.getenv("OPENAI_API_KEY")
-        if api_key:
+        # The demo uses the mock rewrite unless LLM_FORCE_MOCK=false
+        force_mock = os.getenv("LLM_FORCE_MOCK", "true").lower() in ("1", "true", "yes")
+        if api_key and not force_mock:
             # DeepSeek uses OpenAI-compatible API with custom base_url
             base_url = os.getenv("LLM_API_BASE_URL", "https://api.deepseek.com")
             self.client = OpenAI(api_key=api_key, base_url=base_url)
+            self.async_client = async_client or get_async_llm_client()
         else:
             # For testing/development without API key
             self.client = None
-
-        self.client = None
-        # force to use mock
+            self.async_client = None
 
     def rewrite_text(
-        self, original_text: str, keywords: List[str]
+        self,
+        original_text: str,
+        keywords: List[str],
+        keyword_index: Optional[KeywordIndex] = None,
+        report_fallback: bool = False
     ) -> Tuple[str, List[str]]:
         """
         Rewrite text to incorporate keywords more frequently
@@ -30,52 +113,201 @@ class LLMService:
         Args:
             original_text: The original text to rewrite
             keywords: List of keywords to incorporate
+            keyword_index: Optional precomputed index of keywords (same order)
+            report_fallback: Raise LLMUnavailable instead of returning the mock rewrite
 
         Returns:
             Tuple of (rewritten_text, keywords_used)
+
+        Raises:
+            LLMUnavailable: If report_fallback is set and the mock rewrite was used
         """
         if not self.client:
             # Fallback for testing/development
             # In production, this should raise an error or use a fallback
-            return self._mock_rewrite(original_text, keywords)
-
-        # Use all keywords (mock posts are already education-related)
-        # Create prompt
-        keywords_str = ", ".join(keywords[:10])  # Use up to 10 keywords
-        prompt = f"""Rewrite the following text to naturally incorporate ONLY the relevant educational keywords: {keywords_str}
-IMPORTANT: Only use keywords that are actually relevant to the content. Do not force unrelated keywords.
-Maintain the original tone, style, and meaning. The rewritten text should feel natural and authentic.
-Original text: {original_text}"""
+            return self._fallback("disabled", original_text, keywords, keyword_index, report_fallback)
 
+        start = time.perf_counter()
         try:
-            # Use DeepSeek model if DEEPSEEK_API_KEY is set, otherwise use OpenAI model
-            model = os.getenv(
-                "LLM_MODEL",
-                "deepseek-chat" if os.getenv("DEEPSEEK_API_KEY") else "gpt-3.5-turbo",
-            )
             response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant that rewrites educational content to naturally incorporate relevant keywords. Only use keywords that make sense in context. Always preserve the original tone, style, and meaning.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.7,
-                max_tokens=1000,
+                **self._completion_params(original_text, keywords)
             )
+            LLM_REQUESTS.labels(mode="sync", outcome="success").inc()
 
             rewritten = response.choices[0].message.content.strip()
             # Extract keywords that were actually used (simple heuristic)
-            keywords_used = self._extract_used_keywords(rewritten, keywords)
+            keywords_used = self._extract_used_keywords(rewritten, keywords, keyword_index)
             return rewritten, keywords_used
-        except Exception as e:
+        except Exception:
             # Fallback to mock if API call fails
-            return self._mock_rewrite(original_text, keywords)
+            LLM_REQUESTS.labels(mode="sync", outcome="error").inc()
+        finally:
+            LLM_REQUEST_DURATION.labels(mode="sync").observe(time.perf_counter() - start)
+        return self._fallback("fallback", original_text, keywords, keyword_index, report_fallback)
+
+    async def arewrite_text(
+        self,
+        original_text: str,
+        keywords: List[str],
+        keyword_index: Optional[KeywordIndex] = None,
+        report_fallback: bool = False
+    ) -> Tuple[str, List[str]]:
+        """
+        Async version of rewrite_text using the shared pooled async client
+        Does not block the event loop while waiting for the LLM.
+
+        Args:
+            original_text: The original text to rewrite
+            keywords: List of keywords to incorporate
+            keyword_index: Optional precomputed index of keywords (same order)
+            report_fallback: Raise LLMUnavailable instead of returning the mock rewrite
+
+        Returns:
+            Tuple of (rewritten_text, keywords_used)
+
+        Raises:
+            LLMUnavailable: If report_fallback is set and the mock rewrite was used
+        """
+        if not self.async_client:
+            return self._fallback("disabled", original_text, keywords, keyword_index, report_fallback)
+
+        start = time.perf_counter()
+        try:
+            response = await self.async_client.chat_completion(
+                **self._completion_params(original_text, keywords)
+            )
+            LLM_REQUESTS.labels(mode="async", outcome="success").inc()
+
+            rewritten = response.choices[0].message.content.strip()
+            keywords_used = self._extract_used_keywords(rewritten, keywords, keyword_index)
+            return rewritten, keywords_used
+        except Exception:
+            # Fallback to mock if API call fails or times out
+            LLM_REQUESTS.labels(mode="async", outcome="error").inc()
+        finally:
+            LLM_REQUEST_DURATION.labels(mode="async").observe(time.perf_counter() - start)
+        return self._fallback("fallback", original_text, keywords, keyword_index, report_fallback)
+
+    async def astream_rewrite_text(
+        self,
+        original_text: str,
+        keywords: List[str],
+        keyword_index: Optional[KeywordIndex] = None,
+        report_fallback: bool = False
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a rewrite as it is generated
+        The mock rewrite emits the same events, chunked by word.
+
+        Args:
+            original_text: The original text to rewrite
+            keywords: List of keywords to incorporate
+            keyword_index: Optional precomputed index of keywords (same order)
+            report_fallback: Emit a ("fallback", reason) event before the mock rewrite's events
+
+        Yields:
+            ("token", chunk) events, then one ("done", (rewritten_text, keywords_used)) event
+        """
+        if not self.async_client:
+            MOCK_REWRITES.labels(reason="disabled").inc()
+            if report_fallback:
+                yield "fallback", "disabled"
+            async for event in self._mock_stream(original_text, keywords, keyword_index):
+                yield event
+            return
+
+        chunks = []
+        failed = False
+        start = time.perf_counter()
+        try:
+            async for chunk in self.async_client.stream_chat_completion(
+                **self._completion_params(original_text, keywords)
+            ):
+                chunks.append(chunk)
+                yield "token", chunk
+            LLM_REQUESTS.labels(mode="stream", outcome="success").inc()
+        except Exception:
+            LLM_REQUESTS.labels(mode="stream", outcome="error").inc()
+            if chunks:
+                # Part of the rewrite was already sent, the caller has to handle it
+                raise
+            failed = True
+        finally:
+            LLM_REQUEST_DURATION.labels(mode="stream").observe(time.perf_counter() - start)
+
+        if failed:
+            # Fallback to mock if API call fails or times out before the first token
+            MOCK_REWRITES.labels(reason="fallback").inc()
+            if report_fallback:
+                yield "fallback", "fallback"
+            async for event in self._mock_stream(original_text, keywords, keyword_index):
+                yield event
+            return
+
+        rewritten = "".join(chunks).strip()
+        keywords_used = self._extract_used_keywords(rewritten, keywords, keyword_index)
+        yield "done", (rewritten, keywords_used)
+
+    def _fallback(
+        self,
+        reason: str,
+        original_text: str,
+        keywords: List[str],
+        keyword_index: Optional[KeywordIndex],
+        report_fallback: bool
+    ) -> Tuple[str, List[str]]:
+        """Mock rewrite used when the LLM is disabled or failed (raised as LLMUnavailable if reported)"""
+        MOCK_REWRITES.labels(reason=reason).inc()
+        result = self._mock_rewrite(original_text, keywords, keyword_index)
+        if report_fallback:
+            raise LLMUnavailable(result, reason)
+        return result
+
+    async def _mock_stream(
+        self,
+        original_text: str,
+        keywords: List[str],
+        keyword_index: Optional[KeywordIndex] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Emit the mock rewrite with the streaming event protocol"""
+        rewritten, keywords_used = self._mock_rewrite(original_text, keywords, keyword_index)
+        for chunk in split_stream_chunks(rewritten):
+            yield "token", chunk
+        yield "done", (rewritten, keywords_used)
+
+    def _completion_params(self, original_text: str, keywords: List[str]) -> dict:
+        """Build chat completion parameters for a rewrite request"""
+        # Use all keywords (mock posts are already education-related)
+        # Create prompt
+        keywords_str = ", ".join(keywords[:10])  # Use up to 10 keywords
+        prompt = f"""Rewrite the following text to naturally incorporate ONLY the relevant educational keywords: {keywords_str}
+IMPORTANT: Only use keywords that are actually relevant to the content. Do not force unrelated keywords.
+Maintain the original tone, style, and meaning. The rewritten text should feel natural and authentic.
+Original text: {original_text}"""
+
+        # Use DeepSeek model if DEEPSEEK_API_KEY is set, otherwise use OpenAI model
+        model = os.getenv(
+            "LLM_MODEL",
+            "deepseek-chat" if os.getenv("DEEPSEEK_API_KEY") else "gpt-3.5-turbo",
+        )
+        return {
+            "model": model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are a helpful assistant that rewrites educational content to naturally incorporate relevant keywords. Only use keywords that make sense in context. Always preserve the original tone, style, and meaning.",
+                },
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": 0.7,
+            "max_tokens": 1000,
+        }
 
     def _mock_rewrite(
-        self, original_text: str, keywords: List[str]
+        self,
+        original_text: str,
+        keywords: List[str],
+        keyword_index: Optional[KeywordIndex] = None
     ) -> Tuple[str, List[str]]:
         """
         Mock rewrite function for testing/development
@@ -100,15 +332,21 @@ Original text: {original_text}"""
             ["scrumptious", "luscious", "tempting"],  # Cookies post
         ]
 
+        # Find all fixed phrases and vocabulary words in the text in one pass
+        fixed_phrases_in_text = get_matcher(
+            [phrase.lower() for phrase in poetry_phrases + idiom_phrases]
+            + [word.lower() for vocab_set in english_vocab_sets for word in vocab_set]
+        ).matched(original_text)
+
         # Check if text already contains the poetry phrase
         for phrase in poetry_phrases:
-            if phrase in original_text:
+            if phrase in fixed_phrases_in_text:
                 # Text already contains the phrase, return unchanged with only that keyword
                 return original_text, [phrase]
 
         # Check if text already contains an idiom phrase
         for phrase in idiom_phrases:
-            if phrase in original_text:
+            if phrase in fixed_phrases_in_text:
                 # Text already contains the idiom, return unchanged with only that keyword
                 return original_text, [phrase]
 
@@ -127,8 +365,7 @@ Original text: {original_text}"""
 
         for vocab_set in english_vocab_sets:
             # Check if all words in the set are in the text (case-insensitive)
-            text_lower = original_text.lower()
-            if all(word.lower() in text_lower for word in vocab_set):
+            if all(word.lower() in fixed_phrases_in_text for word in vocab_set):
                 # All words from this set are in the text, return unchanged with only these keywords
                 # Also return the original word mappings for comparison view
                 # Store mappings in a special format in keywords_used
@@ -143,34 +380,11 @@ Original text: {original_text}"""
                 return original_text, keywords_with_mappings
 
         # Check if text aligns with poetry meaning (struggling then finding solution)
-        poetry_indicators = [
-            "做",
-            "不会",
-            "难",
-            "后来",
-            "终于",
-            "明白",
-            "走错",
-            "绕",
-            "找到",
-            "发现",
-        ]
-        has_poetry_meaning = any(
-            indicator in original_text for indicator in poetry_indicators
-        )
+        has_poetry_meaning = _POETRY_INDICATOR_MATCHER.contains_any(original_text)
 
         # Check if text aligns with idiom meanings
-        # "助人为乐" - helping others brings joy
-        idiom_helping_indicators = ["帮助", "互相", "朋友", "助人"]
-        has_helping_meaning = any(
-            indicator in original_text for indicator in idiom_helping_indicators
-        )
-
-        # "熟能生巧" - practice makes perfect
-        idiom_practice_indicators = ["练习", "坚持", "做对", "越来越好", "多练习"]
-        has_practice_meaning = any(
-            indicator in original_text for indicator in idiom_practice_indicators
-        )
+        has_helping_meaning = _IDIOM_HELPING_MATCHER.contains_any(original_text)
+        has_practice_meaning = _IDIOM_PRACTICE_MATCHER.contains_any(original_text)
 
         # If we have a poetry phrase and the text aligns with its meaning, use only that phrase
         for phrase in poetry_phrases:
@@ -208,20 +422,24 @@ Original text: {original_text}"""
         relevant_keywords = []
 
         # Filter out generic words and words already in text
-        candidate_keywords = []
-        for keyword in keywords:
-            keyword_lower = keyword.lower().strip()
-            if (
-                len(keyword_lower) >= 3
-                and keyword_lower not in text_lower
-                and keyword_lower
-                not in ["and", "the", "for", "with", "from", "are", "was", "were"]
-            ):
-                candidate_keywords.append(keyword)
+        # (normalized forms, lengths and stopwords are precomputed in the keyword
+        # index; one matcher pass finds every keyword already present)
+        if keyword_index is None:
+            keyword_index = get_keyword_index(keywords)
+        keywords_in_text = keyword_index.matched(original_text)
+        candidate_keywords = [
+            entry["keyword"]
+            for entry in keyword_index.entries
+            if entry["length"] >= 3
+            and not entry["is_stopword"]
+            and entry["normalized"] not in keywords_in_text
+        ]
 
         if not candidate_keywords:
             # Fallback to all keywords if no candidates
-            candidate_keywords = [k for k in keywords if len(k.lower().strip()) >= 3]
+            candidate_keywords = [
+                entry["keyword"] for entry in keyword_index.entries if entry["length"] >= 3
+            ]
 
         # Select 2-3 keywords using hash-based rotation for diversity
         # This ensures different posts use different keywords
@@ -647,58 +865,27 @@ Original text: {original_text}"""
         if not keywords:
             return []
 
-        text_lower = text.lower()
         relevant = []
 
-        # Education/learning related terms
-        education_terms = [
-            "reading",
-            "writing",
-            "learning",
-            "education",
-            "study",
-            "teach",
-            "learn",
-            "book",
-            "literature",
-            "language",
-            "vocabulary",
-            "comprehension",
-            "阅读",
-            "写作",
-            "学习",
-            "教育",
-            "读书",
-            "文学",
-            "语言",
-            "词汇",
-            "历史",
-            "科学",
-            "数学",
-            "艺术",
-            "文化",
-            "思维",
-            "分析",
-            "理解",
-        ]
-
         # Check if text is education-related
-        is_education_related = any(term in text_lower for term in education_terms)
+        is_education_related = _EDUCATION_TERMS_MATCHER.contains_any(text)
 
         if not is_education_related:
             return []  # Don't use keywords if content is not education-related
 
         # Match keywords that relate to the content theme
         for keyword in keywords:
-            keyword_lower = keyword.lower()
             # Check if keyword is relevant
-            if any(term in keyword_lower for term in education_terms):
+            if _EDUCATION_TERMS_MATCHER.contains_any(keyword):
                 relevant.append(keyword)
 
         return relevant[:5]  # Limit to 5 most relevant
 
     def _extract_used_keywords(
-        self, rewritten_text: str, all_keywords: List[str]
+        self,
+        rewritten_text: str,
+        all_keywords: List[str],
+        keyword_index: Optional[KeywordIndex] = None
     ) -> List[str]:
         """
         Extract keywords that were actually used in the rewritten text
@@ -706,6 +893,7 @@ Original text: {original_text}"""
         Args:
             rewritten_text: The rewritten text
             all_keywords: All available keywords
+            keyword_index: Optional precomputed index of all_keywords (same order)
 
         Returns:
             List of keywords that appear in the rewritten text
@@ -713,19 +901,21 @@ Original text: {original_text}"""
         if not all_keywords:
             return []
 
-        rewritten_lower = rewritten_text.lower()
+        # Match every keyword and keyword word against the text in one pass
+        if keyword_index is None:
+            keyword_index = get_keyword_index(all_keywords)
+        found = keyword_index.matched(rewritten_text)
         used_keywords = []
 
-        for keyword in all_keywords:
-            keyword_lower = keyword.lower()
+        for entry in keyword_index.entries:
             # Check if keyword or its variations appear in the text
-            if keyword_lower in rewritten_lower:
-                used_keywords.append(keyword)
+            if not entry["normalized"] or entry["normalized"] in found:
+                used_keywords.append(entry["keyword"])
             else:
                 # Check for partial matches (for Chinese keywords)
-                for word in keyword_lower.split():
-                    if len(word) > 2 and word in rewritten_lower:
-                        used_keywords.append(keyword)
+                for word in entry["words"]:
+                    if word in found:
+                        used_keywords.append(entry["keyword"])
                         break
 
         return used_keywords[:5]  # Limit to 5 most relevant
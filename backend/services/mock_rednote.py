@@ -1,20 +1,83 @@
-from typing import List
-from datetime import datetime, timedelta
+import base64
+import binascii
+import os
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 from backend.services.platform_adapter import PlatformAdapter
-from backend.schemas.post import Post
+from backend.schemas.post import FeedPage, Post
+
+# Total number of posts in the mock feed; posts beyond the curated ones are
+# synthetic (0 = curated posts only)
+MOCK_FEED_SIZE = int(os.getenv("MOCK_REDNOTE_FEED_SIZE", "0"))
+
+# Time the mock feed is dated back from: fixed, so post timestamps and feed
+# cursors are the same in every process and across restarts
+MOCK_FEED_EPOCH = datetime(2025, 1, 6, 20, 0, tzinfo=timezone.utc)
+
+# Building blocks of synthetic posts: (text template, topics), in the same register as the curated posts
+SYNTHETIC_TEMPLATES = [
+    ("打卡第{n}天！今天读完了一本关于{topic}的书，学到了好多新知识📚 你们最近在读什么书呢？",
+     ["恐龙", "太空", "海洋动物", "植物", "天气", "火山", "昆虫", "古代建筑"]),
+    ("Day {n} of my reading challenge! 📖 Today I learned about {topic}. What are you reading this week?",
+     ["dinosaurs", "planets", "ocean animals", "rainforests", "volcanoes", "butterflies", "castles", "rainbows"]),
+    ("今天和同学一起做了关于{topic}的手工作业，第{n}次尝试终于成功了！✨ 你们喜欢做手工吗？",
+     ["四季", "太阳系", "小动物", "交通工具", "水的循环", "蔬菜水果"]),
+    ("Tried {topic} today (attempt #{n})! 🎨 It was tricky at first but so much fun. Have you ever tried it?",
+     ["painting", "origami", "gardening", "baking bread", "chess", "the piano"]),
+]
+SYNTHETIC_AUTHORS = ["学习小能手", "成语小达人", "学习日记", "周末小记", "WeekendVibes", "BakingTime", "小小科学家", "ReadingBuddy"]
+SYNTHETIC_IMAGES = [
+    "https://images.unsplash.com/photo-1503454537195-1dcabb73ffb9?w=400&h=300&fit=crop",
+    "https://images.unsplash.com/photo-1503676260728-1c00da094a0b?w=400&h=300&fit=crop",
+    "https://images.unsplash.com/photo-1490750967868-88aa4486c946?w=400&h=300&fit=crop",
+    "https://images.unsplash.com/photo-1441974231531-c6227db76b6e?w=400&h=300&fit=crop",
+    "https://images.unsplash.com/photo-1556910103-1c02745aae4d?w=400&h=300&fit=crop",
+]
 
 
 class MockRedNoteAdapter(PlatformAdapter):
     """Mock implementation of RedNote (小红书) adapter for demo purposes"""
     
-    def __init__(self):
-        """Initialize with sample posts"""
-        self._posts = self._generate_sample_posts()
+    def __init__(self, feed_size: Optional[int] = None):
+        """
+        Initialize with sample posts
+        
+        Args:
+            feed_size: Total number of posts (default MOCK_REDNOTE_FEED_SIZE).
+                Posts beyond the curated ones are synthetic: the same feed_size
+                always gives the same posts, two hours apart, newest first.
+        """
+        base_time = MOCK_FEED_EPOCH
+        posts = self._generate_sample_posts(base_time)
+        size = MOCK_FEED_SIZE if feed_size is None else feed_size
+        posts.extend(self._synthetic_post(base_time, index) for index in range(len(posts), size))
+        
+        # Indexes built once: id -> post for get_post, and the feed in time
+        # order (newest first, ties by id) with its sort keys for paging
+        self._posts_by_id: Dict[str, Post] = {post.id: post for post in posts}
+        self._posts: List[Post] = sorted(posts, key=_feed_key)
+        self._feed_keys: List[Tuple[float, str]] = [_feed_key(post) for post in self._posts]
+    
+    @staticmethod
+    def _synthetic_post(base_time: datetime, index: int) -> Post:
+        """Deterministic synthetic post at position index of the feed"""
+        template, topics = SYNTHETIC_TEMPLATES[index % len(SYNTHETIC_TEMPLATES)]
+        topic = topics[(index // len(SYNTHETIC_TEMPLATES)) % len(topics)]
+        likes = (index * 7919) % 4000 + 100
+        return Post(
+            id=f"post_{index + 1:03d}",
+            author=SYNTHETIC_AUTHORS[(index * 7) % len(SYNTHETIC_AUTHORS)],
+            text=template.format(n=index + 1, topic=topic),
+            image_url=SYNTHETIC_IMAGES[index % len(SYNTHETIC_IMAGES)],
+            likes=likes,
+            timestamp=base_time - timedelta(hours=1 + 2 * index),
+            comments=likes // 15,
+            shares=likes // 40
+        )
     
-    def _generate_sample_posts(self) -> List[Post]:
+    def _generate_sample_posts(self, base_time: datetime) -> List[Post]:
         """Generate sample RedNote-style educational posts for kids under 12"""
-        base_time = datetime.now()
-        
         posts = [
             # 成语学习 (Chinese Idioms Learning) - Post 1
             Post(
@@ -99,13 +162,68 @@ class MockRedNoteAdapter(PlatformAdapter):
         return posts
     
     def get_feed(self) -> List[Post]:
-        """Get feed of posts"""
+        """Get feed of posts (newest first)"""
         return self._posts.copy()
     
+    def get_feed_page(self, cursor: Optional[str] = None, limit: int = 20) -> FeedPage:
+        """
+        Get one page of the feed (only the page is copied, not the feed)
+        The cursor is the sort key of the last post returned, so it stays
+        valid if newer posts are added.
+        """
+        if limit < 1:
+            raise ValueError(f"Invalid page size: {limit}")
+        start = bisect_right(self._feed_keys, _decode_cursor(cursor)) if cursor else 0
+        end = start + limit
+        posts = self._posts[start:end]
+        return FeedPage(
+            posts=posts,
+            next_cursor=_encode_cursor(self._feed_keys[end - 1]) if end < len(self._posts) else None
+        )
+    
+    def add_post(self, post: Post) -> None:
+        """
+        Ingest a new post (e.g. one just published), keeping both indexes current
+        Cursors already handed out stay valid: they are feed keys, not offsets.
+        
+        Raises:
+            ValueError: If a post with the same ID already exists
+        """
+        if post.id in self._posts_by_id:
+            raise ValueError(f"Post already exists: {post.id}")
+        key = _feed_key(post)
+        index = bisect_left(self._feed_keys, key)
+        self._feed_keys.insert(index, key)
+        self._posts.insert(index, post)
+        self._posts_by_id[post.id] = post
+    
     def get_post(self, post_id: str) -> Post:
         """Get a single post by ID"""
-        for post in self._posts:
-            if post.id == post_id:
-                return post
-        raise ValueError(f"Post not found: {post_id}")
+        post = self._posts_by_id.get(post_id)
+        if post is None:
+            raise ValueError(f"Post not found: {post_id}")
+        return post
+
+
+
+def _feed_key(post: Post) -> Tuple[float, str]:
+    """Sort key putting the feed newest first (ties broken by id)"""
+    return (-post.timestamp.timestamp(), post.id)
+
+
+def _encode_cursor(key: Tuple[float, str]) -> str:
+    """Opaque cursor for the position after the post with this feed key"""
+    raw = f"{key[0]!r}:{key[1]}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
 
+def _decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Feed key of a cursor made by _encode_cursor"""
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        position, separator, post_id = decoded.partition(":")
+        if separator:
+            return (float(position), post_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        pass
+    raise ValueError(f"Invalid cursor: {cursor}")
@@ -1,6 +1,7 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List
-from backend.schemas.post import Post
+from typing import Any, Callable, List, Optional
+from backend.schemas.post import FeedPage, Post
 
 
 class PlatformAdapter(ABC):
@@ -11,8 +12,119 @@ class PlatformAdapter(ABC):
         """Get feed of posts from the platform"""
         pass
     
+    @abstractmethod
+    def get_feed_page(self, cursor: Optional[str] = None, limit: int = 20) -> FeedPage:
+        """
+        Get one page of the feed, newest first
+
+        Args:
+            cursor: Opaque next_cursor from the previous page (None for the first page)
+            limit: Maximum number of posts in the page
+
+        Returns:
+            FeedPage with the posts and the cursor of the next page
+
+        Raises:
+            ValueError: If the cursor is not valid for this adapter
+        """
+        pass
+    
     @abstractmethod
     def get_post(self, post_id: str) -> Post:
         """Get a single post by ID"""
         pass
 
+
+
+class AsyncPlatformAdapter(ABC):
+    """
+    Async interface for platform adapters
+    Routes and background workers use this contract, so adapters for real
+    platforms can do network I/O without blocking the event loop.
+    """
+    
+    @abstractmethod
+    async def get_feed(self) -> List[Post]:
+        """Get the whole feed of posts, newest first"""
+        pass
+    
+    @abstractmethod
+    async def get_feed_page(self, cursor: Optional[str] = None, limit: int = 20) -> FeedPage:
+        """
+        Get one page of the feed, newest first
+
+        Args:
+            cursor: Opaque next_cursor from the previous page (None for the first page)
+            limit: Maximum number of posts in the page
+
+        Returns:
+            FeedPage with the posts and the cursor of the next page
+
+        Raises:
+            ValueError: If the cursor is not valid for this adapter
+        """
+        pass
+    
+    @abstractmethod
+    async def get_post(self, post_id: str) -> Post:
+        """
+        Get a single post by ID
+
+        Raises:
+            ValueError: If the post does not exist
+        """
+        pass
+    
+    @abstractmethod
+    async def get_posts_bulk(self, post_ids: List[str]) -> List[Post]:
+        """
+        Get many posts by ID
+
+        Args:
+            post_ids: Post IDs (duplicates allowed)
+
+        Returns:
+            Posts in the order of post_ids
+
+        Raises:
+            ValueError: If any of the posts does not exist
+        """
+        pass
+    
+    async def aclose(self) -> None:
+        """Release connections held by the adapter (called on shutdown)"""
+
+
+class SyncAdapterWrapper(AsyncPlatformAdapter):
+    """
+    Async contract over a synchronous PlatformAdapter
+    In-memory adapters (MockRedNoteAdapter) are called directly; set
+    blocking=True for adapters doing I/O so calls run in a worker thread.
+    """
+    
+    def __init__(self, adapter: PlatformAdapter, blocking: bool = False):
+        """
+        Args:
+            adapter: Synchronous adapter to wrap
+            blocking: Run each call in a worker thread
+        """
+        self.adapter = adapter
+        self.blocking = blocking
+    
+    async def _call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+    
+    async def get_feed(self) -> List[Post]:
+        return await self._call(self.adapter.get_feed)
+    
+    async def get_feed_page(self, cursor: Optional[str] = None, limit: int = 20) -> FeedPage:
+        return await self._call(self.adapter.get_feed_page, cursor, limit)
+    
+    async def get_post(self, post_id: str) -> Post:
+        return await self._call(self.adapter.get_post, post_id)
+    
+    async def get_posts_bulk(self, post_ids: List[str]) -> List[Post]:
+        get_post = self.adapter.get_post
+        return await self._call(lambda: [get_post(post_id) for post_id in post_ids])
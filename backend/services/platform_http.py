@@ -0,0 +1,135 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+import httpx
+from backend.utils.metrics import PLATFORM_HTTP_DURATION, PLATFORM_HTTP_REQUESTS
+
+# Status codes worth retrying (rate limiting and transient server errors)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class PlatformHTTPClient:
+    """
+    Shared async HTTP client for platform APIs
+
+    One pooled httpx.AsyncClient with a semaphore capping in-flight requests
+    at max_connections and a per-request timeout. Idempotent GETs are retried
+    with exponential backoff on connection errors, timeouts, 429 and 5xx
+    responses. Like AsyncLLMClient, the pool and semaphore are bound to the
+    running event loop and rebuilt (closing the old pool) if the client is
+    used from a different loop.
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_backoff: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.timeout = timeout or float(os.getenv("PLATFORM_HTTP_TIMEOUT_SECONDS", "10"))
+        self.max_connections = max_connections or int(os.getenv("PLATFORM_HTTP_MAX_CONNECTIONS", "20"))
+        self.max_retries = (
+            max_retries if max_retries is not None else int(os.getenv("PLATFORM_HTTP_MAX_RETRIES", "2"))
+        )
+        self.retry_backoff = (
+            retry_backoff if retry_backoff is not None
+            else float(os.getenv("PLATFORM_HTTP_RETRY_BACKOFF_SECONDS", "0.2"))
+        )
+        self._transport = transport
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _ensure_client(self) -> httpx.AsyncClient:
+        """Build the HTTP client and semaphore for the running event loop, closing any built for another loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is loop:
+            return self._client
+
+        stale, stale_loop = self._client, self._loop
+        self._client = httpx.AsyncClient(
+            transport=self._transport,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            ),
+            timeout=self.timeout
+        )
+        self._semaphore = asyncio.Semaphore(self.max_connections)
+        self._loop = loop
+        if stale is not None:
+            if stale_loop.is_running():
+                # Still serving another thread: close it there
+                asyncio.run_coroutine_threadsafe(stale.aclose(), stale_loop)
+            else:
+                await stale.aclose()
+        return self._client
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        GET a JSON document, retrying transient failures
+
+        Args:
+            url: Absolute URL
+            params: Query parameters (lists are sent as repeated parameters)
+
+        Returns:
+            Decoded JSON body
+
+        Raises:
+            httpx.HTTPStatusError: On an error status (after retries for retryable ones)
+            httpx.TransportError: If the platform could not be reached (after retries)
+            asyncio.TimeoutError: If the last attempt exceeded the timeout
+        """
+        client = await self._ensure_client()
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            start = time.perf_counter()
+            try:
+                async with self._semaphore:
+                    response = await asyncio.wait_for(client.get(url, params=params), timeout=self.timeout)
+            except (httpx.TransportError, asyncio.TimeoutError):
+                PLATFORM_HTTP_DURATION.observe(time.perf_counter() - start)
+                PLATFORM_HTTP_REQUESTS.labels(outcome="error" if last_attempt else "retry").inc()
+                if last_attempt:
+                    raise
+            else:
+                PLATFORM_HTTP_DURATION.observe(time.perf_counter() - start)
+                if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                    PLATFORM_HTTP_REQUESTS.labels(
+                        outcome="success" if response.is_success else "error"
+                    ).inc()
+                    response.raise_for_status()
+                    return response.json()
+                PLATFORM_HTTP_REQUESTS.labels(outcome="retry").inc()
+            await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    async def aclose(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+
+_shared_client: Optional[PlatformHTTPClient] = None
+
+
+def get_platform_http_client() -> PlatformHTTPClient:
+    """Get the process-wide platform HTTP client"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = PlatformHTTPClient()
+    return _shared_client
+
+
+async def close_platform_http_client() -> None:
+    """Close the process-wide platform HTTP client (called on shutdown)"""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
@@ -0,0 +1,47 @@
+import os
+from typing import Callable, Dict, Optional
+from backend.services.http_platform import HTTPPlatformAdapter
+from backend.services.mock_rednote import MockRedNoteAdapter
+from backend.services.platform_adapter import AsyncPlatformAdapter, SyncAdapterWrapper
+
+# Name of the adapter serving the feed (see PLATFORM_ADAPTERS)
+PLATFORM_ADAPTER = os.getenv("PLATFORM_ADAPTER", "mock")
+
+# Adapter factories by name; register_platform_adapter adds platforms
+PLATFORM_ADAPTERS: Dict[str, Callable[[], AsyncPlatformAdapter]] = {
+    "mock": lambda: SyncAdapterWrapper(MockRedNoteAdapter()),
+    "http": lambda: HTTPPlatformAdapter(),
+}
+
+
+def register_platform_adapter(name: str, factory: Callable[[], AsyncPlatformAdapter]) -> None:
+    """
+    Make an adapter selectable with PLATFORM_ADAPTER=name
+
+    Args:
+        name: Adapter name
+        factory: Callable building the adapter
+    """
+    PLATFORM_ADAPTERS[name] = factory
+
+
+def create_platform_adapter(name: Optional[str] = None) -> AsyncPlatformAdapter:
+    """
+    Build the configured platform adapter
+
+    Args:
+        name: Adapter name (defaults to PLATFORM_ADAPTER)
+
+    Returns:
+        New adapter instance
+
+    Raises:
+        ValueError: If no adapter is registered under the name
+    """
+    name = name or PLATFORM_ADAPTER
+    factory = PLATFORM_ADAPTERS.get(name)
+    if factory is None:
+        raise ValueError(
+            f"Unknown platform adapter: {name} (available: {', '.join(sorted(PLATFORM_ADAPTERS))})"
+        )
+    return factory()
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import time
+import traceback
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+from backend.database import AsyncSessionLocal
+from backend.schemas.post import Post
+from backend.services.active_config import active_config
+from backend.services.platform_adapter import AsyncPlatformAdapter
+from backend.services.rewriter import RewriterService
+from backend.utils.metrics import (
+    PRE_REWRITE_BACKPRESSURE,
+    PRE_REWRITE_LAG,
+    PRE_REWRITE_POSTS,
+    PRE_REWRITE_QUEUE_DEPTH,
+)
+
+# Pre-rewrite worker settings (see PreRewriteWorker)
+PRE_REWRITE_ENABLED = os.getenv("PRE_REWRITE_ENABLED", "false").lower() == "true"
+PRE_REWRITE_POLL_SECONDS = float(os.getenv("PRE_REWRITE_POLL_SECONDS", "30"))
+PRE_REWRITE_QUEUE_SIZE = int(os.getenv("PRE_REWRITE_QUEUE_SIZE", "200"))
+PRE_REWRITE_BATCH_SIZE = int(os.getenv("PRE_REWRITE_BATCH_SIZE", "10"))
+PRE_REWRITE_SCAN_LIMIT = int(os.getenv("PRE_REWRITE_SCAN_LIMIT", "100"))
+
+# Feed page size used while scanning for new posts
+SCAN_PAGE_SIZE = 20
+
+
+class PreRewriteWorker:
+    """
+    Background task rewriting new feed posts before a student opens the feed
+
+    A watcher polls the head of the feed and queues posts it has not seen yet;
+    a consumer rewrites them in batches for the active curriculum through
+    RewriterService.rewrite_batch_detailed, which fills the rewrite cache and
+    store (so GET /api/rewrite/feed serves them without calling the LLM).
+    Mock rewrites (LLM disabled or failed) are not stored; they are counted as
+    "fallback" and those posts are rewritten on demand later.
+
+    The queue is bounded: when the consumer falls behind, the watcher waits
+    for room instead of reading further, and posts that scroll past the scan
+    window meanwhile are left to be rewritten on demand.
+    """
+
+    def __init__(
+        self,
+        adapter: AsyncPlatformAdapter,
+        rewriter: RewriterService,
+        session_factory: Callable = AsyncSessionLocal,
+        poll_seconds: float = PRE_REWRITE_POLL_SECONDS,
+        queue_size: int = PRE_REWRITE_QUEUE_SIZE,
+        batch_size: int = PRE_REWRITE_BATCH_SIZE,
+        scan_limit: int = PRE_REWRITE_SCAN_LIMIT,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the worker (call start() from a running event loop)
+
+        Args:
+            adapter: Platform adapter whose feed is watched
+            rewriter: Rewriter service whose cache/store is filled
+            session_factory: Async session factory for the rewrite store
+            poll_seconds: Interval between feed scans
+            queue_size: Maximum number of posts waiting to be rewritten
+            batch_size: Maximum number of posts rewritten per rewrite_batch call
+            scan_limit: Maximum number of posts read from the head of the feed per scan
+            clock: Time source for queue lag
+        """
+        self.adapter = adapter
+        self.rewriter = rewriter
+        self.session_factory = session_factory
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.scan_limit = scan_limit
+        self._clock = clock
+        self._queue: "asyncio.Queue[Tuple[float, Post]]" = asyncio.Queue(maxsize=queue_size)
+        # IDs of posts already queued, oldest first (bounded, see _remember)
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._max_seen = max(4 * scan_limit, queue_size)
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start the watcher and consumer tasks on the running event loop"""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._watch()),
+                asyncio.create_task(self._consume()),
+            ]
+
+    async def stop(self) -> None:
+        """Cancel both tasks and wait for them to finish"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of posts waiting to be rewritten"""
+        return self._queue.qsize()
+
+    async def scan(self) -> int:
+        """
+        Queue the posts at the head of the feed that have not been seen yet
+        Waits for room in the queue when it is full.
+
+        Returns:
+            Number of posts queued
+        """
+        queued = 0
+        scanned = 0
+        cursor: Optional[str] = None
+        while scanned < self.scan_limit:
+            page = await self.adapter.get_feed_page(cursor, min(SCAN_PAGE_SIZE, self.scan_limit - scanned))
+            for post in page.posts:
+                if post.id in self._seen:
+                    # Newest first: everything from here on was queued before
+                    return queued
+                if self._queue.full():
+                    PRE_REWRITE_BACKPRESSURE.inc()
+                await self._queue.put((self._clock(), post))
+                PRE_REWRITE_QUEUE_DEPTH.set(self._queue.qsize())
+                self._remember(post.id)
+                queued += 1
+            scanned += len(page.posts)
+            cursor = page.next_cursor
+            if not cursor:
+                break
+        return queued
+
+    async def drain(self) -> int:
+        """
+        Rewrite everything currently queued
+
+        Returns:
+            Number of posts taken off the queue
+        """
+        done = 0
+        while not self._queue.empty():
+            done += await self._rewrite_batch(self._take_batch())
+        return done
+
+    def _remember(self, post_id: str) -> None:
+        self._seen[post_id] = None
+        while len(self._seen) > self._max_seen:
+            self._seen.popitem(last=False)
+
+    def _take_batch(self, first: Optional[Tuple[float, Post]] = None) -> List[Tuple[float, Post]]:
+        """Up to batch_size queued posts (starting with first, if given)"""
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        PRE_REWRITE_QUEUE_DEPTH.set(self._queue.qsize())
+        return batch
+
+    async def _rewrite_batch(self, batch: List[Tuple[float, Post]]) -> int:
+        """Rewrite a batch for the active curriculum and record its lag"""
+        try:
+            async with self.session_factory() as db:
+                config = await active_config.aget(db)
+                if config is None:
+                    # No curriculum yet: nothing to rewrite for
+                    PRE_REWRITE_POSTS.labels(outcome="skipped").inc(len(batch))
+                    return len(batch)
+                results = await self.rewriter.rewrite_batch_detailed(
+                    original_texts=[post.text for _, post in batch],
+                    curriculum_keywords=config.curriculum_keywords,
+                    preference_keywords=config.preference_keywords,
+                    db=db,
+                    curriculum_id=config.curriculum_id,
+                    curriculum_index=config.curriculum_index,
+                    keyword_index=config.keyword_index
+                )
+        except Exception as e:
+            # Keep the worker alive; these posts are rewritten on demand instead
+            print(f"Warning: pre-rewrite of {len(batch)} posts failed: {e}")
+            traceback.print_exc()
+            PRE_REWRITE_POSTS.labels(outcome="failed").inc(len(batch))
+            return len(batch)
+
+        now = self._clock()
+        for queued_at, _ in batch:
+            PRE_REWRITE_LAG.observe(now - queued_at)
+        persisted = sum(1 for result in results if result.persisted)
+        PRE_REWRITE_POSTS.labels(outcome="rewritten").inc(persisted)
+        PRE_REWRITE_POSTS.labels(outcome="fallback").inc(len(results) - persisted)
+        return len(batch)
+
+    async def _watch(self) -> None:
+        while True:
+            try:
+                await self.scan()
+            except Exception as e:
+                print(f"Warning: pre-rewrite feed scan failed: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    async def _consume(self) -> None:
+        while True:
+            first = await self._queue.get()
+            await self._rewrite_batch(self._take_batch(first))
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+def keywords_fingerprint(keywords: Iterable[str]) -> str:
+    """
+    Fingerprint a keyword list, ignoring repeats but not order
+    (the rewrite prompt and the mock rewrite both depend on keyword order)
+
+    Args:
+        keywords: Keywords to fingerprint
+
+    Returns:
+        Hex digest identifying the ordered, de-duplicated keywords
+    """
+    joined = "\x1f".join(dict.fromkeys(keywords))
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+def text_hash(text: str) -> str:
+    """Hash of the exact text (rewrites depend on every character of it)"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class RewriteCache:
+    """
+    In-process cache of rewrite results
+
+    Entries are keyed by a hash of the text plus a fingerprint of the ordered
+    keyword list, evicted in LRU order once max_size is reached and expired after
+    ttl_seconds. Safe to use from multiple threads.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, str, Tuple[str, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(original_text: str, keywords: Iterable[str]) -> str:
+        """Build the cache key for a text and keyword list"""
+        return f"{text_hash(original_text)}:{keywords_fingerprint(keywords)}"
+
+    def get(self, key: str) -> Optional[Tuple[str, List[str]]]:
+        """
+        Look up a cached rewrite
+
+        Returns:
+            Tuple of (rewritten_text, keywords_used) or None on miss/expiry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, rewritten_text, keywords_used = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return rewritten_text, list(keywords_used)
+
+    def set(self, key: str, value: Tuple[str, List[str]]) -> None:
+        """Store a rewrite result, evicting the least recently used entry if full"""
+        if self.max_size <= 0:
+            return
+        rewritten_text, keywords_used = value
+        with self._lock:
+            self._entries[key] = (
+                self._clock() + self.ttl_seconds,
+                rewritten_text,
+                tuple(keywords_used)
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all cached rewrites (called when curricula or preferences change)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Process-wide cache shared by all RewriterService instances
+rewrite_cache = RewriteCache(
+    max_size=int(os.getenv("REWRITE_CACHE_MAX_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("REWRITE_CACHE_TTL_SECONDS", "3600")),
+)
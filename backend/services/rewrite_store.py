@@ -0,0 +1,85 @@
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from backend.models.rewrite import Rewrite
+
+
+def load_rewrites(
+    db: Session,
+    text_hashes: Iterable[str],
+    curriculum_id: int,
+    preferences_version: str
+) -> Dict[str, Tuple[str, List[str]]]:
+    """
+    Load stored rewrites for many texts in a single query
+    
+    Args:
+        db: Database session
+        text_hashes: Hashes of the original texts (see text_hash)
+        curriculum_id: Curriculum the rewrites were made for
+        preferences_version: Fingerprint of the preference keywords
+        
+    Returns:
+        Dict mapping text hash to (rewritten_text, keywords_used) for stored rewrites
+    """
+    text_hashes = list(set(text_hashes))
+    if not text_hashes:
+        return {}
+    
+    rows = db.query(Rewrite).filter(
+        Rewrite.curriculum_id == curriculum_id,
+        Rewrite.preferences_version == preferences_version,
+        Rewrite.text_hash.in_(text_hashes)
+    ).all()
+    return {row.text_hash: (row.rewritten_text, list(row.keywords_used)) for row in rows}
+
+
+def save_rewrites(
+    db: Session,
+    rewrites: Dict[str, Tuple[str, List[str]]],
+    curriculum_id: int,
+    preferences_version: str
+) -> int:
+    """
+    Persist rewrites, skipping any that are already stored
+    
+    Args:
+        db: Database session
+        rewrites: Dict mapping text hash to (rewritten_text, keywords_used)
+        curriculum_id: Curriculum the rewrites were made for
+        preferences_version: Fingerprint of the preference keywords
+        
+    Returns:
+        Number of rewrites written
+    """
+    if not rewrites:
+        return 0
+    
+    existing = load_rewrites(db, rewrites.keys(), curriculum_id, preferences_version)
+    new_rows = [
+        Rewrite(
+            text_hash=hash_,
+            curriculum_id=curriculum_id,
+            preferences_version=preferences_version,
+            rewritten_text=rewritten_text,
+            keywords_used=keywords_used
+        )
+        for hash_, (rewritten_text, keywords_used) in rewrites.items()
+        if hash_ not in existing
+    ]
+    if not new_rows:
+        return 0
+    
+    db.add_all(new_rows)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request stored the same rewrite concurrently; theirs is equivalent
+        db.rollback()
+        return 0
+    return len(new_rows)
+
+
+def delete_rewrites_for_curriculum(db: Session, curriculum_id: int) -> None:
+    """Delete stored rewrites for a curriculum (caller commits)"""
+    db.query(Rewrite).filter(Rewrite.curriculum_id == curriculum_id).delete(synchronize_session=False)
@@ -1,39 +1,429 @@
-from typing import List, Tuple
-from backend.services.llm_service import LLMService
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from backend.database import run_db
+from backend.services.keyword_index import KeywordIndex, get_keyword_index
+from backend.services.llm_service import LLMService, LLMUnavailable
+from backend.services.rewrite_cache import (
+    RewriteCache,
+    rewrite_cache,
+    keywords_fingerprint,
+    text_hash,
+)
+from backend.services.rewrite_store import load_rewrites, save_rewrites
+from backend.utils.metrics import REWRITE_LOOKUPS
+
+
+class BatchRewrite(NamedTuple):
+    """One result of RewriterService.rewrite_batch_detailed"""
+    rewritten_text: str
+    keywords_used: List[str]
+    # False for mock rewrites (LLM disabled or failed), which are not cached or stored
+    persisted: bool
 
 
 class RewriterService:
     """Service for rewriting text with curriculum alignment"""
-    
-    def __init__(self):
-        """Initialize rewriter service"""
-        self.llm_service = LLMService()
-    
+
+    def __init__(
+        self,
+        llm_service: Optional[LLMService] = None,
+        cache: Optional[RewriteCache] = None
+    ):
+        """
+        Initialize rewriter service
+
+        Args:
+            llm_service: LLM backend to use (defaults to LLMService configured from env)
+            cache: Rewrite cache to use (defaults to the process-wide cache)
+        """
+        self.llm_service = llm_service if llm_service is not None else LLMService()
+        self.cache = cache if cache is not None else rewrite_cache
+
     def rewrite(
         self,
         original_text: str,
         curriculum_keywords: List[str],
-        preference_keywords: List[str]
+        preference_keywords: List[str],
+        db: Optional[Session] = None,
+        curriculum_id: Optional[int] = None,
+        curriculum_index: Optional[KeywordIndex] = None,
+        keyword_index: Optional[KeywordIndex] = None
     ) -> Tuple[str, List[str]]:
         """
         Rewrite text incorporating curriculum and preference keywords
-        
+        Results are served from the rewrite cache, then from the persistent
+        rewrite store (when db and curriculum_id are given), before calling the LLM.
+
         Args:
             original_text: The original text to rewrite
             curriculum_keywords: Keywords from curriculum
             preference_keywords: Keywords from admin preferences
-            
+            db: Optional database session for the persistent rewrite store
+            curriculum_id: Curriculum the keywords came from
+            curriculum_index: Stored keyword index of the curriculum (built from
+                curriculum_keywords if not given)
+            keyword_index: Merged curriculum and preference keyword index, e.g.
+                ActiveConfig.keyword_index (merged from the above if not given)
+
         Returns:
             Tuple of (rewritten_text, keywords_used)
         """
-        # Combine keywords, removing duplicates
-        all_keywords = list(set(curriculum_keywords + preference_keywords))
-        
-        # Call LLM service to rewrite
-        rewritten_text, keywords_used = self.llm_service.rewrite_text(
-            original_text=original_text,
-            keywords=all_keywords
+        results = self._lookup(
+            [original_text], curriculum_keywords, preference_keywords, db, curriculum_id
+        )
+        if original_text in results:
+            return results[original_text]
+
+        keyword_index = self._combine_keywords(
+            curriculum_keywords, preference_keywords, curriculum_index, keyword_index
+        )
+
+        # Call LLM service to rewrite (mock rewrites are returned but never cached or stored)
+        try:
+            rewritten_text, keywords_used = self.llm_service.rewrite_text(
+                original_text=original_text,
+                keywords=keyword_index.keywords,
+                keyword_index=keyword_index,
+                report_fallback=True
+            )
+        except LLMUnavailable as e:
+            return e.fallback
+
+        self._store(
+            {original_text: (rewritten_text, keywords_used)},
+            curriculum_keywords, preference_keywords, db, curriculum_id
         )
-        
         return rewritten_text, keywords_used
 
+    async def arewrite(
+        self,
+        original_text: str,
+        curriculum_keywords: List[str],
+        preference_keywords: List[str],
+        db: Union[Session, AsyncSession, None] = None,
+        curriculum_id: Optional[int] = None,
+        curriculum_index: Optional[KeywordIndex] = None,
+        keyword_index: Optional[KeywordIndex] = None
+    ) -> Tuple[str, List[str]]:
+        """
+        Async version of rewrite that awaits the LLM without blocking the event loop
+
+        Args:
+            original_text: The original text to rewrite
+            curriculum_keywords: Keywords from curriculum
+            preference_keywords: Keywords from admin preferences
+            db: Optional sync or async database session for the persistent rewrite store
+            curriculum_id: Curriculum the keywords came from
+            curriculum_index: Stored keyword index of the curriculum (built from
+                curriculum_keywords if not given)
+            keyword_index: Merged curriculum and preference keyword index, e.g.
+                ActiveConfig.keyword_index (merged from the above if not given)
+
+        Returns:
+            Tuple of (rewritten_text, keywords_used)
+        """
+        results = await self.rewrite_batch(
+            [original_text], curriculum_keywords, preference_keywords, db, curriculum_id,
+            curriculum_index, keyword_index
+        )
+        return results[0]
+
+    async def astream(
+        self,
+        original_text: str,
+        curriculum_keywords: List[str],
+        preference_keywords: List[str],
+        db: Union[Session, AsyncSession, None] = None,
+        curriculum_id: Optional[int] = None,
+        curriculum_index: Optional[KeywordIndex] = None,
+        keyword_index: Optional[KeywordIndex] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a rewrite as the LLM generates it
+        Cached or stored rewrites are sent as a single token event.
+
+        Args:
+            original_text: The original text to rewrite
+            curriculum_keywords: Keywords from curriculum
+            preference_keywords: Keywords from admin preferences
+            db: Optional sync or async database session for the persistent rewrite store
+            curriculum_id: Curriculum the keywords came from
+            curriculum_index: Stored keyword index of the curriculum (built from
+                curriculum_keywords if not given)
+            keyword_index: Merged curriculum and preference keyword index, e.g.
+                ActiveConfig.keyword_index (merged from the above if not given)
+
+        Yields:
+            ("token", chunk) events, then one ("done", (rewritten_text, keywords_used)) event
+        """
+        results = await self._alookup(
+            [original_text], curriculum_keywords, preference_keywords, db, curriculum_id
+        )
+        if original_text in results:
+            rewritten_text, keywords_used = results[original_text]
+            yield "token", rewritten_text
+            yield "done", (rewritten_text, keywords_used)
+            return
+
+        keyword_index = self._combine_keywords(
+            curriculum_keywords, preference_keywords, curriculum_index, keyword_index
+        )
+        fallback = False
+        async for event, data in self.llm_service.astream_rewrite_text(
+            original_text=original_text,
+            keywords=keyword_index.keywords,
+            keyword_index=keyword_index,
+            report_fallback=True
+        ):
+            if event == "fallback":
+                # Mock rewrite follows: stream it but do not cache or store it
+                fallback = True
+                continue
+            if event == "done" and not fallback:
+                await self._astore(
+                    {original_text: data},
+                    curriculum_keywords, preference_keywords, db, curriculum_id
+                )
+            yield event, data
+
+    async def rewrite_batch(
+        self,
+        original_texts: List[str],
+        curriculum_keywords: List[str],
+        preference_keywords: List[str],
+        db: Union[Session, AsyncSession, None] = None,
+        curriculum_id: Optional[int] = None,
+        curriculum_index: Optional[KeywordIndex] = None,
+        keyword_index: Optional[KeywordIndex] = None
+    ) -> List[Tuple[str, List[str]]]:
+        """
+        Rewrite many texts with the same keywords
+        Cache and store lookups are done up front in bulk; remaining texts are
+        rewritten concurrently (bounded by the LLM client's concurrency limit).
+
+        Args:
+            original_texts: The original texts to rewrite
+            curriculum_keywords: Keywords from curriculum
+            preference_keywords: Keywords from admin preferences
+            db: Optional sync or async database session for the persistent rewrite store
+            curriculum_id: Curriculum the keywords came from
+            curriculum_index: Stored keyword index of the curriculum (built from
+                curriculum_keywords if not given)
+            keyword_index: Merged curriculum and preference keyword index, e.g.
+                ActiveConfig.keyword_index (merged from the above if not given)
+
+        Returns:
+            List of (rewritten_text, keywords_used), in the order of original_texts
+        """
+        results = await self.rewrite_batch_detailed(
+            original_texts, curriculum_keywords, preference_keywords, db, curriculum_id,
+            curriculum_index, keyword_index
+        )
+        return [(result.rewritten_text, result.keywords_used) for result in results]
+
+    async def rewrite_batch_detailed(
+        self,
+        original_texts: List[str],
+        curriculum_keywords: List[str],
+        preference_keywords: List[str],
+        db: Union[Session, AsyncSession, None] = None,
+        curriculum_id: Optional[int] = None,
+        curriculum_index: Optional[KeywordIndex] = None,
+        keyword_index: Optional[KeywordIndex] = None
+    ) -> List[BatchRewrite]:
+        """
+        rewrite_batch that also reports which results are mock rewrites
+
+        Args:
+            original_texts: The original texts to rewrite
+            curriculum_keywords: Keywords from curriculum
+            preference_keywords: Keywords from admin preferences
+            db: Optional sync or async database session for the persistent rewrite store
+            curriculum_id: Curriculum the keywords came from
+            curriculum_index: Stored keyword index of the curriculum (built from
+                curriculum_keywords if not given)
+            keyword_index: Merged curriculum and preference keyword index, e.g.
+                ActiveConfig.keyword_index (merged from the above if not given)
+
+        Returns:
+            List of BatchRewrite, in the order of original_texts
+        """
+        found = await self._alookup(
+            original_texts, curriculum_keywords, preference_keywords, db, curriculum_id
+        )
+        results = {text: BatchRewrite(*value, persisted=True) for text, value in found.items()}
+
+        # Rewrite each distinct missing text once
+        missing = list(dict.fromkeys(text for text in original_texts if text not in results))
+        if missing:
+            keyword_index = self._combine_keywords(
+                curriculum_keywords, preference_keywords, curriculum_index, keyword_index
+            )
+            rewrites = await asyncio.gather(*[
+                self._arewrite_llm(text, keyword_index) for text in missing
+            ])
+            results.update(zip(missing, rewrites))
+            # Only LLM output is kept: a mock rewrite must not outlive an outage
+            computed = {
+                text: (result.rewritten_text, result.keywords_used)
+                for text, result in zip(missing, rewrites) if result.persisted
+            }
+            if computed:
+                await self._astore(computed, curriculum_keywords, preference_keywords, db, curriculum_id)
+
+        return [results[text] for text in original_texts]
+
+    async def _arewrite_llm(self, original_text: str, keyword_index: KeywordIndex) -> BatchRewrite:
+        """Rewrite one text with the LLM, marking mock rewrites as not persisted"""
+        try:
+            rewritten_text, keywords_used = await self.llm_service.arewrite_text(
+                original_text=original_text,
+                keywords=keyword_index.keywords,
+                keyword_index=keyword_index,
+                report_fallback=True
+            )
+        except LLMUnavailable as e:
+            return BatchRewrite(*e.fallback, persisted=False)
+        return BatchRewrite(rewritten_text, keywords_used, persisted=True)
+
+    @staticmethod
+    def _combine_keywords(
+        curriculum_keywords: List[str],
+        preference_keywords: List[str],
+        curriculum_index: Optional[KeywordIndex] = None,
+        keyword_index: Optional[KeywordIndex] = None
+    ) -> KeywordIndex:
+        """Combine keyword indexes, removing duplicates (curriculum keywords first), unless already merged"""
+        if keyword_index is not None:
+            return keyword_index
+        if curriculum_index is None:
+            curriculum_index = get_keyword_index(curriculum_keywords)
+        return curriculum_index.merge(get_keyword_index(preference_keywords))
+
+    def _lookup(
+        self,
+        original_texts: List[str],
+        curriculum_keywords: List[str],
+        preference_keywords: List[str],
+        db: Optional[Session],
+        curriculum_id: Optional[int]
+    ) -> Dict[str, Tuple[str, List[str]]]:
+        """Find already computed rewrites in the cache, then in the rewrite store"""
+        results, missing = self._lookup_cache(original_texts, curriculum_keywords, preference_keywords)
+        if missing and db is not None and curriculum_id is not None:
+            stored = load_rewrites(
+                db,
+                [text_hash(text) for text in missing],
+                curriculum_id,
+                keywords_fingerprint(preference_keywords)
+            )
+            self._add_stored(results, missing, stored, curriculum_keywords, preference_keywords)
+
+        REWRITE_LOOKUPS.labels(source="miss").inc(len(original_texts) - len(results))
+        return results
+
+    async def _alookup(
+        self,
+        original_texts: List[str],
+        curriculum_keywords: List[str],
+        preference_keywords: List[str],
+        db: Union[Session, AsyncSession, None],
+        curriculum_id: Optional[int]
+    ) -> Dict[str, Tuple[str, List[str]]]:
+        """_lookup for async callers: the store is only queried (without blocking) on cache misses"""
+        results, missing = self._lookup_cache(original_texts, curriculum_keywords, preference_keywords)
+        if missing and db is not None and curriculum_id is not None:
+            stored = await run_db(
+                db,
+                load_rewrites,
+                [text_hash(text) for text in missing],
+                curriculum_id,
+                keywords_fingerprint(preference_keywords)
+            )
+            self._add_stored(results, missing, stored, curriculum_keywords, preference_keywords)
+
+        REWRITE_LOOKUPS.labels(source="miss").inc(len(original_texts) - len(results))
+        return results
+
+    def _lookup_cache(
+        self,
+        original_texts: List[str],
+        curriculum_keywords: List[str],
+        preference_keywords: List[str]
+    ) -> Tuple[Dict[str, Tuple[str, List[str]]], List[str]]:
+        """Cached rewrites, and the texts that were not in the cache"""
+        all_keywords = curriculum_keywords + preference_keywords
+        results = {}
+        for text in original_texts:
+            cached = self.cache.get(self.cache.make_key(text, all_keywords))
+            if cached is not None:
+                REWRITE_LOOKUPS.labels(source="cache").inc()
+                results[text] = cached
+        return results, [text for text in original_texts if text not in results]
+
+    def _add_stored(
+        self,
+        results: Dict[str, Tuple[str, List[str]]],
+        missing: List[str],
+        stored: Dict[str, Tuple[str, List[str]]],
+        curriculum_keywords: List[str],
+        preference_keywords: List[str]
+    ) -> None:
+        """Add rewrites found in the store to results (and the cache)"""
+        all_keywords = curriculum_keywords + preference_keywords
+        for text in missing:
+            value = stored.get(text_hash(text))
+            if value is not None:
+                self.cache.set(self.cache.make_key(text, all_keywords), value)
+                REWRITE_LOOKUPS.labels(source="store").inc()
+                results[text] = value
+
+    def _store(
+        self,
+        rewrites: Dict[str, Tuple[str, List[str]]],
+        curriculum_keywords: List[str],
+        preference_keywords: List[str],
+        db: Optional[Session],
+        curriculum_id: Optional[int]
+    ) -> None:
+        """Write freshly computed rewrites to the cache and the rewrite store"""
+        self._store_cache(rewrites, curriculum_keywords, preference_keywords)
+        if db is not None and curriculum_id is not None:
+            save_rewrites(
+                db,
+                {text_hash(text): value for text, value in rewrites.items()},
+                curriculum_id,
+                keywords_fingerprint(preference_keywords)
+            )
+
+    async def _astore(
+        self,
+        rewrites: Dict[str, Tuple[str, List[str]]],
+        curriculum_keywords: List[str],
+        preference_keywords: List[str],
+        db: Union[Session, AsyncSession, None],
+        curriculum_id: Optional[int]
+    ) -> None:
+        """_store for async callers"""
+        self._store_cache(rewrites, curriculum_keywords, preference_keywords)
+        if db is not None and curriculum_id is not None:
+            await run_db(
+                db,
+                save_rewrites,
+                {text_hash(text): value for text, value in rewrites.items()},
+                curriculum_id,
+                keywords_fingerprint(preference_keywords)
+            )
+
+    def _store_cache(
+        self,
+        rewrites: Dict[str, Tuple[str, List[str]]],
+        curriculum_keywords: List[str],
+        preference_keywords: List[str]
+    ) -> None:
+        """Write rewrites to the cache"""
+        all_keywords = curriculum_keywords + preference_keywords
+        for text, value in rewrites.items():
+            self.cache.set(self.cache.make_key(text, all_keywords), value)
@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from backend.models.token import RefreshToken, RevokedToken
+
+# Seconds between re-reads of the revoked_tokens table (revocations made by other processes)
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+
+# Naive UTC datetimes are stored; this converts them back to Unix time
+_EPOCH = datetime(1970, 1, 1)
+
+
+class RevocationList:
+    """
+    Revoked access tokens, by "jti" claim
+
+    Held in memory so get_current_user checks every request with a single
+    dict lookup; revocations are persisted in the revoked_tokens table and
+    loaded on startup. Entries are dropped once the token has expired anyway.
+    With a session factory, is_revoked() re-reads the table at most every
+    sync_seconds, so revocations made by another process are seen within
+    that interval.
+    """
+
+    # Seconds between sweeps of expired entries
+    PRUNE_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.time,
+        session_factory: Optional[Callable[[], Session]] = None,
+        sync_seconds: float = REVOCATION_SYNC_SECONDS
+    ):
+        """
+        Args:
+            clock: Wall clock (token exp claims are Unix timestamps)
+            session_factory: Sync session factory used to re-read the table
+                (None: only load() and this process's revocations are seen)
+            sync_seconds: Minimum interval between re-reads
+        """
+        self._clock = clock
+        self.session_factory = session_factory
+        self.sync_seconds = sync_seconds
+        self._revoked: Dict[str, float] = {}  # jti -> exp
+        self._lock = threading.Lock()
+        # Held by the one thread re-reading the table; the others keep using the current set
+        self._sync_lock = threading.Lock()
+        self._next_prune = 0.0
+        self._next_sync = 0.0
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """
+        Whether the token with this jti has been revoked (tokens without one never are)
+        May read the database (see sync), so call it from a worker thread.
+        """
+        if jti is None:
+            return False
+        if self.session_factory is not None and self._clock() >= self._next_sync:
+            self.sync()
+        return jti in self._revoked
+
+    def sync(self) -> None:
+        """Add revocations persisted by any process since the last read (skipped if another thread is reading)"""
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            now = self._clock()
+            self._next_sync = now + self.sync_seconds
+            try:
+                with self.session_factory() as db:
+                    rows = db.execute(
+                        select(RevokedToken.jti, RevokedToken.expires_at).where(
+                            RevokedToken.expires_at > datetime.utcfromtimestamp(now)
+                        )
+                    ).all()
+            except SQLAlchemyError as e:
+                # Keep serving from memory; retried after sync_seconds
+                print(f"Warning: reading revoked tokens failed: {e}")
+                return
+            with self._lock:
+                # Merge rather than replace: a revocation committed after the read must not be lost
+                revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+                revoked.update((jti, (expires_at - _EPOCH).total_seconds()) for jti, expires_at in rows)
+                self._revoked = revoked
+        finally:
+            self._sync_lock.release()
+
+    def add(self, jti: str, expires_at: float) -> None:
+        """Mark a jti revoked in memory only (see arevoke)"""
+        now = self._clock()
+        if now >= expires_at:
+            return
+        with self._lock:
+            self._revoked[jti] = expires_at
+            if now >= self._next_prune:
+                self._next_prune = now + self.PRUNE_INTERVAL
+                # Swap in a new dict so lock-free readers never see it change size mid-lookup
+                self._revoked = {key: exp for key, exp in self._revoked.items() if exp > now}
+
+    async def arevoke(self, db: AsyncSession, jti: str, expires_at: float) -> None:
+        """
+        Revoke an access token and persist the revocation (commits the session)
+
+        Args:
+            db: Async database session
+            jti: Token "jti" claim
+            expires_at: Token "exp" claim (Unix time)
+        """
+        if self._clock() < expires_at:
+            await db.merge(RevokedToken(jti=jti, expires_at=datetime.utcfromtimestamp(expires_at)))
+        await db.commit()
+        self.add(jti, expires_at)
+
+    def load(self, db: Session) -> int:
+        """
+        Replace the in-memory list with the persisted revocations, deleting expired rows
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of revoked tokens loaded
+        """
+        now = datetime.utcfromtimestamp(self._clock())
+        db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        db.commit()
+        rows = db.execute(select(RevokedToken.jti, RevokedToken.expires_at)).all()
+        revoked = {jti: (expires_at - _EPOCH).total_seconds() for jti, expires_at in rows}
+        with self._lock:
+            self._revoked = revoked
+            self._next_sync = self._clock() + self.sync_seconds
+        return len(revoked)
+
+    def clear(self) -> None:
+        """Forget all revocations (in memory only)"""
+        with self._lock:
+            self._revoked = {}
+
+
+def purge_refresh_tokens(db: Session) -> int:
+    """
+    Delete refresh tokens that can no longer be redeemed (expired or already used/revoked)
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of rows deleted
+    """
+    result = db.execute(
+        delete(RefreshToken).where(
+            (RefreshToken.expires_at <= datetime.utcnow()) | RefreshToken.revoked_at.isnot(None)
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+# Process-wide revocation list checked by get_current_user
+revoked_tokens = RevocationList()
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.models.user import User
+from backend.utils.metrics import USER_CACHE_LOOKUPS
+
+
+def user_snapshot(user: User) -> User:
+    """
+    Detached copy of the fields authorization needs (id, username, role)
+    Treat as read-only: it is shared between requests.
+    """
+    return User(id=user.id, username=user.username, role=user.role, created_at=user.created_at)
+
+
+class UserCache:
+    """
+    In-process cache of authenticated users, keyed by username
+
+    Lets get_current_user authorize most requests without a database read.
+    Routes that create or change users call invalidate(); ttl_seconds bounds
+    how stale an entry can get when another process made the change.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on invalidate() so loads that raced with a change are not cached
+        self._generation = 0
+
+    async def aget(
+        self, db: AsyncSession, username: str, user_id: Optional[int] = None
+    ) -> Optional[User]:
+        """
+        Get the user a token was issued to, loading it from the database on a miss
+
+        Args:
+            db: Async database session (only used on a miss)
+            username: Token subject
+            user_id: Token "uid" claim, if present (older tokens only have the subject)
+
+        Returns:
+            User snapshot (see user_snapshot), or None if the user no longer
+            exists or the username now belongs to a different account
+        """
+        generation, user = self._cached(username)
+        if user is None:
+            loaded = await self._load(db, username, user_id)
+            if loaded is None:
+                return None
+            user = self._remember(username, generation, loaded)
+
+        if user_id is not None and user.id != user_id:
+            return None
+        return user
+
+    @staticmethod
+    async def _load(db: AsyncSession, username: str, user_id: Optional[int]) -> Optional[User]:
+        if user_id is not None:
+            # Primary key lookup when the token carries the user ID
+            user = await db.get(User, user_id)
+            if user is not None and user.username == username:
+                return user
+        return await db.scalar(select(User).where(User.username == username))
+
+    def _cached(self, username: str) -> Tuple[int, Optional[User]]:
+        """Current generation and the live entry for username, if any"""
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and self._clock() < entry[0]:
+                self._entries.move_to_end(username)
+                USER_CACHE_LOOKUPS.labels(result="hit").inc()
+                return self._generation, entry[1]
+            generation = self._generation
+        USER_CACHE_LOOKUPS.labels(result="miss").inc()
+        return generation, None
+
+    def _remember(self, username: str, generation: int, user: User) -> User:
+        """Snapshot a freshly loaded user, cached unless invalidate() ran meanwhile"""
+        snapshot = user_snapshot(user)
+        if self.max_size <= 0:
+            return snapshot
+        with self._lock:
+            if generation == self._generation:
+                self._entries[username] = (self._clock() + self.ttl_seconds, snapshot)
+                self._entries.move_to_end(username)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, username: Optional[str] = None) -> None:
+        """
+        Drop cached users (called when users are created or changed)
+
+        Args:
+            username: Only drop this user (all users if None)
+        """
+        with self._lock:
+            self._generation += 1
+            if username is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(username, None)
+
+
+# Process-wide user cache used by get_current_user
+user_cache = UserCache(
+    ttl_seconds=float(os.getenv("USER_CACHE_TTL_SECONDS", "60")),
+)
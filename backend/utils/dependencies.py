@@ -1,16 +1,19 @@
-from fastapi import Depends, HTTPException, status, Header
+from fastapi import Depends, HTTPException, status, Header, Request
 from typing import Optional
-from sqlalchemy.orm import Session
-from backend.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import get_async_db
 from backend.models.user import User, UserRole
-from backend.utils.security import decode_access_token
+from backend.services.rewriter import RewriterService
+from backend.services.token_revocation import revoked_tokens
+from backend.services.user_cache import user_cache
+from backend.utils.security import PasswordHasher, decode_access_token
 
 
-def get_current_user(
-    authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
-) -> User:
-    """Dependency to get current authenticated user"""
+def get_token_payload(authorization: Optional[str] = Header(None)) -> dict:
+    """
+    Dependency to get the claims of the request's bearer access token
+    Rejects missing, invalid, expired and revoked tokens.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -29,28 +32,82 @@ def get_current_user(
         raise credentials_exception
     
     payload = decode_access_token(token)
-    if payload is None:
+    if payload is None or revoked_tokens.is_revoked(payload.get("jti")):
         raise credentials_exception
+    return payload
+
+
+async def get_current_user(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Dependency to get current authenticated user
+    Served from the in-process user cache, so most requests do not read the
+    database. The returned user is a detached snapshot shared between
+    requests: treat it as read-only.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
     
     username: str = payload.get("sub")
     if username is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    user_id = payload.get("uid")
+    user = await user_cache.aget(db, username, user_id if isinstance(user_id, int) else None)
     if user is None:
         raise credentials_exception
     
     return user
 
 
-def get_admin_user(
-    current_user: User = Depends(get_current_user)
+async def get_admin_user(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
-    """Dependency to ensure current user is an Admin"""
+    """
+    Dependency to ensure current user is an Admin
+    A token whose "role" claim is not Admin is rejected without loading the
+    user (a promoted user needs a new token). An Admin claim is still checked
+    against the cached user, which stays the source of truth, so a demotion
+    applies before the token expires. Tokens without a role claim are checked
+    against the user only.
+    """
+    forbidden_exception = HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Not enough permissions"
+    )
+    
+    role = payload.get("role")
+    if role is not None and role != UserRole.ADMIN.value:
+        raise forbidden_exception
+    
+    current_user = await get_current_user(payload, db)
     if current_user.role != UserRole.ADMIN:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
+        raise forbidden_exception
     return current_user
 
+
+
+def get_rewriter_service(request: Request) -> RewriterService:
+    """Dependency to get the app-scoped rewriter service (created on startup)"""
+    rewriter = getattr(request.app.state, "rewriter", None)
+    if rewriter is None:
+        # Startup hook has not run (e.g. TestClient used without a context manager)
+        rewriter = RewriterService()
+        request.app.state.rewriter = rewriter
+    return rewriter
+
+
+def get_password_hasher(request: Request) -> PasswordHasher:
+    """Dependency to get the app-scoped password hasher (created on startup)"""
+    hasher = getattr(request.app.state, "password_hasher", None)
+    if hasher is None:
+        # Startup hook has not run (e.g. TestClient used without a context manager)
+        hasher = PasswordHasher()
+        request.app.state.password_hasher = hasher
+    return hasher
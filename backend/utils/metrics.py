@@ -0,0 +1,362 @@
+"""
+In-process metrics exposed in Prometheus text format at /metrics.
+
+Counters, gauges and histograms are kept in memory per process (no external
+service); instrumented code updates the module-level metrics below.
+"""
+
+import abc
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Default latency buckets in seconds (same as the Prometheus client libraries)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+class _Metric(abc.ABC):
+    """Base class for a metric family with optional labels"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+
+    def labels(self, **labels: str) -> "_Metric":
+        """Get the child metric for a set of label values"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._new_child()
+                self._children[key] = child
+            return child
+
+    @abc.abstractmethod
+    def _new_child(self) -> "_Metric":
+        """New unlabelled metric of the same type, for one label set"""
+
+    @abc.abstractmethod
+    def _samples(self) -> List[Tuple[str, List[Tuple[str, str]], float]]:
+        """(suffix, labels, value) samples for this metric without labels"""
+
+    def render(self) -> List[str]:
+        """Render HELP/TYPE lines and all samples"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        if self.labelnames:
+            with self._lock:
+                children = sorted(self._children.items())
+            series = [(list(zip(self.labelnames, key)), child) for key, child in children]
+        else:
+            series = [([], self)]
+        for labels, metric in series:
+            for suffix, extra_labels, value in metric._samples():
+                lines.append(
+                    f"{self.name}{suffix}{_format_labels(labels + extra_labels)} {_format_value(value)}"
+                )
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+
+    def _new_child(self) -> "Counter":
+        return Counter(self.name, self.documentation)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def _samples(self):
+        return [("", [], self.value)]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+
+    def _new_child(self) -> "Gauge":
+        return Gauge(self.name, self.documentation)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+    def _samples(self):
+        return [("", [], self.value)]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def _new_child(self) -> "Histogram":
+        return Histogram(self.name, self.documentation, buckets=self.buckets[:-1])
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[index] += 1
+                    break
+
+    def _samples(self):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        samples = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            samples.append(("_bucket", [("le", _format_value(bound))], cumulative))
+        samples.append(("_sum", [], total))
+        samples.append(("_count", [], count))
+        return samples
+
+
+class MetricsRegistry:
+    """Registry of metrics rendered together at /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render every metric in Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route and status code", ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route"]
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+)
+REWRITE_LOOKUPS = registry.counter(
+    "rewrite_lookups_total", "Rewrite lookups by where the result came from", ["source"]
+)
+LLM_REQUESTS = registry.counter(
+    "llm_requests_total", "LLM API calls by mode and outcome", ["mode", "outcome"]
+)
+LLM_REQUEST_DURATION = registry.histogram(
+    "llm_request_duration_seconds", "LLM API call latency", ["mode"]
+)
+MOCK_REWRITES = registry.counter(
+    "llm_mock_rewrites_total", "Rewrites served by the mock rewrite", ["reason"]
+)
+ACTIVE_CONFIG_LOOKUPS = registry.counter(
+    "active_config_lookups_total", "Active curriculum/preferences snapshot lookups", ["result"]
+)
+TOKEN_CACHE_LOOKUPS = registry.counter(
+    "token_cache_lookups_total", "Decoded JWT cache lookups", ["result"]
+)
+TOKEN_VERIFICATIONS = registry.counter(
+    "token_verifications_total", "JWT signature verifications (cache misses) by outcome", ["outcome"]
+)
+TOKEN_REFRESHES = registry.counter(
+    "token_refreshes_total", "Access token renewals with a refresh token by outcome", ["outcome"]
+)
+USER_CACHE_LOOKUPS = registry.counter(
+    "user_cache_lookups_total", "Authenticated user cache lookups", ["result"]
+)
+PASSWORD_HASH_QUEUED = registry.gauge(
+    "password_hash_queued", "bcrypt operations waiting for a worker thread"
+)
+PASSWORD_HASH_IN_PROGRESS = registry.gauge(
+    "password_hash_in_progress", "bcrypt operations currently running"
+)
+PASSWORD_HASH_WAIT = registry.histogram(
+    "password_hash_queue_wait_seconds", "Time bcrypt operations waited for a worker thread", ["operation"]
+)
+PASSWORD_HASH_DURATION = registry.histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify latency (excluding queueing)", ["operation"]
+)
+PASSWORD_REHASHES = registry.counter(
+    "password_rehashes_total", "Password hashes upgraded to the current bcrypt cost on login"
+)
+PRE_REWRITE_QUEUE_DEPTH = registry.gauge(
+    "pre_rewrite_queue_depth", "New feed posts waiting for the background pre-rewrite"
+)
+PRE_REWRITE_LAG = registry.histogram(
+    "pre_rewrite_lag_seconds", "Time from a post being queued to its rewrite being stored",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+)
+PRE_REWRITE_POSTS = registry.counter(
+    "pre_rewrite_posts_total", "Posts handled by the background pre-rewrite by outcome", ["outcome"]
+)
+PRE_REWRITE_BACKPRESSURE = registry.counter(
+    "pre_rewrite_backpressure_total", "Times the feed watcher waited for room in the pre-rewrite queue"
+)
+PLATFORM_HTTP_REQUESTS = registry.counter(
+    "platform_http_requests_total", "Platform API requests by outcome (success, retry, error)", ["outcome"]
+)
+PLATFORM_HTTP_DURATION = registry.histogram(
+    "platform_http_request_duration_seconds", "Platform API request latency (per attempt)"
+)
+DB_QUERIES = registry.counter(
+    "db_queries_total", "Database statements executed"
+)
+DB_QUERY_DURATION = registry.histogram(
+    "db_query_duration_seconds", "Database statement latency",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, status codes and in-flight requests
+    Latency is measured until the last body chunk is sent, so streamed
+    responses are timed in full. Routes are labelled by their path template
+    (e.g. /api/curriculum/{curriculum_id}) to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_REQUESTS.labels(method=method, route=route_path, status=str(status_code)).inc()
+            HTTP_REQUEST_DURATION.labels(method=method, route=route_path).observe(
+                time.perf_counter() - start
+            )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times: Optional[List[float]] = conn.info.get("query_start_times")
+    if not start_times:
+        return
+    DB_QUERIES.inc()
+    DB_QUERY_DURATION.observe(time.perf_counter() - start_times.pop())
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute: drop its start
+    # time so it is not paired with the connection's next statement
+    conn = context.connection
+    if context.execution_context is None or conn is None:
+        return
+    start_times: Optional[List[float]] = conn.info.get("query_start_times")
+    if start_times:
+        start_times.pop()
+
+
+def instrument_engines() -> None:
+    """Time every SQL statement executed by any SQLAlchemy engine"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
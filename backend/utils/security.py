@@ -1,8 +1,24 @@
+import asyncio
+import hashlib
+import secrets
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Optional, Tuple
 from jose import JWTError, jwt
 import bcrypt
 import os
+from backend.utils.metrics import (
+    PASSWORD_HASH_DURATION,
+    PASSWORD_HASH_IN_PROGRESS,
+    PASSWORD_HASH_QUEUED,
+    PASSWORD_HASH_WAIT,
+    TOKEN_CACHE_LOOKUPS,
+    TOKEN_VERIFICATIONS,
+)
 
 # Use bcrypt directly instead of passlib to avoid initialization bug detection issues
 # This avoids the 72-byte error during passlib's detect_wrap_bug function
@@ -11,6 +27,14 @@ import os
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Refresh tokens renew access tokens without a password (and without bcrypt)
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+
+# bcrypt cost policy (each +1 doubles hashing time). Hashes store their own
+# cost, so changing it never invalidates users: they are rehashed on login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Cost for demo accounts created at startup (upgraded on first login)
+SEED_BCRYPT_ROUNDS = int(os.getenv("SEED_BCRYPT_ROUNDS", "4"))
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -36,8 +60,17 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
-def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt directly"""
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    """
+    Hash a password using bcrypt directly
+
+    Args:
+        password: Plain password
+        rounds: bcrypt cost (defaults to BCRYPT_ROUNDS)
+
+    Returns:
+        bcrypt hash (includes the cost)
+    """
     try:
         # Ensure password is a string
         if isinstance(password, bytes):
@@ -57,7 +90,7 @@ def get_password_hash(password: str) -> str:
             password_bytes = password_bytes[:72]
 
         # Generate salt and hash using bcrypt directly
-        salt = bcrypt.gensalt(rounds=12)
+        salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
         hashed = bcrypt.hashpw(password_bytes, salt)
 
         # Return as string (bcrypt hash is always ASCII)
@@ -72,9 +105,98 @@ def get_password_hash(password: str) -> str:
         raise ValueError(f"Password hashing error: {e}")
 
 
+def bcrypt_cost(hashed_password: str) -> Optional[int]:
+    """Cost stored in a bcrypt hash ("$2b$12$..." -> 12), or None if it is not a bcrypt hash"""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing/verification in a bounded thread pool
+    A bcrypt call at cost 12 takes ~250ms of CPU; running it inline in an
+    async route stalls every other request on the worker. bcrypt releases
+    the GIL, so worker threads hash in parallel up to max_workers; further
+    calls wait in the pool's queue (see the password_hash_* metrics).
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, rounds: Optional[int] = None):
+        """
+        Initialize password hasher
+
+        Args:
+            max_workers: Maximum concurrent bcrypt operations (defaults to
+                PASSWORD_HASH_WORKERS env var, or the number of CPUs)
+            rounds: bcrypt cost for new hashes (defaults to BCRYPT_ROUNDS)
+        """
+        self.max_workers = max_workers or int(
+            os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1))
+        )
+        self.rounds = rounds or BCRYPT_ROUNDS
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    async def hash(self, password: str) -> str:
+        """Hash a password without blocking the event loop"""
+        return await self._run("hash", get_password_hash, password, self.rounds)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash without blocking the event loop"""
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Whether a (verified) hash was made with a different cost than the current policy"""
+        cost = bcrypt_cost(hashed_password)
+        return cost is not None and cost != self.rounds
+
+    async def _run(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) on a worker thread, recording queueing and run time"""
+        queued_at = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            PASSWORD_HASH_QUEUED.dec()
+            PASSWORD_HASH_IN_PROGRESS.inc()
+            PASSWORD_HASH_WAIT.labels(operation=operation).observe(started - queued_at)
+            try:
+                return fn(*args)
+            finally:
+                PASSWORD_HASH_IN_PROGRESS.dec()
+                PASSWORD_HASH_DURATION.labels(operation=operation).observe(time.perf_counter() - started)
+
+        PASSWORD_HASH_QUEUED.inc()
+        future = self._get_executor().submit(job)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Request went away (or the pool shut down) while still queued: drop the job
+            future.cancel()
+            if future.cancelled():
+                PASSWORD_HASH_QUEUED.dec()
+            raise
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="bcrypt"
+                )
+            return self._executor
+
+    def shutdown(self) -> None:
+        """Stop the worker threads (a new pool is created on next use)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a JWT access token"""
+    """Create a JWT access token (with a unique "jti" claim so it can be revoked)"""
     to_encode = data.copy()
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -84,10 +206,116 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def create_refresh_token() -> str:
+    """Create an opaque refresh token (store only hash_refresh_token() of it)"""
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    Hash a refresh token for storage and lookup
+    A fast hash is enough: the token is 256 random bits, not a password.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def user_token_claims(user) -> dict:
+    """
+    JWT claims identifying a user
+
+    Args:
+        user: User the token is issued to
+
+    Returns:
+        Claims: "sub" (username), "uid" (user ID) and "role"
+    """
+    role = user.role.value if hasattr(user.role, "value") else str(user.role)
+    return {"sub": user.username, "uid": user.id, "role": role}
+
+
+class DecodedTokenCache:
+    """
+    LRU of verified JWT payloads, keyed by a SHA-256 of the token
+
+    A student's token is sent with every request for its whole lifetime, so
+    the signature is checked once per token per process and later requests
+    are served from here. Entries expire at the token's own exp claim.
+    Safe to use from multiple threads.
+    """
+
+    def __init__(self, max_size: int = 4096, clock: Callable[[], float] = time.time):
+        self.max_size = max_size
+        # Wall clock: exp is a Unix timestamp
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(token: str) -> str:
+        """Cache key for a token"""
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """
+        Look up the payload of an already verified token
+
+        Returns:
+            Copy of the payload, or None on miss/expiry
+        """
+        key = self.make_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                TOKEN_CACHE_LOOKUPS.labels(result="miss").inc()
+                return None
+            expires_at, payload = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                TOKEN_CACHE_LOOKUPS.labels(result="expired").inc()
+                return None
+            self._entries.move_to_end(key)
+        TOKEN_CACHE_LOOKUPS.labels(result="hit").inc()
+        return dict(payload)
+
+    def set(self, token: str, payload: dict) -> None:
+        """Store a verified payload until its exp claim (tokens without exp are not cached)"""
+        expires_at = payload.get("exp")
+        if self.max_size <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        with self._lock:
+            key = self.make_key(token)
+            self._entries[key] = (float(expires_at), dict(payload))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, token: str) -> None:
+        """Forget a token"""
+        with self._lock:
+            self._entries.pop(self.make_key(token), None)
+
+    def clear(self) -> None:
+        """Drop all cached payloads"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide cache used by decode_access_token
+decoded_token_cache = DecodedTokenCache(
+    max_size=int(os.getenv("TOKEN_CACHE_MAX_SIZE", "4096")),
+)
+
+
 def decode_access_token(token: str) -> Optional[dict]:
-    """Decode and validate a JWT token"""
+    """Decode and validate a JWT token (verified tokens are cached until they expire)"""
+    payload = decoded_token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
+        TOKEN_VERIFICATIONS.labels(outcome="invalid").inc()
         return None
+    TOKEN_VERIFICATIONS.labels(outcome="valid").inc()
+    decoded_token_cache.set(token, payload)
+    return payload
@@ -20,11 +20,13 @@ jest.mock('./utils/api', () => ({
 // Mock services
 jest.mock('./services/rednoteService', () => ({
   getFeed: jest.fn(),
+  getFeedPage: jest.fn(),
   getPost: jest.fn(),
 }));
 
 jest.mock('./services/rewriteService', () => ({
   rewriteText: jest.fn(),
+  getRewrittenFeed: jest.fn(),
 }));
 
 // Note: rewriteService tests are tested through integration in ContentFeed tests
@@ -215,36 +217,37 @@ describe('ContentFeed Page', () => {
     },
   ];
 
-  const mockRewriteData1 = {
-    original_text: 'Post 1 text',
-    rewritten_text: 'Rewritten Post 1 text',
-    keywords_used: ['keyword1'],
-  };
-
-  const mockRewriteData2 = {
-    original_text: 'Post 2 text',
-    rewritten_text: 'Rewritten Post 2 text',
-    keywords_used: ['keyword2'],
-  };
+  const mockRewrittenPosts = [
+    {
+      ...mockPosts[0],
+      rewritten_text: 'Rewritten Post 1 text',
+      keywords_used: ['keyword1'],
+    },
+    {
+      ...mockPosts[1],
+      rewritten_text: 'Rewritten Post 2 text',
+      keywords_used: ['keyword2'],
+    },
+  ];
 
   beforeEach(() => {
     jest.clearAllMocks();
-    rednoteService.getFeed.mockResolvedValue(mockPosts);
-    rewriteService.rewriteText
-      .mockResolvedValueOnce(mockRewriteData1)
-      .mockResolvedValueOnce(mockRewriteData2);
+    rewriteService.getRewrittenFeed.mockResolvedValue({
+      posts: mockRewrittenPosts,
+      nextCursor: null,
+    });
   });
 
   test('fetches feed and displays rewritten posts', async () => {
     render(<ContentFeed />);
 
     await waitFor(() => {
-      expect(rednoteService.getFeed).toHaveBeenCalled();
+      expect(rewriteService.getRewrittenFeed).toHaveBeenCalledTimes(1);
     });
 
-    await waitFor(() => {
-      expect(rewriteService.rewriteText).toHaveBeenCalledTimes(2);
-    });
+    // The feed comes back rewritten, so no per-post rewrite requests
+    expect(rednoteService.getFeed).not.toHaveBeenCalled();
+    expect(rewriteService.rewriteText).not.toHaveBeenCalled();
 
     await waitFor(() => {
       expect(screen.getByText('Rewritten Post 1 text')).toBeInTheDocument();
@@ -262,8 +265,45 @@ describe('ContentFeed Page', () => {
     });
   });
 
+  test('loads the next page with the cursor when load more is clicked', async () => {
+    rewriteService.getRewrittenFeed
+      .mockResolvedValueOnce({ posts: [mockRewrittenPosts[0]], nextCursor: 'cursor-2' })
+      .mockResolvedValueOnce({ posts: [mockRewrittenPosts[1]], nextCursor: null });
+
+    render(<ContentFeed />);
+
+    await waitFor(() => {
+      expect(screen.getByText('Rewritten Post 1 text')).toBeInTheDocument();
+    });
+    expect(screen.queryByText('Rewritten Post 2 text')).not.toBeInTheDocument();
+
+    fireEvent.click(screen.getByRole('button', { name: /加载更多/i }));
+
+    await waitFor(() => {
+      expect(screen.getByText('Rewritten Post 2 text')).toBeInTheDocument();
+    });
+    expect(rewriteService.getRewrittenFeed).toHaveBeenLastCalledWith({ cursor: 'cursor-2' });
+    expect(screen.getByText('Rewritten Post 1 text')).toBeInTheDocument();
+    // Last page: no more pages to load
+    expect(screen.queryByRole('button', { name: /加载更多/i })).not.toBeInTheDocument();
+  });
+
+  test('shows original post text when the feed cannot be rewritten', async () => {
+    rewriteService.getRewrittenFeed.mockRejectedValue(new Error('Rewrite failed'));
+    rednoteService.getFeedPage.mockResolvedValue({ posts: mockPosts, nextCursor: null });
+
+    render(<ContentFeed />);
+
+    await waitFor(() => {
+      expect(screen.getByText('Post 1 text')).toBeInTheDocument();
+      expect(screen.getByText('Post 2 text')).toBeInTheDocument();
+    });
+    expect(rednoteService.getFeedPage).toHaveBeenCalledWith({ cursor: undefined });
+  });
+
   test('displays error message when feed fetch fails', async () => {
-    rednoteService.getFeed.mockRejectedValue(new Error('Failed to fetch feed'));
+    rewriteService.getRewrittenFeed.mockRejectedValue(new Error('Rewrite failed'));
+    rednoteService.getFeedPage.mockRejectedValue(new Error('Failed to fetch feed'));
 
     render(<ContentFeed />);
 
@@ -58,7 +58,7 @@ const Login = () => {
       const response = await authService.login(username, password);
       
       // Response from authService.login is already response.data from axios
-      // So response should have: { access_token, token_type, user }
+      // So response should have: { access_token, refresh_token, token_type, user }
       console.log('Login response received:', response);
       
       // Ensure user object exists and has required fields
@@ -73,7 +73,7 @@ const Login = () => {
         throw new Error('Invalid user data: missing role');
       }
       
-      contextLogin(response.access_token, response.user);
+      contextLogin(response.access_token, response.user, response.refresh_token);
 
       // Redirect based on role
       if (response.user.role === 'Admin') {
@@ -111,7 +111,7 @@ const Login = () => {
         throw new Error('Invalid user data: missing role');
       }
       
-      contextLogin(response.access_token, response.user);
+      contextLogin(response.access_token, response.user, response.refresh_token);
       
       // Redirect based on role
       if (response.user.role === 'Admin') {
@@ -1,4 +1,5 @@
 import React, { createContext, useState, useEffect } from 'react';
+import api from '../utils/api';
 
 export const AuthContext = createContext(null);
 
@@ -19,23 +20,39 @@ export const AuthProvider = ({ children }) => {
       } catch (error) {
         console.error('Error parsing stored user data:', error);
         localStorage.removeItem('token');
+        localStorage.removeItem('refreshToken');
         localStorage.removeItem('user');
       }
     }
     setLoading(false);
   }, []);
 
-  const login = (newToken, newUser) => {
+  const login = (newToken, newUser, newRefreshToken) => {
     setToken(newToken);
     setUser(newUser);
     localStorage.setItem('token', newToken);
     localStorage.setItem('user', JSON.stringify(newUser));
+    if (newRefreshToken) {
+      localStorage.setItem('refreshToken', newRefreshToken);
+    }
   };
 
   const logout = () => {
+    // Revoke the tokens server-side; the local session ends either way
+    const storedToken = localStorage.getItem('token');
+    if (storedToken) {
+      api
+        .post(
+          '/api/auth/logout',
+          { refresh_token: localStorage.getItem('refreshToken') },
+          { headers: { Authorization: `Bearer ${storedToken}` } }
+        )
+        .catch(() => {});
+    }
     setToken(null);
     setUser(null);
     localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
     localStorage.removeItem('user');
   };
 
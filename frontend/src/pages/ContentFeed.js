@@ -3,16 +3,41 @@ import { useNavigate } from 'react-router-dom';
 import { AuthContext } from '../contexts/AuthContext';
 import RewrittenPostCard from '../components/Content/RewrittenPostCard';
 import ComparisonView from '../components/Content/ComparisonView';
-import { getFeed } from '../services/rednoteService';
-import { rewriteText } from '../services/rewriteService';
+import { getFeedPage } from '../services/rednoteService';
+import { getRewrittenFeed } from '../services/rewriteService';
 import './ContentFeed.css';
 
+// Pair each post with its rewrite; posts that could not be rewritten show their original text
+const toFeedItems = (posts) =>
+  posts.map(({ rewritten_text, keywords_used, ...post }) => ({
+    post,
+    rewriteData: {
+      original_text: post.text,
+      rewritten_text: rewritten_text || post.text,
+      keywords_used: keywords_used || [],
+    },
+  }));
+
+// Fetch a page of the 小红书 feed, rewritten server-side in one request.
+// If the rewrite fails, fall back to the same page of original posts.
+const fetchFeedPage = async (cursor) => {
+  try {
+    return await getRewrittenFeed({ cursor });
+  } catch (err) {
+    console.error('Failed to rewrite feed page:', err);
+    return getFeedPage({ cursor });
+  }
+};
+
 const ContentFeed = ({ onBackToApps }) => {
   const { logout } = useContext(AuthContext);
   const navigate = useNavigate();
   const [rewrittenPosts, setRewrittenPosts] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [loadMoreError, setLoadMoreError] = useState(null);
   const [comparingPost, setComparingPost] = useState(null);
   const [comparingRewriteData, setComparingRewriteData] = useState(null);
   const [activeTopTab, setActiveTopTab] = useState('发现'); // 关注, 发现, 附近
@@ -26,44 +51,11 @@ const ContentFeed = ({ onBackToApps }) => {
         setLoading(true);
         setError(null);
 
-        // Fetch posts from 小红书 feed
-        const feedData = await getFeed();
+        const page = await fetchFeedPage();
         if (!isMounted) return;
 
-        // Rewrite each post
-        const rewrittenData = await Promise.all(
-          feedData.map(async (post) => {
-            try {
-              const rewriteData = await rewriteText(post.text);
-              if (!isMounted) return null;
-              return {
-                post,
-                rewriteData,
-              };
-            } catch (err) {
-              console.error(`Failed to rewrite post ${post.id}:`, err);
-              if (!isMounted) return null;
-              // Return original post if rewrite fails
-              return {
-                post,
-                rewriteData: {
-                  original_text: post.text,
-                  rewritten_text: post.text,
-                  keywords_used: [],
-                },
-              };
-            }
-          })
-        );
-
-        if (isMounted) {
-          // Filter out null items, but show all posts (even if not modified)
-          const validPosts = rewrittenData.filter(
-            (item) => item && item.rewriteData
-          );
-          
-          setRewrittenPosts(validPosts);
-        }
+        setRewrittenPosts(toFeedItems(page.posts));
+        setNextCursor(page.nextCursor);
       } catch (err) {
         if (isMounted) {
           setError(err.message || '加载动态失败');
@@ -82,6 +74,21 @@ const ContentFeed = ({ onBackToApps }) => {
     };
   }, []);
 
+  const handleLoadMore = async () => {
+    try {
+      setLoadingMore(true);
+      setLoadMoreError(null);
+
+      const page = await fetchFeedPage(nextCursor);
+      setRewrittenPosts((items) => [...items, ...toFeedItems(page.posts)]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      setLoadMoreError(err.message || '加载动态失败');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleCompare = (post, rewriteData) => {
     setComparingPost(post);
     setComparingRewriteData(rewriteData);
@@ -241,6 +248,18 @@ const ContentFeed = ({ onBackToApps }) => {
                 />
               ))
             )}
+            {nextCursor && (
+              <div className="load-more">
+                {loadMoreError && <p className="load-more-error">❌ {loadMoreError}</p>}
+                <button
+                  onClick={handleLoadMore}
+                  className="retry-button"
+                  disabled={loadingMore}
+                >
+                  {loadingMore ? '加载中...' : '加载更多'}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
@@ -15,6 +15,31 @@ export const getFeed = async () => {
   }
 };
 
+/**
+ * Get one page of RedNote posts
+ * @param {Object} [options]
+ * @param {string} [options.cursor] - Cursor from a previous page (nextCursor)
+ * @param {number} [options.limit] - Page size
+ * @returns {Promise<Object>} { posts, nextCursor }: nextCursor is null on the last page
+ */
+export const getFeedPage = async ({ cursor, limit } = {}) => {
+  try {
+    const params = {};
+    if (cursor !== undefined) params.cursor = cursor;
+    if (limit !== undefined) params.limit = limit;
+
+    const response = await api.get('/api/rednote/feed', { params });
+    return {
+      posts: response.data,
+      nextCursor: response.headers?.['x-next-cursor'] || null,
+    };
+  } catch (error) {
+    throw new Error(
+      error.response?.data?.detail || '获取动态失败。请重试。'
+    );
+  }
+};
+
 /**
  * Get a single RedNote post by ID
  * @param {string} postId - Post ID
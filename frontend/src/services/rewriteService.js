@@ -22,3 +22,118 @@ export const rewriteText = async (text, curriculum_id) => {
   }
 };
 
+
+/**
+ * Rewrite many texts (or RedNote posts) in a single request
+ * @param {Object} items - Either { texts: string[] } or { post_ids: string[] }
+ * @param {number} [curriculum_id] - Optional curriculum ID. Uses most recent if not provided
+ * @returns {Promise<Array>} Array of rewrite results, in request order
+ */
+export const rewriteBatch = async (items, curriculum_id) => {
+  try {
+    const requestBody = { ...items };
+    if (curriculum_id !== undefined) {
+      requestBody.curriculum_id = curriculum_id;
+    }
+    
+    const response = await api.post('/api/rewrite/batch', requestBody);
+    return response.data.results;
+  } catch (error) {
+    throw new Error(
+      error.response?.data?.detail || '批量重写文本失败。请重试。'
+    );
+  }
+};
+
+
+/**
+ * Get a page of the RedNote feed with every post already rewritten
+ * @param {Object} [options]
+ * @param {string} [options.cursor] - Cursor from a previous page (nextCursor)
+ * @param {number} [options.limit] - Page size
+ * @param {number} [options.curriculum_id] - Optional curriculum ID. Uses most recent if not provided
+ * @returns {Promise<Object>} { posts, nextCursor }: posts carry rewritten_text and keywords_used;
+ *   nextCursor is null on the last page
+ */
+export const getRewrittenFeed = async ({ cursor, limit, curriculum_id } = {}) => {
+  try {
+    const params = {};
+    if (cursor !== undefined) params.cursor = cursor;
+    if (limit !== undefined) params.limit = limit;
+    if (curriculum_id !== undefined) params.curriculum_id = curriculum_id;
+
+    const response = await api.get('/api/rewrite/feed', { params });
+    return {
+      posts: response.data,
+      nextCursor: response.headers?.['x-next-cursor'] || null,
+    };
+  } catch (error) {
+    throw new Error(
+      error.response?.data?.detail || '获取动态失败。请重试。'
+    );
+  }
+};
+
+
+/**
+ * Stream a rewrite from the server as it is generated (Server-Sent Events)
+ * @param {string} text - Text to be rewritten
+ * @param {Object} [options]
+ * @param {number} [options.curriculum_id] - Optional curriculum ID. Uses most recent if not provided
+ * @param {Function} [options.onToken] - Called with the text so far each time a chunk arrives
+ * @returns {Promise<Object>} RewriteResponse with original_text, rewritten_text, and keywords_used
+ */
+export const rewriteStream = async (text, { curriculum_id, onToken } = {}) => {
+  const requestBody = { text };
+  if (curriculum_id !== undefined) {
+    requestBody.curriculum_id = curriculum_id;
+  }
+
+  const token = localStorage.getItem('token');
+  const response = await fetch(`${api.defaults.baseURL}/api/rewrite/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'text/event-stream',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    body: JSON.stringify(requestBody),
+  });
+
+  if (!response.ok) {
+    const data = await response.json().catch(() => ({}));
+    throw new Error(data.detail || '重写文本失败。请重试。');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let partial = '';
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Messages are separated by a blank line
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const message = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+
+      const event = message.match(/^event: (.*)$/m)?.[1];
+      const data = JSON.parse(message.match(/^data: (.*)$/m)?.[1] || '{}');
+      if (event === 'token') {
+        partial += data.text;
+        if (onToken) onToken(partial);
+      } else if (event === 'done') {
+        return data;
+      } else if (event === 'error') {
+        throw new Error(data.detail || '重写文本失败。请重试。');
+      }
+    }
+  }
+
+  throw new Error('重写文本失败。请重试。');
+};
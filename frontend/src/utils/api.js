@@ -27,10 +27,29 @@ api.interceptors.request.use(
     }
 );
 
+// Renew the session with the stored refresh token (shared by concurrent 401s)
+let refreshPromise = null;
+const refreshSession = () => {
+    if (!refreshPromise) {
+        const refreshToken = localStorage.getItem('refreshToken');
+        refreshPromise = axios
+            .post(`${api.defaults.baseURL}/api/auth/refresh`, { refresh_token: refreshToken })
+            .then(({ data }) => {
+                localStorage.setItem('token', data.access_token);
+                localStorage.setItem('refreshToken', data.refresh_token);
+                return data.access_token;
+            })
+            .finally(() => {
+                refreshPromise = null;
+            });
+    }
+    return refreshPromise;
+};
+
 // Response interceptor for error handling
 api.interceptors.response.use(
     (response) => response,
-    (error) => {
+    async (error) => {
         // Handle network errors (no response from server)
         if (!error.response) {
             if (error.code === 'ECONNABORTED') {
@@ -56,9 +75,25 @@ api.interceptors.response.use(
         const status = error.response.status;
         const data = error.response.data;
 
+        const config = error.config || {};
+        const isAuthRequest = ['/api/auth/login', '/api/auth/register', '/api/auth/refresh', '/api/auth/logout']
+            .includes(config.url);
+        if (status === 401 && !config._retried && !isAuthRequest && localStorage.getItem('refreshToken')) {
+            // Access token expired: renew it once and retry, without asking for the password
+            try {
+                const token = await refreshSession();
+                config._retried = true;
+                config.headers.Authorization = `Bearer ${token}`;
+                return api(config);
+            } catch (refreshError) {
+                // Refresh token expired or revoked, fall through to a new login
+            }
+        }
+
         if (status === 401) {
             // Token expired or invalid, clear storage
             localStorage.removeItem('token');
+            localStorage.removeItem('refreshToken');
             localStorage.removeItem('user');
             // Redirect to login if not already there
             if (window.location.pathname !== '/login') {
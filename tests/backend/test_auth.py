@@ -1,10 +1,28 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from jose import jwt
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from backend.main import app
-from backend.database import get_db, Base
-from backend.models.user import User  # Import model to register it with Base
+from backend.database import get_db, get_async_db, Base, async_database_url
+from backend.models.user import User, UserRole  # Import model to register it with Base
+from backend.utils.dependencies import get_password_hasher
+from backend.utils.metrics import (
+    PASSWORD_HASH_IN_PROGRESS, PASSWORD_HASH_QUEUED, PASSWORD_REHASHES, TOKEN_CACHE_LOOKUPS, TOKEN_VERIFICATIONS
+)
+from backend.utils.security import (
+    DecodedTokenCache, PasswordHasher, bcrypt_cost, create_access_token, decode_access_token,
+    decoded_token_cache, get_password_hash, hash_refresh_token
+)
+from backend.models.token import RefreshToken
+from backend.services.token_revocation import RevocationList, purge_refresh_tokens, revoked_tokens
+from backend.services.user_cache import UserCache, user_cache
 
 
 # Create test database
@@ -26,10 +44,24 @@ def override_get_db():
 app.dependency_overrides[get_db] = override_get_db
 
 
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL))
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app.dependency_overrides[get_async_db] = override_get_async_db
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database for each test"""
     Base.metadata.create_all(bind=engine)
+    user_cache.invalidate()
+    revoked_tokens.clear()
     db = TestingSessionLocal()
     try:
         yield db
@@ -272,3 +304,435 @@ class TestRoleBasedAccess:
         )
         assert response.status_code == 200
         assert response.json()["role"] == "Admin"
+
+
+class TestPasswordHasher:
+    """Test bcrypt runs in the bounded worker pool"""
+
+    def test_hash_and_verify(self):
+        """Test hashes made in the pool verify"""
+        hasher = PasswordHasher(max_workers=2)
+
+        async def scenario():
+            hashed = await hasher.hash("classroom123")
+            return (
+                await hasher.verify("classroom123", hashed),
+                await hasher.verify("wrongpass", hashed),
+            )
+
+        try:
+            assert asyncio.run(scenario()) == (True, False)
+        finally:
+            hasher.shutdown()
+
+    def test_concurrency_is_capped(self):
+        """Test at most max_workers operations run at once and the rest queue"""
+        hasher = PasswordHasher(max_workers=2)
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def slow_operation():
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+            return True
+
+        async def scenario():
+            return await asyncio.gather(*[hasher._run("verify", slow_operation) for _ in range(6)])
+
+        try:
+            assert asyncio.run(scenario()) == [True] * 6
+        finally:
+            hasher.shutdown()
+        assert peak == 2
+        assert PASSWORD_HASH_QUEUED.value == 0
+        assert PASSWORD_HASH_IN_PROGRESS.value == 0
+
+    def test_hashing_does_not_block_event_loop(self):
+        """Test other coroutines keep running while bcrypt hashes"""
+        hasher = PasswordHasher(max_workers=1, rounds=12)  # ~250ms, regardless of BCRYPT_ROUNDS
+
+        async def scenario():
+            ticks = 0
+            done = asyncio.Event()
+
+            async def ticker():
+                nonlocal ticks
+                while not done.is_set():
+                    ticks += 1
+                    await asyncio.sleep(0.001)
+
+            ticker_task = asyncio.create_task(ticker())
+            await hasher.hash("classroom123")
+            done.set()
+            await ticker_task
+            return ticks
+
+        try:
+            assert asyncio.run(scenario()) >= 5
+        finally:
+            hasher.shutdown()
+
+    def test_login_records_queue_metrics(self, client):
+        """Test logins are timed under the verify operation"""
+        client.post("/api/auth/register", json={"username": "student", "password": "studentpass", "role": "Student"})
+        client.post("/api/auth/login", json={"username": "student", "password": "studentpass"})
+
+        body = client.get("/metrics").text
+        assert 'password_hash_duration_seconds_count{operation="hash"}' in body
+        assert 'password_hash_queue_wait_seconds_count{operation="verify"}' in body
+
+
+class TestPasswordCostUpgrade:
+    """Test bcrypt cost policy and rehash on login"""
+
+    @pytest.fixture
+    def hasher(self):
+        """App hasher with a cost policy of 5"""
+        hasher = PasswordHasher(max_workers=2, rounds=5)
+        app.dependency_overrides[get_password_hasher] = lambda: hasher
+        yield hasher
+        del app.dependency_overrides[get_password_hasher]
+        hasher.shutdown()
+
+    def create_user(self, db_session, rounds):
+        user = User(
+            username="legacy",
+            password_hash=get_password_hash("legacypass", rounds=rounds),
+            role=UserRole.STUDENT
+        )
+        db_session.add(user)
+        db_session.commit()
+        return user
+
+    def stored_hash(self, db_session):
+        db_session.expire_all()
+        return db_session.query(User).filter(User.username == "legacy").first().password_hash
+
+    def test_hash_stores_cost(self):
+        """Test the cost is configurable and recorded in the hash"""
+        assert bcrypt_cost(get_password_hash("secret", rounds=4)) == 4
+        assert bcrypt_cost("not-a-bcrypt-hash") is None
+
+    def test_login_rehashes_outdated_cost(self, client, db_session, hasher):
+        """Test a successful login upgrades a hash made with another cost"""
+        self.create_user(db_session, rounds=4)
+        rehashes = PASSWORD_REHASHES.value
+
+        response = client.post("/api/auth/login", json={"username": "legacy", "password": "legacypass"})
+
+        assert response.status_code == 200
+        assert bcrypt_cost(self.stored_hash(db_session)) == 5
+        assert PASSWORD_REHASHES.value == rehashes + 1
+        # The upgraded hash still verifies
+        response = client.post("/api/auth/login", json={"username": "legacy", "password": "legacypass"})
+        assert response.status_code == 200
+        assert PASSWORD_REHASHES.value == rehashes + 1
+
+    def test_login_keeps_hash_at_current_cost(self, client, db_session, hasher):
+        """Test hashes already at the policy cost are left alone"""
+        original = self.create_user(db_session, rounds=5).password_hash
+
+        response = client.post("/api/auth/login", json={"username": "legacy", "password": "legacypass"})
+
+        assert response.status_code == 200
+        assert self.stored_hash(db_session) == original
+
+    def test_failed_login_does_not_rehash(self, client, db_session, hasher):
+        """Test a wrong password never touches the stored hash"""
+        original = self.create_user(db_session, rounds=4).password_hash
+
+        response = client.post("/api/auth/login", json={"username": "legacy", "password": "wrongpass"})
+
+        assert response.status_code == 401
+        assert self.stored_hash(db_session) == original
+
+
+class TestUserCache:
+    """Test authenticated requests are served from the user cache"""
+
+    def login(self, client, username="cached", role="Student"):
+        client.post("/api/auth/register", json={"username": username, "password": "cachedpass", "role": role})
+        response = client.post("/api/auth/login", json={"username": username, "password": "cachedpass"})
+        return response.json()
+
+    def test_token_has_user_id_and_role_claims(self, client):
+        """Test login tokens carry uid and role"""
+        data = self.login(client, role="Admin")
+        payload = decode_access_token(data["access_token"])
+
+        assert payload["sub"] == "cached"
+        assert payload["uid"] == data["user"]["id"]
+        assert payload["role"] == "Admin"
+
+    def test_steady_state_requests_skip_user_query(self, client):
+        """Test users are only read on the first authenticated request"""
+        headers = {"Authorization": f"Bearer {self.login(client)['access_token']}"}
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            client.get("/api/auth/me", headers=headers)
+            first = [s for s in statements if "FROM users" in s]
+            statements.clear()
+            response = client.get("/api/auth/me", headers=headers)
+            second = [s for s in statements if "FROM users" in s]
+            user_cache.invalidate("cached")
+            client.get("/api/auth/me", headers=headers)
+            after_invalidate = [s for s in statements if "FROM users" in s]
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+        assert response.status_code == 200
+        assert response.json()["username"] == "cached"
+        assert len(first) == 1
+        assert second == []
+        assert len(after_invalidate) == 1
+
+    def test_token_for_other_account_rejected(self, client):
+        """Test a token whose uid does not match the username's account is rejected"""
+        user_id = self.login(client)["user"]["id"]
+        token = create_access_token(data={"sub": "cached", "uid": user_id + 100, "role": "Student"})
+
+        response = client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 401
+
+    def test_tokens_without_claims_still_work(self, client):
+        """Test tokens issued before uid/role claims existed are accepted"""
+        self.login(client)
+        token = create_access_token(data={"sub": "cached"})
+
+        response = client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 200
+        assert response.json()["username"] == "cached"
+
+    def test_admin_check_uses_role_claim(self, client):
+        """Test a non-Admin role claim is refused on admin routes even for an admin account"""
+        user_id = self.login(client, role="Admin")["user"]["id"]
+        token = create_access_token(data={"sub": "cached", "uid": user_id, "role": "Student"})
+
+        with patch("backend.utils.dependencies.user_cache.aget") as lookup:
+            response = client.get("/api/preferences", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 403
+        assert not lookup.called
+
+    def test_demotion_applies_to_admin_tokens(self, client, db_session):
+        """Test an Admin role claim is confirmed against the user, so demotions apply at once"""
+        headers = {"Authorization": f"Bearer {self.login(client, role='Admin')['access_token']}"}
+        assert client.get("/api/preferences", headers=headers).status_code != 403
+
+        db_session.query(User).filter(User.username == "cached").update({"role": UserRole.STUDENT})
+        db_session.commit()
+        user_cache.invalidate("cached")
+
+        assert client.get("/api/preferences", headers=headers).status_code == 403
+
+    def test_entries_expire_after_ttl(self, client):
+        """Test entries are reloaded after ttl_seconds"""
+        self.login(client)
+        now = [0.0]
+        cache = UserCache(ttl_seconds=10, clock=lambda: now[0])
+
+        async def lookup():
+            async with TestingAsyncSessionLocal() as session:
+                return await cache.aget(session, "cached")
+
+        first = asyncio.run(lookup())
+        assert asyncio.run(lookup()) is first
+        now[0] = 11.0
+        assert asyncio.run(lookup()) is not first
+
+
+class TestDecodedTokenCache:
+    """Test verified token payloads are cached until the token expires"""
+
+    def setup_method(self):
+        decoded_token_cache.clear()
+
+    def test_signature_checked_once_per_token(self):
+        """Test repeated decodes of a token skip jwt.decode"""
+        token = create_access_token(data={"sub": "cached"})
+        hits = TOKEN_CACHE_LOOKUPS.labels(result="hit").value
+
+        with patch("backend.utils.security.jwt.decode", wraps=jwt.decode) as decode:
+            payloads = [decode_access_token(token) for _ in range(3)]
+
+        assert decode.call_count == 1
+        assert all(payload["sub"] == "cached" for payload in payloads)
+        assert TOKEN_CACHE_LOOKUPS.labels(result="hit").value == hits + 2
+
+    def test_callers_get_their_own_copy(self):
+        """Test mutating a returned payload does not change the cached one"""
+        token = create_access_token(data={"sub": "cached"})
+        decode_access_token(token)["sub"] = "mallory"
+
+        assert decode_access_token(token)["sub"] == "cached"
+
+    def test_invalid_tokens_not_cached(self):
+        """Test tampered tokens are rejected every time"""
+        token = create_access_token(data={"sub": "cached"})[:-2] + "xx"
+        invalid = TOKEN_VERIFICATIONS.labels(outcome="invalid").value
+
+        assert decode_access_token(token) is None
+        assert decode_access_token(token) is None
+        assert TOKEN_VERIFICATIONS.labels(outcome="invalid").value == invalid + 2
+
+    def test_entries_expire_with_token(self):
+        """Test a cached payload is dropped once its exp has passed"""
+        now = [100.0]
+        cache = DecodedTokenCache(clock=lambda: now[0])
+        cache.set("token", {"sub": "cached", "exp": 160})
+
+        assert cache.get("token") == {"sub": "cached", "exp": 160}
+        now[0] = 160.0
+        assert cache.get("token") is None
+
+    def test_tokens_without_exp_not_cached(self):
+        """Test payloads without an exp claim are always re-verified"""
+        cache = DecodedTokenCache()
+        cache.set("token", {"sub": "cached"})
+
+        assert cache.get("token") is None
+
+    def test_least_recently_used_evicted(self):
+        """Test the cache is bounded by max_size"""
+        cache = DecodedTokenCache(max_size=2, clock=lambda: 0.0)
+        cache.set("a", {"sub": "a", "exp": 60})
+        cache.set("b", {"sub": "b", "exp": 60})
+        cache.get("a")
+        cache.set("c", {"sub": "c", "exp": 60})
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+
+class TestRefreshTokens:
+    """Test renewing sessions with refresh tokens and revoking tokens on logout"""
+
+    def login(self, client, username="refresher"):
+        client.post("/api/auth/register", json={"username": username, "password": "refreshpass", "role": "Student"})
+        response = client.post("/api/auth/login", json={"username": username, "password": "refreshpass"})
+        return response.json()
+
+    def test_refresh_issues_new_tokens_without_bcrypt(self, client):
+        """Test a refresh token renews the session without checking a password"""
+        data = self.login(client)
+
+        with patch("backend.utils.security.bcrypt.checkpw", side_effect=AssertionError("bcrypt used")):
+            response = client.post("/api/auth/refresh", json={"refresh_token": data["refresh_token"]})
+
+        assert response.status_code == 200
+        renewed = response.json()
+        assert renewed["refresh_token"] != data["refresh_token"]
+        assert renewed["user"] == data["user"]
+        me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {renewed['access_token']}"})
+        assert me.status_code == 200
+        assert me.json()["username"] == "refresher"
+
+    def test_refresh_token_stored_hashed(self, client, db_session):
+        """Test only the SHA-256 of a refresh token is stored"""
+        token = self.login(client)["refresh_token"]
+
+        stored = db_session.query(RefreshToken).one()
+        assert stored.token_hash == hash_refresh_token(token)
+        assert stored.token_hash != token
+
+    def test_refresh_token_single_use(self, client):
+        """Test a refresh token cannot be redeemed twice"""
+        token = self.login(client)["refresh_token"]
+
+        first = client.post("/api/auth/refresh", json={"refresh_token": token})
+        second = client.post("/api/auth/refresh", json={"refresh_token": token})
+
+        assert first.status_code == 200
+        assert second.status_code == 401
+
+    def test_unknown_and_expired_refresh_tokens_rejected(self, client, db_session):
+        """Test refresh fails for unknown or expired tokens"""
+        token = self.login(client)["refresh_token"]
+        db_session.query(RefreshToken).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+        db_session.commit()
+
+        assert client.post("/api/auth/refresh", json={"refresh_token": "not-a-token"}).status_code == 401
+        assert client.post("/api/auth/refresh", json={"refresh_token": token}).status_code == 401
+
+    def test_logout_revokes_access_and_refresh_tokens(self, client):
+        """Test logout rejects the access token and refresh token from then on"""
+        data = self.login(client)
+        headers = {"Authorization": f"Bearer {data['access_token']}"}
+
+        response = client.post("/api/auth/logout", json={"refresh_token": data["refresh_token"]}, headers=headers)
+
+        assert response.status_code == 200
+        assert client.get("/api/auth/me", headers=headers).status_code == 401
+        assert client.post("/api/auth/refresh", json={"refresh_token": data["refresh_token"]}).status_code == 401
+
+    def test_logout_leaves_other_sessions(self, client):
+        """Test logging out one session does not revoke another session's token"""
+        first = self.login(client)
+        second = client.post("/api/auth/login", json={"username": "refresher", "password": "refreshpass"}).json()
+
+        client.post("/api/auth/logout", headers={"Authorization": f"Bearer {first['access_token']}"})
+
+        me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {second['access_token']}"})
+        assert me.status_code == 200
+
+    def test_revocations_loaded_from_database(self, client, db_session):
+        """Test a fresh revocation list sees revocations persisted by logout"""
+        data = self.login(client)
+        client.post("/api/auth/logout", headers={"Authorization": f"Bearer {data['access_token']}"})
+        jti = decode_access_token(data["access_token"])["jti"]
+
+        revocations = RevocationList()
+        assert revocations.load(db_session) == 1
+        assert revocations.is_revoked(jti)
+
+    def test_revocation_seen_by_other_process(self, db_session):
+        """Test a revocation persisted through one list reaches another list on the same database"""
+        now = [time.time()]
+        first = RevocationList(clock=lambda: now[0], session_factory=TestingSessionLocal, sync_seconds=5)
+        second = RevocationList(clock=lambda: now[0], session_factory=TestingSessionLocal, sync_seconds=5)
+        assert not second.is_revoked("shared")
+
+        async def revoke():
+            async with TestingAsyncSessionLocal() as db:
+                await first.arevoke(db, "shared", expires_at=now[0] + 600)
+
+        asyncio.run(revoke())
+        assert first.is_revoked("shared")
+        # Not re-read until the sync interval has passed
+        assert not second.is_revoked("shared")
+
+        now[0] += 6
+        assert second.is_revoked("shared")
+
+    def test_expired_revocations_dropped(self):
+        """Test revocations are forgotten once the token has expired"""
+        now = [100.0]
+        revocations = RevocationList(clock=lambda: now[0])
+        revocations.add("a", expires_at=150.0)
+        revocations.add("b", expires_at=50.0)
+
+        assert revocations.is_revoked("a")
+        assert not revocations.is_revoked("b")
+        assert not revocations.is_revoked(None)
+
+    def test_purge_removes_used_refresh_tokens(self, client, db_session):
+        """Test redeemed refresh tokens are deleted by the startup purge"""
+        token = self.login(client)["refresh_token"]
+        client.post("/api/auth/refresh", json={"refresh_token": token})
+
+        assert purge_refresh_tokens(db_session) == 1
+        assert db_session.query(RefreshToken).count() == 1
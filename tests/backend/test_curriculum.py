@@ -3,11 +3,14 @@ import os
 import tempfile
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from backend.main import app
-from backend.database import get_db, Base
+from backend.database import get_db, get_async_db, Base, async_database_url
 from backend.models.user import User
 from backend.models.curriculum import Curriculum
+from backend.services.curriculum_parser import KeywordParser, parse_markdown_keyword_entries
+from backend.services.user_cache import user_cache
 
 # Workaround for bcrypt/passlib initialization issue
 # Set environment variable to suppress bcrypt warnings
@@ -31,10 +34,23 @@ def override_get_db():
 app.dependency_overrides[get_db] = override_get_db
 
 
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL))
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app.dependency_overrides[get_async_db] = override_get_async_db
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database for each test"""
     Base.metadata.create_all(bind=engine)
+    user_cache.invalidate()
     db = TestingSessionLocal()
     try:
         yield db
@@ -380,3 +396,113 @@ class TestMarkdownParsing:
         finally:
             os.unlink(temp_path)
 
+
+    def test_streaming_parser_matches_whole_document(self):
+        """Test feeding a document in chunks of any size gives the same keywords in the same order"""
+        markdown = """# Science
+Intro with **Photosynthesis** in bold.
+## Grade 3-5
+- **Plants**: roots, stems, leaves
+- Reading and writing
+### 生物
+- 观察力, 实验室
+## Energy
+* __Kinetic energy__ and heat
+- Energy moves between objects
+"""
+        expected = parse_markdown_keyword_entries(markdown)
+
+        for chunk_size in (1, 2, 7, 64):
+            parser = KeywordParser()
+            for start in range(0, len(markdown), chunk_size):
+                parser.feed(markdown[start:start + chunk_size])
+            assert parser.close() == expected
+
+        assert [keyword for keyword, _ in expected] == [
+            "Science", "Energy", "Photosynthesis", "Plants", "Kinetic energy",
+            "roots", "stems", "leaves", "观察力", "实验室", "moves", "between", "objects",
+        ]
+        assert ("Plants", "Grade 3-5") in expected
+
+    def test_upload_parsed_in_chunks(self, client, admin_user, monkeypatch):
+        """Test multi-byte characters split across upload chunks are decoded correctly"""
+        monkeypatch.setattr("backend.routers.curriculum.UPLOAD_CHUNK_SIZE", 5)
+        markdown = "# 数学\n- 分数, 几何图形\n- **乘法口诀**\n"
+
+        response = client.post(
+            "/api/curriculum/upload",
+            headers={"Authorization": f"Bearer {admin_user}"},
+            files={"file": ("test.md", markdown.encode("utf-8"), "text/markdown")}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["keywords"] == ["乘法口诀", "几何图形"]
+        with open("backend/uploads/curriculum/test.md", encoding="utf-8") as f:
+            assert f.read() == markdown
+
+    def test_upload_non_utf8_rejected(self, client, admin_user):
+        """Test a file that is not UTF-8 is rejected without replacing the saved file"""
+        with open("backend/uploads/curriculum/test.md", "rb") as f:
+            saved = f.read()
+
+        response = client.post(
+            "/api/curriculum/upload",
+            headers={"Authorization": f"Bearer {admin_user}"},
+            files={"file": ("test.md", "# 数学\n".encode("gbk"), "text/markdown")}
+        )
+
+        assert response.status_code == 400
+        with open("backend/uploads/curriculum/test.md", "rb") as f:
+            assert f.read() == saved
+        assert not os.path.exists("backend/uploads/curriculum/test.md.part")
+
+
+class TestKeywordIndex:
+    """Test the keyword index stored with each curriculum"""
+    
+    def test_upload_stores_keyword_index(self, client, admin_user, sample_markdown, db_session):
+        """Test upload precomputes the keyword index with heading categories"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
+            f.write(sample_markdown)
+            temp_path = f.name
+        
+        try:
+            with open(temp_path, 'rb') as f:
+                response = client.post(
+                    "/api/curriculum/upload",
+                    headers={"Authorization": f"Bearer {admin_user}"},
+                    files={"file": ("test.md", f, "text/markdown")}
+                )
+            
+            assert response.status_code == 200
+            curriculum = db_session.query(Curriculum).filter(Curriculum.id == response.json()["id"]).first()
+            index = curriculum.keyword_index
+            entries = {entry["keyword"]: entry for entry in index["entries"]}
+            
+            assert [entry["keyword"] for entry in index["entries"]] == curriculum.keywords
+            assert entries["circle"]["category"] == "Geometry"
+            assert entries["circle"]["normalized"] == "circle"
+            assert entries["circle"]["language"] == "en"
+            assert "matcher" in index
+        finally:
+            os.unlink(temp_path)
+    
+    def test_migrate_db_adds_keyword_index_column(self, tmp_path):
+        """Test databases created before the keyword index get the new column"""
+        from sqlalchemy import inspect, text
+        from backend.database import migrate_db
+        
+        old_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with old_engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE curricula (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+                "filename VARCHAR NOT NULL, file_path VARCHAR NOT NULL, keywords JSON NOT NULL, "
+                "created_at DATETIME)"
+            ))
+        
+        migrate_db(bind=old_engine)
+        migrate_db(bind=old_engine)  # Idempotent
+        
+        columns = {column["name"] for column in inspect(old_engine).get_columns("curricula")}
+        assert "keyword_index" in columns
+        old_engine.dispose()
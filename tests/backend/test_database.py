@@ -0,0 +1,355 @@
+import asyncio
+import pytest
+import os
+import threading
+import time
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from backend.main import app
+from backend.database import (
+    get_db, get_async_db, Base, async_database_url, create_async_db_engine, create_db_engine, migrate_db, run_db
+)
+from backend.models.user import User
+from backend.models.curriculum import Curriculum
+from backend.services.active_config import active_config, load_active_preferences, load_curriculum
+from backend.services.rewrite_store import delete_rewrites_for_curriculum, load_rewrites
+from backend.services.user_cache import user_cache
+
+# Workaround for bcrypt/passlib initialization issue
+os.environ.setdefault('PASSLIB_SUPPRESS_WARNINGS', '1')
+
+
+# Create test database
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_database.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+app.dependency_overrides[get_db] = override_get_db
+
+
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL))
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app.dependency_overrides[get_async_db] = override_get_async_db
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    """Create a fresh database for each test"""
+    Base.metadata.create_all(bind=engine)
+    active_config.invalidate()
+    user_cache.invalidate()
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    """Create a test client"""
+    return TestClient(app)
+
+
+@pytest.fixture
+def admin_user(client):
+    """Create an admin user and return token"""
+    client.post(
+        "/api/auth/register",
+        json={
+            "username": "admin",
+            "password": "adminpass123",
+            "role": "Admin"
+        }
+    )
+    login_response = client.post(
+        "/api/auth/login",
+        json={
+            "username": "admin",
+            "password": "adminpass123"
+        }
+    )
+    return login_response.json()["access_token"]
+
+
+def capture_statements(target_engines, fn):
+    """Run fn and return the (statement, parameters) pairs it executed on any of the engines"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    for target_engine in target_engines:
+        event.listen(target_engine, "before_cursor_execute", record)
+    try:
+        fn()
+    finally:
+        for target_engine in target_engines:
+            event.remove(target_engine, "before_cursor_execute", record)
+    return statements
+
+
+def query_plan(connection, statement, parameters):
+    """EXPLAIN QUERY PLAN detail lines for a statement"""
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+class TestQueryPlans:
+    """Test hot queries on curricula, preferences and rewrites use indexes"""
+
+    def test_hot_queries_use_indexes(self, client, admin_user, db_session):
+        """Test every curriculum/preferences/rewrites query issued by the routers avoids full scans"""
+        headers = {"Authorization": f"Bearer {admin_user}"}
+
+        def exercise_routes():
+            upload = client.post(
+                "/api/curriculum/upload",
+                headers=headers,
+                files={"file": ("plan.md", b"# Mathematics\n- algebra, geometry", "text/markdown")}
+            )
+            curriculum_id = upload.json()["id"]
+            client.get("/api/curriculum", headers=headers)
+            client.get(f"/api/curriculum/{curriculum_id}", headers=headers)
+            client.post(
+                "/api/preferences",
+                headers=headers,
+                json={"focus_areas": [], "keywords": ["learning"], "subject_preferences": []}
+            )
+            preferences_id = client.get("/api/preferences", headers=headers).json()["id"]
+            client.put(
+                f"/api/preferences/{preferences_id}",
+                headers=headers,
+                json={"focus_areas": [], "keywords": ["reading"], "subject_preferences": []}
+            )
+            client.post("/api/rewrite", headers=headers, json={"text": "Plan text"})
+            load_curriculum(db_session)
+            load_active_preferences(db_session)
+            load_rewrites(db_session, ["abc"], curriculum_id, "v1")
+            user = db_session.query(User).filter(User.username == "admin").first()
+            db_session.query(Curriculum).filter(
+                Curriculum.user_id == user.id,
+                Curriculum.filename == "plan.md"
+            ).first()
+            db_session.query(Curriculum).filter(Curriculum.user_id == user.id).count()
+            delete_rewrites_for_curriculum(db_session, curriculum_id)
+            db_session.rollback()
+            client.delete(f"/api/curriculum/{curriculum_id}", headers=headers)
+
+        # Routers use the async engine, scripts and services the sync one
+        statements = capture_statements([engine, async_engine.sync_engine], exercise_routes)
+        hot = [
+            (statement, parameters) for statement, parameters in statements
+            if statement.lstrip().upper().startswith(("SELECT", "DELETE", "UPDATE"))
+            and any(table in statement for table in ("curricula", "preferences", "rewrites"))
+        ]
+
+        assert len(hot) >= 10
+        with engine.connect() as connection:
+            for statement, parameters in hot:
+                plan = query_plan(connection, statement, parameters)
+                for detail in plan:
+                    full_scan = detail.startswith("SCAN") and "USING" not in detail
+                    assert not full_scan, f"{statement!r} does a full scan: {plan}"
+                    assert "TEMP B-TREE" not in detail, f"{statement!r} sorts without an index: {plan}"
+
+
+class TestMigration:
+    """Test migrate_db brings existing databases up to date"""
+
+    def test_migrate_db_creates_missing_indexes(self, tmp_path):
+        """Test indexes added after a table was created are created on existing databases"""
+        old_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        Base.metadata.create_all(bind=old_engine)
+        with old_engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_curricula_created_at"))
+            connection.execute(text("DROP INDEX ix_preferences_recency"))
+
+        migrate_db(bind=old_engine)
+        migrate_db(bind=old_engine)  # Idempotent
+
+        inspector = inspect(old_engine)
+        curricula_indexes = {index["name"] for index in inspector.get_indexes("curricula")}
+        with old_engine.connect() as connection:
+            preferences_indexes = {
+                row[1] for row in connection.execute(text("PRAGMA index_list('preferences')"))
+            }
+        assert {"ix_curricula_created_at", "ix_curricula_user_id_filename"} <= curricula_indexes
+        assert "ix_preferences_recency" in preferences_indexes
+        old_engine.dispose()
+
+
+class TestEngineProfile:
+    """Test the SQLite engine profile (WAL, pragmas, pool)"""
+
+    def test_tuned_profile_applies_pragmas(self, tmp_path):
+        """Test connect-time pragmas are applied to every pooled connection"""
+        tuned = create_db_engine(f"sqlite:///{tmp_path / 'tuned.db'}", profile="tuned")
+        with tuned.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        tuned.dispose()
+
+        plain = create_db_engine(f"sqlite:///{tmp_path / 'plain.db'}", profile="default")
+        with plain.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+        plain.dispose()
+
+    def test_readers_not_blocked_by_writer(self, tmp_path):
+        """Test reads succeed immediately while another connection holds the write lock"""
+        tuned = create_db_engine(f"sqlite:///{tmp_path / 'wal.db'}", profile="tuned")
+        with tuned.begin() as connection:
+            connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+            connection.execute(text("INSERT INTO items (name) VALUES ('first')"))
+
+        writer = tuned.raw_connection()
+        cursor = writer.cursor()
+        cursor.execute("BEGIN EXCLUSIVE")
+        cursor.execute("INSERT INTO items (name) VALUES ('uncommitted')")
+
+        results = []
+
+        def read():
+            start = time.perf_counter()
+            with tuned.connect() as connection:
+                count = connection.execute(text("SELECT count(*) FROM items")).scalar()
+            results.append((count, time.perf_counter() - start))
+
+        try:
+            readers = [threading.Thread(target=read) for _ in range(4)]
+            for reader in readers:
+                reader.start()
+            for reader in readers:
+                reader.join()
+        finally:
+            writer.rollback()
+            writer.close()
+            tuned.dispose()
+
+        assert len(results) == 4
+        # Readers see the last committed state without waiting for the writer
+        assert all(count == 1 for count, _ in results)
+        assert all(elapsed < 1.0 for _, elapsed in results)
+
+    def test_concurrent_writers_wait_instead_of_failing(self, tmp_path):
+        """Test concurrent sessions writing at once all succeed thanks to busy_timeout"""
+        tuned = create_db_engine(f"sqlite:///{tmp_path / 'writers.db'}", profile="tuned")
+        with tuned.begin() as connection:
+            connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        Session = sessionmaker(bind=tuned)
+        errors = []
+
+        def write(worker):
+            session = Session()
+            try:
+                for i in range(25):
+                    session.execute(text("INSERT INTO items (name) VALUES (:name)"), {"name": f"{worker}-{i}"})
+                    session.commit()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                session.close()
+
+        writers = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+        for thread in writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+
+        with tuned.connect() as connection:
+            count = connection.execute(text("SELECT count(*) FROM items")).scalar()
+        tuned.dispose()
+
+        assert errors == []
+        assert count == 200
+
+
+class TestAsyncSession:
+    """Test the async engine/session used by the routers"""
+
+    def test_async_database_url(self):
+        """Test sync SQLite URLs are mapped to the aiosqlite driver"""
+        assert async_database_url("sqlite:///./database.db") == "sqlite+aiosqlite:///./database.db"
+        assert async_database_url("sqlite+aiosqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+
+    def test_async_engine_applies_profile(self, tmp_path):
+        """Test the async engine uses the same connect-time pragmas"""
+        async_db_engine = create_async_db_engine(f"sqlite:///{tmp_path / 'async.db'}", profile="tuned")
+
+        async def pragmas():
+            async with async_db_engine.connect() as connection:
+                journal_mode = (await connection.execute(text("PRAGMA journal_mode"))).scalar()
+                busy_timeout = (await connection.execute(text("PRAGMA busy_timeout"))).scalar()
+            await async_db_engine.dispose()
+            return journal_mode, busy_timeout
+
+        assert asyncio.run(pragmas()) == ("wal", 5000)
+
+    def test_run_db_accepts_sync_and_async_sessions(self, db_session):
+        """Test run_db calls sync ORM code with either kind of session"""
+        def count_users(session, username):
+            return session.query(User).filter(User.username == username).count()
+
+        async def run_async():
+            async with TestingAsyncSessionLocal() as session:
+                return await run_db(session, count_users, "nobody")
+
+        assert asyncio.run(run_db(db_session, count_users, "nobody")) == 0
+        assert asyncio.run(run_async()) == 0
+
+    def test_queries_do_not_block_event_loop(self, tmp_path):
+        """Test the event loop keeps running other tasks while a slow query executes"""
+        async_db_engine = create_async_db_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+        Session = async_sessionmaker(async_db_engine, expire_on_commit=False)
+        slow_query = text(
+            "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 2000000) "
+            "SELECT count(*) FROM n"
+        )
+
+        async def scenario():
+            ticks = 0
+            done = asyncio.Event()
+
+            async def ticker():
+                nonlocal ticks
+                while not done.is_set():
+                    ticks += 1
+                    await asyncio.sleep(0.001)
+
+            ticker_task = asyncio.create_task(ticker())
+            async with Session() as session:
+                start = time.perf_counter()
+                count = (await session.execute(slow_query)).scalar()
+                elapsed = time.perf_counter() - start
+            done.set()
+            await ticker_task
+            await async_db_engine.dispose()
+            return count, ticks, elapsed
+
+        count, ticks, elapsed = asyncio.run(scenario())
+
+        assert count == 2000000
+        # The ticker kept running while the query was executing (a blocking driver allows one tick)
+        assert elapsed > 0.05
+        assert ticks >= 5
@@ -0,0 +1,126 @@
+import pytest
+from unittest.mock import MagicMock
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from backend.main import app
+from backend.utils.metrics import (
+    DB_QUERIES,
+    MOCK_REWRITES,
+    REWRITE_LOOKUPS,
+    MetricsRegistry,
+)
+
+client = TestClient(app)
+
+
+class TestMetricsRegistry:
+    """Test Prometheus text rendering"""
+    
+    def test_counter_with_labels(self):
+        """Test labelled counters render one sample per label set"""
+        registry = MetricsRegistry()
+        counter = registry.counter("jobs_total", "Jobs processed", ["kind"])
+        counter.labels(kind="a").inc()
+        counter.labels(kind="a").inc(2)
+        counter.labels(kind='b"c').inc()
+        
+        lines = registry.render().splitlines()
+        
+        assert lines[0] == "# HELP jobs_total Jobs processed"
+        assert lines[1] == "# TYPE jobs_total counter"
+        assert 'jobs_total{kind="a"} 3.0' in lines
+        assert 'jobs_total{kind="b\\"c"} 1.0' in lines
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets, sum and count"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+        
+        lines = registry.render().splitlines()
+        
+        assert 'latency_seconds_bucket{le="0.1"} 1.0' in lines
+        assert 'latency_seconds_bucket{le="1.0"} 2.0' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 3.0' in lines
+        assert "latency_seconds_sum 5.55" in lines
+        assert "latency_seconds_count 3.0" in lines
+
+
+class TestMetricsEndpoint:
+    """Test request metrics middleware and /metrics endpoint"""
+    
+    def test_metrics_records_route_template_and_status(self):
+        """Test requests are labelled by route template and status code"""
+        client.get("/api/rednote/posts/post_001")
+        client.get("/api/rednote/posts/does_not_exist")
+        
+        response = client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'http_requests_total{method="GET",route="/api/rednote/posts/{post_id}",status="200"}' in body
+        assert 'http_requests_total{method="GET",route="/api/rednote/posts/{post_id}",status="404"}' in body
+        assert 'http_request_duration_seconds_count{method="GET",route="/api/rednote/posts/{post_id}"}' in body
+        assert "http_requests_in_flight" in body
+    
+    def test_unmatched_routes_share_one_label(self):
+        """Test unknown paths do not create a label per path"""
+        client.get("/no/such/path/123")
+        
+        body = client.get("/metrics").text
+        
+        assert 'route="unmatched",status="404"' in body
+        assert "/no/such/path/123" not in body
+    
+    def test_db_queries_are_counted(self):
+        """Test SQL statements on any engine are counted and timed"""
+        engine = create_engine("sqlite://")
+        before = DB_QUERIES.value
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        
+        assert DB_QUERIES.value == before + 1
+        assert "db_query_duration_seconds_count" in client.get("/metrics").text
+    
+    def test_failed_statement_does_not_leak_start_time(self):
+        """Test a statement that raises leaves no start time behind for the next one"""
+        from sqlalchemy.exc import OperationalError
+        
+        engine = create_engine("sqlite://")
+        with engine.connect() as connection:
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM missing_table"))
+            assert connection.info["query_start_times"] == []
+            
+            before = DB_QUERIES.value
+            connection.execute(text("SELECT 1"))
+        
+        assert DB_QUERIES.value == before + 1
+    
+    def test_rewrite_lookups_and_mock_rewrites_are_counted(self):
+        """Test cache hits/misses and mock rewrites are counted"""
+        from backend.services.rewrite_cache import RewriteCache
+        from backend.services.rewriter import RewriterService
+        
+        llm_service = MagicMock()
+        llm_service.rewrite_text.return_value = ("Rewritten", ["algebra"])
+        rewriter = RewriterService(llm_service=llm_service, cache=RewriteCache(max_size=10))
+        misses = REWRITE_LOOKUPS.labels(source="miss").value
+        hits = REWRITE_LOOKUPS.labels(source="cache").value
+        mocks = MOCK_REWRITES.labels(reason="disabled").value
+        
+        rewriter.rewrite("Metrics text", ["algebra"], [])
+        rewriter.rewrite("Metrics text", ["algebra"], [])
+        
+        assert REWRITE_LOOKUPS.labels(source="miss").value == misses + 1
+        assert REWRITE_LOOKUPS.labels(source="cache").value == hits + 1
+        
+        # Mock rewrites (LLM disabled) are not cached, so each one is a miss
+        mock_rewriter = RewriterService(cache=RewriteCache(max_size=10))
+        mock_rewriter.rewrite("Metrics text", ["algebra"], [])
+        mock_rewriter.rewrite("Metrics text", ["algebra"], [])
+        
+        assert REWRITE_LOOKUPS.labels(source="miss").value == misses + 3
+        assert MOCK_REWRITES.labels(reason="disabled").value == mocks + 2
@@ -1,8 +1,15 @@
+import asyncio
+import httpx
 import pytest
 from datetime import datetime
 from fastapi.testclient import TestClient
 from backend.main import app
-from backend.services.platform_adapter import PlatformAdapter
+from backend.routers.rednote import get_adapter
+from backend.services.platform_adapter import AsyncPlatformAdapter, PlatformAdapter, SyncAdapterWrapper
+from backend.services.fake_platform_server import create_fake_platform_app
+from backend.services.http_platform import HTTPPlatformAdapter
+from backend.services.platform_http import PlatformHTTPClient
+from backend.services.platform_registry import PLATFORM_ADAPTERS, create_platform_adapter, register_platform_adapter
 from backend.services.mock_rednote import MockRedNoteAdapter
 from backend.schemas.post import Post
 
@@ -185,3 +192,341 @@ class TestRedNoteEndpoints:
         assert response.status_code == 404
         assert "not found" in response.json()["detail"].lower()
 
+
+
+class TestFeedPagination:
+    """Tests for cursor-based feed pages"""
+    
+    @pytest.fixture(scope="class")
+    def large_adapter(self):
+        """Synthetic feed of 100,000 posts"""
+        return MockRedNoteAdapter(feed_size=100_000)
+    
+    def test_adapter_has_get_feed_page_method(self):
+        """Test that get_feed_page is part of the PlatformAdapter contract"""
+        assert getattr(PlatformAdapter.get_feed_page, '__isabstractmethod__', False)
+    
+    def test_pages_cover_feed_in_order(self):
+        """Test following next_cursor returns every post once, in feed order"""
+        adapter = MockRedNoteAdapter()
+        ids = []
+        cursor = None
+        while True:
+            page = adapter.get_feed_page(cursor, limit=4)
+            assert len(page.posts) <= 4
+            ids.extend(post.id for post in page.posts)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        
+        assert ids == [post.id for post in adapter.get_feed()]
+    
+    def test_cursor_works_across_adapter_instances(self):
+        """Test a cursor from one adapter pages another of the same size (another worker or a restart)"""
+        first_page = MockRedNoteAdapter(feed_size=50).get_feed_page(limit=10)
+        other = MockRedNoteAdapter(feed_size=50)
+        
+        second_page = other.get_feed_page(first_page.next_cursor, limit=10)
+        
+        assert [post.id for post in second_page.posts] == [post.id for post in other.get_feed()[10:20]]
+        assert second_page.next_cursor == other.get_feed_page(limit=20).next_cursor
+    
+    def test_invalid_cursor_rejected(self):
+        """Test cursors not made by the adapter raise ValueError"""
+        adapter = MockRedNoteAdapter()
+        for cursor in ["not a cursor", "bm8tc2VwYXJhdG9y", "YWJjOnBvc3RfMDAx"]:
+            with pytest.raises(ValueError):
+                adapter.get_feed_page(cursor)
+    
+    def test_synthetic_feed_is_deterministic(self):
+        """Test synthetic posts are the same for every adapter of the same size"""
+        first = MockRedNoteAdapter(feed_size=500).get_feed()
+        second = MockRedNoteAdapter(feed_size=500).get_feed()
+        
+        assert len(first) == 500
+        assert [(p.id, p.text, p.likes, p.timestamp) for p in first] == [
+            (p.id, p.text, p.likes, p.timestamp) for p in second
+        ]
+        assert len({post.id for post in first}) == 500
+        assert all(a.timestamp > b.timestamp for a, b in zip(first, first[1:]))
+    
+    def test_scroll_through_100k_posts(self, large_adapter):
+        """Test scrolling a 100,000 post feed page by page"""
+        seen = 0
+        last_id = None
+        cursor = None
+        while True:
+            page = large_adapter.get_feed_page(cursor, limit=100)
+            assert len(page.posts) == 100
+            seen += len(page.posts)
+            last_id = page.posts[-1].id
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        
+        assert seen == 100_000
+        assert last_id == "post_100000"
+    
+    def test_get_post_in_large_feed(self, large_adapter):
+        """Test posts anywhere in a large feed are found by ID"""
+        assert large_adapter.get_post("post_001").id == "post_001"
+        assert "#100000" in large_adapter.get_post("post_100000").text
+        with pytest.raises(ValueError):
+            large_adapter.get_post("post_100001")
+    
+    def test_added_posts_keep_cursors_valid(self):
+        """Test ingested posts lead the feed without shifting existing cursors"""
+        adapter = MockRedNoteAdapter()
+        first = adapter.get_feed_page(limit=3)
+        new_post = Post(
+            id="post_new",
+            author="NewAuthor",
+            text="Just published!",
+            image_url="https://example.com/new.jpg",
+            likes=0,
+            timestamp=datetime.now()
+        )
+        adapter.add_post(new_post)
+        
+        assert adapter.get_feed_page(limit=1).posts[0].id == "post_new"
+        assert adapter.get_post("post_new") == new_post
+        assert [post.id for post in adapter.get_feed_page(first.next_cursor, limit=3).posts] == [
+            "post_004", "post_005", "post_006"
+        ]
+        with pytest.raises(ValueError):
+            adapter.add_post(new_post)
+    
+    def test_feed_endpoint_pages(self, large_adapter):
+        """Test /feed returns limit posts and the next cursor in X-Next-Cursor"""
+        app.dependency_overrides[get_adapter] = lambda: SyncAdapterWrapper(large_adapter)
+        try:
+            first = client.get("/api/rednote/feed", params={"limit": 50})
+            second = client.get(
+                "/api/rednote/feed", params={"limit": 50, "cursor": first.headers["X-Next-Cursor"]}
+            )
+        finally:
+            app.dependency_overrides.pop(get_adapter, None)
+        
+        assert first.status_code == 200
+        assert [post["id"] for post in first.json()] == [f"post_{n:03d}" for n in range(1, 51)]
+        assert second.json()[0]["id"] == "post_051"
+    
+    def test_feed_endpoint_last_page_has_no_cursor(self):
+        """Test the last page carries no X-Next-Cursor header"""
+        response = client.get("/api/rednote/feed")
+        
+        assert response.status_code == 200
+        assert "X-Next-Cursor" not in response.headers
+    
+    def test_feed_endpoint_rejects_bad_paging(self):
+        """Test invalid cursors and page sizes are client errors"""
+        assert client.get("/api/rednote/feed", params={"cursor": "bogus"}).status_code == 400
+        assert client.get("/api/rednote/feed", params={"limit": 0}).status_code == 422
+        assert client.get("/api/rednote/feed", params={"limit": 1000}).status_code == 422
+
+
+class TestAsyncPlatformAdapter:
+    """Tests for the async adapter contract and the sync adapter wrapper"""
+    
+    def test_async_contract_methods_are_abstract(self):
+        """Test get_feed, get_feed_page, get_post and get_posts_bulk are part of the contract"""
+        with pytest.raises(TypeError):
+            AsyncPlatformAdapter()
+        for name in ["get_feed", "get_feed_page", "get_post", "get_posts_bulk"]:
+            assert getattr(getattr(AsyncPlatformAdapter, name), '__isabstractmethod__', False)
+    
+    @pytest.mark.parametrize("blocking", [False, True])
+    def test_wrapper_matches_sync_adapter(self, blocking):
+        """Test the wrapper returns what the wrapped adapter returns"""
+        mock = MockRedNoteAdapter()
+        adapter = SyncAdapterWrapper(mock, blocking=blocking)
+        
+        async def scenario():
+            return (
+                await adapter.get_feed(),
+                await adapter.get_feed_page(limit=2),
+                await adapter.get_post("post_003"),
+                await adapter.get_posts_bulk(["post_002", "post_001", "post_002"]),
+            )
+        
+        feed, page, post, bulk = asyncio.run(scenario())
+        assert feed == mock.get_feed()
+        assert page == mock.get_feed_page(limit=2)
+        assert post == mock.get_post("post_003")
+        assert [p.id for p in bulk] == ["post_002", "post_001", "post_002"]
+    
+    def test_wrapper_bulk_rejects_unknown_ids(self):
+        """Test get_posts_bulk raises ValueError naming the missing post"""
+        adapter = SyncAdapterWrapper(MockRedNoteAdapter())
+        with pytest.raises(ValueError, match="post_999"):
+            asyncio.run(adapter.get_posts_bulk(["post_001", "post_999"]))
+
+
+class TestHTTPPlatformAdapter:
+    """Tests for the HTTP adapter against the local fake platform server"""
+    
+    @staticmethod
+    def make_adapter(fake_app, **client_kwargs):
+        client_kwargs.setdefault("retry_backoff", 0)
+        client = PlatformHTTPClient(transport=httpx.ASGITransport(app=fake_app), **client_kwargs)
+        return HTTPPlatformAdapter(base_url="http://fake-platform", client=client)
+    
+    def test_feed_and_posts_match_served_adapter(self):
+        """Test pages, the whole feed and single posts round-trip through the API"""
+        mock = MockRedNoteAdapter(feed_size=250)
+        adapter = self.make_adapter(create_fake_platform_app(mock))
+        
+        async def scenario():
+            first = await adapter.get_feed_page(limit=4)
+            second = await adapter.get_feed_page(first.next_cursor, limit=4)
+            return first, second, await adapter.get_feed(), await adapter.get_post("post_200")
+        
+        first, second, feed, post = asyncio.run(scenario())
+        assert [p.id for p in first.posts] == ["post_001", "post_002", "post_003", "post_004"]
+        assert second.posts[0].id == "post_005"
+        assert feed == mock.get_feed()
+        assert post == mock.get_post("post_200")
+    
+    def test_bulk_fetch_in_chunks(self):
+        """Test get_posts_bulk keeps request order and splits large requests"""
+        fake_app = create_fake_platform_app(MockRedNoteAdapter(feed_size=250))
+        adapter = self.make_adapter(fake_app)
+        post_ids = [f"post_{n:03d}" for n in range(250, 0, -1)] + ["post_001"]
+        
+        posts = asyncio.run(adapter.get_posts_bulk(post_ids))
+        
+        assert [post.id for post in posts] == post_ids
+        assert fake_app.state.requests == 3
+    
+    def test_not_found_and_bad_cursor_raise_value_error(self):
+        """Test API 404/400 responses follow the adapter contract (ValueError)"""
+        adapter = self.make_adapter(create_fake_platform_app())
+        with pytest.raises(ValueError, match="post_999"):
+            asyncio.run(adapter.get_post("post_999"))
+        with pytest.raises(ValueError, match="post_999"):
+            asyncio.run(adapter.get_posts_bulk(["post_001", "post_999"]))
+        with pytest.raises(ValueError):
+            asyncio.run(adapter.get_feed_page("bogus"))
+    
+    def test_post_id_is_quoted_in_path(self):
+        """Test a post ID cannot change the requested path or query"""
+        paths = []
+        
+        def handler(request):
+            paths.append(request.url.raw_path)
+            return httpx.Response(404, json={"detail": "Post not found"})
+        
+        client = PlatformHTTPClient(transport=httpx.MockTransport(handler), retry_backoff=0)
+        adapter = HTTPPlatformAdapter(base_url="http://fake-platform", client=client)
+        with pytest.raises(ValueError):
+            asyncio.run(adapter.get_post("../feed?limit=1 #"))
+        
+        assert paths == [b"/posts/..%2Ffeed%3Flimit%3D1%20%23"]
+    
+    def test_transient_errors_are_retried(self):
+        """Test 503 responses are retried until the API answers"""
+        fake_app = create_fake_platform_app(fail_first=2)
+        adapter = self.make_adapter(fake_app, max_retries=2)
+        
+        post = asyncio.run(adapter.get_post("post_001"))
+        
+        assert post.id == "post_001"
+        assert fake_app.state.requests == 3
+    
+    def test_gives_up_after_max_retries(self):
+        """Test the error surfaces once retries are exhausted"""
+        fake_app = create_fake_platform_app(fail_first=10)
+        adapter = self.make_adapter(fake_app, max_retries=1)
+        
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(adapter.get_post("post_001"))
+        assert fake_app.state.requests == 2
+    
+    def test_slow_platform_times_out(self):
+        """Test requests slower than the timeout fail instead of hanging"""
+        adapter = self.make_adapter(
+            create_fake_platform_app(latency_seconds=1.0), timeout=0.05, max_retries=0
+        )
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(adapter.get_post("post_001"))
+    
+    def test_connection_pool_is_bounded(self):
+        """Test no more than max_connections requests are in flight"""
+        fake_app = create_fake_platform_app(latency_seconds=0.02)
+        adapter = self.make_adapter(fake_app, max_connections=2)
+        
+        async def scenario():
+            return await asyncio.gather(*[adapter.get_post(f"post_00{n}") for n in range(1, 7)])
+        
+        assert len(asyncio.run(scenario())) == 6
+        assert fake_app.state.max_in_flight <= 2
+    
+    def test_client_from_previous_loop_is_closed(self):
+        """Test using the client from a new event loop closes the pool built for the old one"""
+        adapter = self.make_adapter(create_fake_platform_app())
+        
+        asyncio.run(adapter.get_post("post_001"))
+        old_client = adapter.client._client
+        asyncio.run(adapter.get_post("post_002"))
+        
+        assert old_client.is_closed
+        assert not adapter.client._client.is_closed
+    
+    def test_feed_endpoint_through_http_adapter(self):
+        """Test /api/rednote routes serve posts fetched over HTTP"""
+        adapter = self.make_adapter(create_fake_platform_app())
+        app.dependency_overrides[get_adapter] = lambda: adapter
+        try:
+            feed = client.get("/api/rednote/feed", params={"limit": 2})
+            missing = client.get("/api/rednote/posts/post_999")
+        finally:
+            app.dependency_overrides.pop(get_adapter, None)
+        
+        assert [post["id"] for post in feed.json()] == ["post_001", "post_002"]
+        assert "X-Next-Cursor" in feed.headers
+        assert missing.status_code == 404
+
+    def test_feed_endpoint_maps_platform_errors(self):
+        """Test platform API failures are 502 and timeouts 503 rather than 500"""
+        failing = self.make_adapter(create_fake_platform_app(fail_first=10), max_retries=0)
+        slow = self.make_adapter(create_fake_platform_app(latency_seconds=1.0), timeout=0.05, max_retries=0)
+        statuses = []
+        try:
+            for adapter in (failing, slow):
+                app.dependency_overrides[get_adapter] = lambda: adapter
+                statuses.append((
+                    client.get("/api/rednote/feed").status_code,
+                    client.get("/api/rednote/posts/post_001").status_code,
+                ))
+        finally:
+            app.dependency_overrides.pop(get_adapter, None)
+        
+        assert statuses == [(502, 502), (503, 503)]
+
+
+class TestPlatformRegistry:
+    """Tests for selecting the platform adapter by name"""
+    
+    def test_default_adapter_is_mock(self):
+        """Test the mock RedNote feed is served unless configured otherwise"""
+        adapter = create_platform_adapter()
+        assert isinstance(adapter, SyncAdapterWrapper)
+        assert isinstance(adapter.adapter, MockRedNoteAdapter)
+    
+    def test_http_adapter_by_name(self):
+        """Test PLATFORM_ADAPTER=http selects the HTTP adapter"""
+        assert isinstance(create_platform_adapter("http"), HTTPPlatformAdapter)
+    
+    def test_register_adapter(self):
+        """Test new platforms can be registered and selected"""
+        register_platform_adapter("test_platform", lambda: SyncAdapterWrapper(MockRedNoteAdapter(feed_size=10)))
+        try:
+            adapter = create_platform_adapter("test_platform")
+            assert len(asyncio.run(adapter.get_feed())) == 10
+        finally:
+            PLATFORM_ADAPTERS.pop("test_platform", None)
+    
+    def test_unknown_adapter_rejected(self):
+        """Test an unknown adapter name is a configuration error"""
+        with pytest.raises(ValueError, match="Unknown platform adapter"):
+            create_platform_adapter("weibo")
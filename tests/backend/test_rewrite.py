@@ -1,14 +1,28 @@
+import asyncio
 import pytest
 import os
-from unittest.mock import Mock, patch, MagicMock
+from datetime import datetime
+from unittest.mock import patch, MagicMock
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from backend.main import app
-from backend.database import get_db, Base
+from backend.database import get_db, get_async_db, Base, async_database_url
 from backend.models.user import User
 from backend.models.curriculum import Curriculum
 from backend.models.preferences import Preferences
+from backend.models.rewrite import Rewrite
+from backend.services.rewrite_cache import RewriteCache, rewrite_cache
+from backend.services.active_config import active_config
+from backend.services.user_cache import user_cache
+from backend.services.pre_rewrite import PreRewriteWorker
+from backend.services.mock_rednote import MockRedNoteAdapter
+from backend.services.platform_adapter import SyncAdapterWrapper
+from backend.services.rewriter import RewriterService
+from backend.routers.rednote import get_adapter
+from backend.schemas.post import Post
+from backend.utils.metrics import PRE_REWRITE_BACKPRESSURE, PRE_REWRITE_POSTS
 
 # Workaround for bcrypt/passlib initialization issue
 os.environ.setdefault('PASSLIB_SUPPRESS_WARNINGS', '1')
@@ -31,10 +45,25 @@ def override_get_db():
 app.dependency_overrides[get_db] = override_get_db
 
 
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL))
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app.dependency_overrides[get_async_db] = override_get_async_db
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database for each test"""
     Base.metadata.create_all(bind=engine)
+    rewrite_cache.clear()
+    active_config.invalidate()
+    user_cache.invalidate()
     db = TestingSessionLocal()
     try:
         yield db
@@ -46,9 +75,30 @@ def db_session():
 @pytest.fixture(scope="function")
 def client(db_session):
     """Create a test client"""
+    # Rebuild the app-scoped rewriter so LLMService patches apply per test
+    app.state.rewriter = None
     return TestClient(app)
 
 
+@pytest.fixture(scope="function")
+def fake_llm():
+    """Enable the LLM, served by the local fake LLM server (only LLM output is cached and stored)"""
+    import httpx
+    from backend.services.fake_llm_server import create_fake_llm_app
+    from backend.services.llm_client import AsyncLLMClient
+
+    fake_app = create_fake_llm_app()
+    async_client = AsyncLLMClient(
+        api_key="test-key",
+        base_url="http://fake-llm/v1",
+        max_retries=0,
+        transport=httpx.ASGITransport(app=fake_app)
+    )
+    with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key', 'LLM_FORCE_MOCK': 'false'}), \
+            patch('backend.services.llm_service.get_async_llm_client', return_value=async_client):
+        yield fake_app
+
+
 @pytest.fixture
 def admin_user(client):
     """Create an admin user and return token"""
@@ -361,3 +411,859 @@ class TestRewriteEndpoint:
         # Should return 404 if no curriculum available
         assert response.status_code == 404
 
+
+
+class TestBatchRewriteEndpoint:
+    """Test batch rewrite endpoint"""
+    
+    def test_batch_rewrite_texts_in_order(self, client, admin_user, sample_curriculum, sample_preferences):
+        """Test batch rewrite returns one result per text, in request order"""
+        texts = [
+            "This is a simple text.",
+            "What a great trip to the museum!",
+            "今天和妈妈去公园，走错路了。",
+        ]
+        response = client.post(
+            "/api/rewrite/batch",
+            headers={"Authorization": f"Bearer {admin_user}"},
+            json={"texts": texts, "curriculum_id": sample_curriculum.id}
+        )
+        
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["original_text"] for r in results] == texts
+        for result in results:
+            assert result["post_id"] is None
+            assert isinstance(result["rewritten_text"], str)
+            assert isinstance(result["keywords_used"], list)
+    
+    def test_batch_rewrite_matches_single_rewrite(self, client, admin_user, sample_curriculum):
+        """Test batch results are identical to single rewrite results"""
+        text = "What a great trip to the museum!"
+        single = client.post(
+            "/api/rewrite",
+            headers={"Authorization": f"Bearer {admin_user}"},
+            json={"text": text}
+        ).json()
+        batch = client.post(
+            "/api/rewrite/batch",
+            headers={"Authorization": f"Bearer {admin_user}"},
+            json={"texts": [text]}
+        ).json()
+        
+        assert batch["results"][0]["rewritten_text"] == single["rewritten_text"]
+        assert batch["results"][0]["keywords_used"] == single["keywords_used"]
+    
+    def test_batch_rewrite_post_ids(self, client, admin_user, sample_curriculum):
+        """Test batch rewrite resolves RedNote post IDs"""
+        response = client.post(
+            "/api/rewrite/batch",
+            headers={"Authorization": f"Bearer {admin_user}"},
+            json={"post_ids": ["post_003", "post_001"]}
+        )
+        
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["post_id"] for r in results] == ["post_003", "post_001"]
+        assert "柳暗花明又一村" in results[0]["original_text"]
+    
+    def test_batch_rewrite_unknown_post_id(self, client, admin_user, sample_curriculum):
+        """Test batch rewrite returns 404 for unknown post IDs"""
+        response = client.post(
+            "/api/rewrite/batch",
+            headers={"Authorization": f"Bearer {admin_user}"},
+            json={"post_ids": ["post_001", "missing_post"]}
+        )
+        
+        assert response.status_code == 404
+    
+    def test_batch_rewrite_requires_texts_or_post_ids(self, client, admin_user, sample_curriculum):
+        """Test batch rewrite rejects requests with both or neither input list"""
+        headers = {"Authorization": f"Bearer {admin_user}"}
+        assert client.post("/api/rewrite/batch", headers=headers, json={}).status_code == 422
+        assert client.post(
+            "/api/rewrite/batch",
+            headers=headers,
+            json={"texts": ["a"], "post_ids": ["post_001"]}
+        ).status_code == 422
+    
+    def test_batch_rewrite_requires_authentication(self, client):
+        """Test batch rewrite endpoint requires authentication"""
+        response = client.post("/api/rewrite/batch", json={"texts": ["Simple text"]})
+        
+        assert response.status_code == 401
+
+
+class TestFeedRewriteEndpoint:
+    """Test the feed-with-rewrites endpoint"""
+    
+    def test_feed_posts_include_rewrites(self, client, admin_user, sample_curriculum):
+        """Test every feed post comes back with the same rewrite as a batch rewrite"""
+        headers = {"Authorization": f"Bearer {admin_user}"}
+        response = client.get("/api/rewrite/feed", headers=headers)
+        
+        assert response.status_code == 200
+        posts = response.json()
+        feed = client.get("/api/rednote/feed").json()
+        assert [post["id"] for post in posts] == [post["id"] for post in feed]
+        assert [post["text"] for post in posts] == [post["text"] for post in feed]
+        
+        batch = client.post(
+            "/api/rewrite/batch", headers=headers, json={"post_ids": [post["id"] for post in feed]}
+        ).json()["results"]
+        assert [post["rewritten_text"] for post in posts] == [r["rewritten_text"] for r in batch]
+        assert [post["keywords_used"] for post in posts] == [r["keywords_used"] for r in batch]
+    
+    def test_feed_served_from_cache(self, client, admin_user, sample_curriculum, fake_llm):
+        """Test a repeated feed request does not call the LLM again"""
+        headers = {"Authorization": f"Bearer {admin_user}"}
+        first = client.get("/api/rewrite/feed", headers=headers).json()
+        
+        with patch.object(app.state.rewriter.llm_service, "arewrite_text", side_effect=AssertionError("LLM called")):
+            second = client.get("/api/rewrite/feed", headers=headers)
+        
+        assert second.status_code == 200
+        assert second.json() == first
+    
+    def test_feed_pages(self, client, admin_user, sample_curriculum):
+        """Test the rewritten feed is paged like /api/rednote/feed"""
+        headers = {"Authorization": f"Bearer {admin_user}"}
+        first = client.get("/api/rewrite/feed", headers=headers, params={"limit": 4})
+        second = client.get(
+            "/api/rewrite/feed", headers=headers,
+            params={"limit": 4, "cursor": first.headers["X-Next-Cursor"]}
+        )
+        
+        assert [post["id"] for post in first.json()] == ["post_001", "post_002", "post_003", "post_004"]
+        assert [post["id"] for post in second.json()] == ["post_005", "post_006"]
+        assert "X-Next-Cursor" not in second.headers
+        assert client.get(
+            "/api/rewrite/feed", headers=headers, params={"cursor": "bogus"}
+        ).status_code == 400
+    
+    def test_platform_errors_map_to_gateway_errors(self, client, admin_user, sample_curriculum):
+        """Test a failing platform API gives 502 and a slow one 503, for the feed and batch endpoints"""
+        import httpx
+        from backend.services.fake_platform_server import create_fake_platform_app
+        from backend.services.http_platform import HTTPPlatformAdapter
+        from backend.services.platform_http import PlatformHTTPClient
+        
+        def http_adapter(fake_app, **client_kwargs):
+            client = PlatformHTTPClient(
+                transport=httpx.ASGITransport(app=fake_app), max_retries=0, **client_kwargs
+            )
+            return HTTPPlatformAdapter(base_url="http://fake-platform", client=client)
+        
+        headers = {"Authorization": f"Bearer {admin_user}"}
+        failing = http_adapter(create_fake_platform_app(fail_first=10))
+        slow = http_adapter(create_fake_platform_app(latency_seconds=1.0), timeout=0.05)
+        statuses = []
+        try:
+            for adapter in (failing, slow):
+                app.dependency_overrides[get_adapter] = lambda: adapter
+                statuses.append((
+                    client.get("/api/rewrite/feed", headers=headers).status_code,
+                    client.post("/api/rewrite/batch", headers=headers, json={"post_ids": ["post_001"]}).status_code,
+                ))
+        finally:
+            app.dependency_overrides.pop(get_adapter, None)
+        
+        assert statuses == [(502, 502), (503, 503)]
+    
+    def test_feed_without_curriculum(self, client, admin_user):
+        """Test the rewritten feed needs a curriculum"""
+        response = client.get("/api/rewrite/feed", headers={"Authorization": f"Bearer {admin_user}"})
+        
+        assert response.status_code == 404
+    
+    def test_feed_requires_authentication(self, client):
+        """Test the rewritten feed requires authentication"""
+        assert client.get("/api/rewrite/feed").status_code == 401
+
+
+class TestPreRewriteWorker:
+    """Test the background worker pre-rewriting new feed posts"""
+    
+    @staticmethod
+    def new_post(post_id):
+        return Post(
+            id=post_id,
+            author="NewAuthor",
+            text=f"Fresh post {post_id} about numbers",
+            image_url="https://example.com/new.jpg",
+            likes=0,
+            timestamp=datetime.now()
+        )
+    
+    @staticmethod
+    def make_worker(adapter, rewriter=None, **kwargs):
+        return PreRewriteWorker(
+            SyncAdapterWrapper(adapter), rewriter or RewriterService(),
+            session_factory=TestingAsyncSessionLocal, **kwargs
+        )
+    
+    def test_scan_queues_only_new_posts(self):
+        """Test each scan queues the posts added since the previous one"""
+        adapter = MockRedNoteAdapter(feed_size=50)
+        worker = self.make_worker(adapter, scan_limit=30)
+        
+        async def scenario():
+            counts = [await worker.scan(), await worker.scan()]
+            adapter.add_post(self.new_post("post_new"))
+            counts.append(await worker.scan())
+            return counts, worker.queue_depth
+        
+        # The first scan is bounded by scan_limit, not the whole feed
+        assert asyncio.run(scenario()) == ([30, 0, 1], 31)
+    
+    def test_drain_fills_rewrite_cache(self, client, admin_user, sample_curriculum, fake_llm):
+        """Test pre-rewritten posts are served by the feed endpoint without the LLM"""
+        adapter = MockRedNoteAdapter()
+        rewriter = RewriterService()
+        app.state.rewriter = rewriter
+        wrapped = SyncAdapterWrapper(adapter)
+        app.dependency_overrides[get_adapter] = lambda: wrapped
+        try:
+            adapter.add_post(self.new_post("post_new"))
+            worker = self.make_worker(adapter, rewriter, batch_size=4)
+            
+            async def scenario():
+                await worker.scan()
+                return await worker.drain()
+            
+            assert asyncio.run(scenario()) == 7
+            with patch.object(rewriter.llm_service, "arewrite_text", side_effect=AssertionError("LLM called")):
+                response = client.get("/api/rewrite/feed", headers={"Authorization": f"Bearer {admin_user}"})
+        finally:
+            app.dependency_overrides.pop(get_adapter, None)
+        
+        assert response.status_code == 200
+        assert response.json()[0]["id"] == "post_new"
+        assert worker.queue_depth == 0
+    
+    def test_posts_skipped_without_curriculum(self, db_session):
+        """Test queued posts are dropped when there is no curriculum to rewrite for"""
+        worker = self.make_worker(MockRedNoteAdapter())
+        skipped = PRE_REWRITE_POSTS.labels(outcome="skipped").value
+        
+        async def scenario():
+            await worker.scan()
+            return await worker.drain()
+        
+        assert asyncio.run(scenario()) == 6
+        assert PRE_REWRITE_POSTS.labels(outcome="skipped").value == skipped + 6
+    
+    def test_failed_batch_does_not_stop_worker(self, db_session, sample_curriculum):
+        """Test a failing rewrite is counted and the next batch still runs"""
+        from backend.services.rewriter import BatchRewrite
+        
+        rewriter = RewriterService()
+        worker = self.make_worker(MockRedNoteAdapter(), rewriter, batch_size=3)
+        failed = PRE_REWRITE_POSTS.labels(outcome="failed").value
+        rewritten = PRE_REWRITE_POSTS.labels(outcome="rewritten").value
+        
+        async def scenario():
+            await worker.scan()
+            done = [BatchRewrite("Rewritten", [], persisted=True)] * 3
+            with patch.object(rewriter, "rewrite_batch_detailed", side_effect=[RuntimeError("LLM down"), done]):
+                return await worker.drain()
+        
+        assert asyncio.run(scenario()) == 6
+        assert PRE_REWRITE_POSTS.labels(outcome="failed").value == failed + 3
+        assert PRE_REWRITE_POSTS.labels(outcome="rewritten").value == rewritten + 3
+    
+    def test_fallback_rewrites_are_counted_and_not_stored(self, db_session, sample_curriculum):
+        """Test mock rewrites are labelled as fallbacks and leave nothing in the store"""
+        worker = self.make_worker(MockRedNoteAdapter())
+        fallback = PRE_REWRITE_POSTS.labels(outcome="fallback").value
+        rewritten = PRE_REWRITE_POSTS.labels(outcome="rewritten").value
+        
+        async def scenario():
+            await worker.scan()
+            return await worker.drain()
+        
+        assert asyncio.run(scenario()) == 6
+        assert PRE_REWRITE_POSTS.labels(outcome="fallback").value == fallback + 6
+        assert PRE_REWRITE_POSTS.labels(outcome="rewritten").value == rewritten
+        assert db_session.query(Rewrite).count() == 0
+    
+    def test_bounded_queue_applies_backpressure(self, db_session, sample_curriculum, fake_llm):
+        """Test the watcher waits for the consumer when the queue is full"""
+        worker = self.make_worker(MockRedNoteAdapter(), queue_size=2, batch_size=1, poll_seconds=60)
+        waits = PRE_REWRITE_BACKPRESSURE.value
+        rewritten = PRE_REWRITE_POSTS.labels(outcome="rewritten").value
+        
+        async def scenario():
+            worker.start()
+            try:
+                for _ in range(500):
+                    if PRE_REWRITE_POSTS.labels(outcome="rewritten").value >= rewritten + 6:
+                        break
+                    assert worker.queue_depth <= 2
+                    await asyncio.sleep(0.01)
+            finally:
+                await worker.stop()
+        
+        asyncio.run(scenario())
+        assert PRE_REWRITE_POSTS.labels(outcome="rewritten").value == rewritten + 6
+        assert PRE_REWRITE_BACKPRESSURE.value > waits
+
+
+class TestRewriteCache:
+    """Test rewrite result cache"""
+    
+    def test_key_ignores_duplicates_but_not_order_or_whitespace(self):
+        """Test cache key depends on what the rewrite depends on: keyword order and the exact text"""
+        key = RewriteCache.make_key("Hello world", ["algebra", "geometry"])
+        
+        assert RewriteCache.make_key("Hello world", ["algebra", "geometry", "algebra"]) == key
+        assert RewriteCache.make_key("Hello world", ["geometry", "algebra"]) != key
+        assert RewriteCache.make_key(" Hello world ", ["algebra", "geometry"]) != key
+        assert RewriteCache.make_key("Hello world", ["algebra"]) != key
+    
+    def test_hit_and_miss_counters(self):
+        """Test cache counts hits and misses"""
+        cache = RewriteCache(max_size=10)
+        assert cache.get("missing") is None
+        cache.set("key", ("rewritten", ["algebra"]))
+        assert cache.get("key") == ("rewritten", ["algebra"])
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+    
+    def test_lru_eviction(self):
+        """Test least recently used entry is evicted when full"""
+        cache = RewriteCache(max_size=2)
+        cache.set("a", ("A", []))
+        cache.set("b", ("B", []))
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", ("C", []))
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == ("A", [])
+        assert cache.get("c") == ("C", [])
+        assert cache.stats()["evictions"] == 1
+    
+    def test_ttl_expiry(self):
+        """Test entries expire after the TTL"""
+        now = [1000.0]
+        cache = RewriteCache(max_size=10, ttl_seconds=60, clock=lambda: now[0])
+        cache.set("key", ("rewritten", []))
+        
+        now[0] += 59
+        assert cache.get("key") is not None
+        now[0] += 2
+        assert cache.get("key") is None
+        assert cache.stats()["size"] == 0
+    
+    @patch('backend.services.rewriter.LLMService')
+    def test_rewriter_serves_repeated_rewrites_from_cache(self, mock_llm_service_class):
+        """Test rewriter only calls the LLM once for the same text and keywords"""
+        from backend.services.rewriter import RewriterService
+        
+        mock_llm_service = MagicMock()
+        mock_llm_service.rewrite_text.return_value = ("Rewritten text", ["algebra"])
+        mock_llm_service_class.return_value = mock_llm_service
+        
+        rewriter = RewriterService(cache=RewriteCache(max_size=10))
+        first = rewriter.rewrite("Simple text", ["algebra"], ["learning"])
+        # Same merged keywords (preferences repeating a curriculum keyword)
+        second = rewriter.rewrite("Simple text", ["algebra"], ["learning", "algebra"])
+        
+        assert first == second == ("Rewritten text", ["algebra"])
+        assert mock_llm_service.rewrite_text.call_count == 1
+    
+    def test_preferences_update_invalidates_cache(self, client, admin_user, sample_curriculum, fake_llm):
+        """Test cached rewrites are dropped when preferences change"""
+        headers = {"Authorization": f"Bearer {admin_user}"}
+        client.post("/api/rewrite", headers=headers, json={"text": "Simple text"})
+        assert rewrite_cache.stats()["size"] == 1
+        
+        client.post(
+            "/api/preferences",
+            headers=headers,
+            json={"focus_areas": [], "keywords": ["learning"], "subject_preferences": []}
+        )
+        
+        assert rewrite_cache.stats()["size"] == 0
+    
+    def test_curriculum_delete_invalidates_cache(self, client, admin_user, sample_curriculum, fake_llm):
+        """Test cached rewrites are dropped when a curriculum is deleted"""
+        headers = {"Authorization": f"Bearer {admin_user}"}
+        client.post("/api/rewrite", headers=headers, json={"text": "Simple text"})
+        assert rewrite_cache.stats()["size"] == 1
+        
+        client.delete(f"/api/curriculum/{sample_curriculum.id}", headers=headers)
+        
+        assert rewrite_cache.stats()["size"] == 0
+
+
+class TestRewriteStore:
+    """Test persistent rewrite store"""
+    
+    def test_rewrite_is_persisted(self, client, db_session, admin_user, sample_curriculum, fake_llm):
+        """Test rewrites are written to the rewrites table"""
+        response = client.post(
+            "/api/rewrite",
+            headers={"Authorization": f"Bearer {admin_user}"},
+            json={"text": "Simple text"}
+        )
+        
+        rows = db_session.query(Rewrite).all()
+        assert len(rows) == 1
+        assert rows[0].curriculum_id == sample_curriculum.id
+        assert rows[0].rewritten_text == response.json()["rewritten_text"]
+        assert rows[0].keywords_used == response.json()["keywords_used"]
+    
+    def test_store_survives_cache_loss(self, client, admin_user, sample_curriculum, fake_llm):
+        """Test stored rewrites are served without calling the LLM after a restart"""
+        headers = {"Authorization": f"Bearer {admin_user}"}
+        first = client.post("/api/rewrite", headers=headers, json={"text": "Simple text"}).json()
+        rewrite_cache.clear()  # Simulate a process restart
+        
+        with patch(
+            'backend.services.llm_service.LLMService.arewrite_text',
+            side_effect=AssertionError("LLM should not be called")
+        ):
+            second = client.post("/api/rewrite", headers=headers, json={"text": "Simple text"}).json()
+            batch = client.post("/api/rewrite/batch", headers=headers, json={"texts": ["Simple text"]}).json()
+        
+        assert second == first
+        assert batch["results"][0]["rewritten_text"] == first["rewritten_text"]
+    
+    def test_store_keyed_by_preferences_version(self, client, db_session, admin_user, sample_curriculum, fake_llm):
+        """Test changing preference keywords produces a new stored rewrite"""
+        headers = {"Authorization": f"Bearer {admin_user}"}
+        client.post("/api/rewrite", headers=headers, json={"text": "Simple text"})
+        client.post(
+            "/api/preferences",
+            headers=headers,
+            json={"focus_areas": [], "keywords": ["learning"], "subject_preferences": []}
+        )
+        client.post("/api/rewrite", headers=headers, json={"text": "Simple text"})
+        
+        versions = {row.preferences_version for row in db_session.query(Rewrite).all()}
+        assert len(versions) == 2
+    
+    def test_curriculum_delete_removes_stored_rewrites(self, client, db_session, admin_user, sample_curriculum):
+        """Test stored rewrites are deleted with their curriculum"""
+        headers = {"Authorization": f"Bearer {admin_user}"}
+        client.post("/api/rewrite", headers=headers, json={"text": "Simple text"})
+        client.delete(f"/api/curriculum/{sample_curriculum.id}", headers=headers)
+        
+        assert db_session.query(Rewrite).count() == 0
+    
+    def test_fallback_rewrite_is_not_stored(self, client, db_session, admin_user, sample_curriculum, fake_llm):
+        """Test a mock rewrite served during an LLM outage is neither cached nor stored"""
+        headers = {"Authorization": f"Bearer {admin_user}"}
+        fake_llm.state.fail_first = 1
+        
+        fallback = client.post("/api/rewrite", headers=headers, json={"text": "Simple text"})
+        assert fallback.status_code == 200
+        assert db_session.query(Rewrite).count() == 0
+        assert rewrite_cache.stats()["size"] == 0
+        
+        recovered = client.post("/api/rewrite", headers=headers, json={"text": "Simple text"}).json()
+        rows = db_session.query(Rewrite).all()
+        assert fake_llm.state.requests == 2
+        assert recovered["rewritten_text"] != fallback.json()["rewritten_text"]
+        assert len(rows) == 1
+        assert rows[0].rewritten_text == recovered["rewritten_text"]
+    
+    def test_warm_rewrite_store(self, db_session, sample_curriculum, fake_llm):
+        """Test bulk warm-up stores a rewrite for every feed post and curriculum, on one event loop"""
+        from backend.rewrite_warmup import warm_rewrite_store
+        from backend.services.mock_rednote import MockRedNoteAdapter
+        
+        second = Curriculum(
+            user_id=sample_curriculum.user_id,
+            filename="second_curriculum.md",
+            file_path="/tmp/second_curriculum.md",
+            keywords=["fractions", "decimals"]
+        )
+        db_session.add(second)
+        db_session.commit()
+        
+        with patch('backend.rewrite_warmup.SessionLocal', TestingSessionLocal), \
+                patch('backend.rewrite_warmup.engine', engine), \
+                patch('backend.rewrite_warmup.asyncio.run', wraps=asyncio.run) as run:
+            total = warm_rewrite_store()
+        
+        feed_size = len(MockRedNoteAdapter().get_feed())
+        assert total == 2 * feed_size
+        assert run.call_count == 1
+        for curriculum_id in (sample_curriculum.id, second.id):
+            assert db_session.query(Rewrite).filter(
+                Rewrite.curriculum_id == curriculum_id
+            ).count() == feed_size
+    
+    def test_warm_up_does_not_store_mock_rewrites(self, db_session, sample_curriculum):
+        """Test warm-up without an LLM stores (and counts) nothing"""
+        from backend.rewrite_warmup import warm_rewrite_store
+        
+        with patch('backend.rewrite_warmup.SessionLocal', TestingSessionLocal), \
+                patch('backend.rewrite_warmup.engine', engine):
+            total = warm_rewrite_store()
+        
+        assert total == 0
+        assert db_session.query(Rewrite).count() == 0
+
+
+class TestAsyncLLMClient:
+    """Test async LLM path against the local fake OpenAI-compatible server"""
+    
+    @staticmethod
+    def _make_service(fake_app, **client_kwargs):
+        import httpx
+        from backend.services.llm_client import AsyncLLMClient
+        from backend.services.llm_service import LLMService
+        
+        async_client = AsyncLLMClient(
+            api_key="test-key",
+            base_url="http://fake-llm/v1",
+            transport=httpx.ASGITransport(app=fake_app),
+            **client_kwargs
+        )
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key', 'LLM_FORCE_MOCK': 'false'}):
+            return LLMService(async_client=async_client)
+    
+    def test_arewrite_text_uses_fake_server(self):
+        """Test async rewrite goes through the OpenAI-compatible API"""
+        from backend.services.fake_llm_server import create_fake_llm_app
+        
+        fake_app = create_fake_llm_app()
+        service = self._make_service(fake_app)
+        
+        rewritten, keywords_used = asyncio.run(
+            service.arewrite_text("This is a simple text.", ["mathematics", "algebra"])
+        )
+        
+        assert rewritten == "This is a simple text. [mathematics, algebra]"
+        assert keywords_used == ["mathematics", "algebra"]
+        assert fake_app.state.requests == 1
+    
+    def test_client_from_previous_loop_is_closed(self):
+        """Test using the service from a new event loop closes the HTTP client built for the old one"""
+        from backend.services.fake_llm_server import create_fake_llm_app
+        
+        service = self._make_service(create_fake_llm_app())
+        
+        asyncio.run(service.arewrite_text("First text.", ["algebra"]))
+        old_client = service.async_client._client
+        asyncio.run(service.arewrite_text("Second text.", ["algebra"]))
+        
+        assert old_client.is_closed()
+        assert not service.async_client._client.is_closed()
+    
+    def test_concurrency_limit(self):
+        """Test no more than max_concurrency LLM calls are in flight"""
+        from backend.services.fake_llm_server import create_fake_llm_app
+        
+        fake_app = create_fake_llm_app(latency_seconds=0.05)
+        service = self._make_service(fake_app, max_concurrency=2)
+        
+        async def rewrite_many():
+            return await asyncio.gather(*[
+                service.arewrite_text(f"Text number {i}.", ["algebra"]) for i in range(6)
+            ])
+        
+        results = asyncio.run(rewrite_many())
+        
+        assert len(results) == 6
+        assert fake_app.state.requests == 6
+        assert fake_app.state.max_in_flight == 2
+    
+    def test_timeout_falls_back_to_mock(self):
+        """Test slow LLM calls time out and fall back to the mock rewrite"""
+        from backend.services.fake_llm_server import create_fake_llm_app
+        
+        fake_app = create_fake_llm_app(latency_seconds=1.0)
+        service = self._make_service(fake_app, timeout=0.05, max_retries=0)
+        
+        rewritten, keywords_used = asyncio.run(
+            service.arewrite_text("This is a simple text.", ["mathematics"])
+        )
+        
+        assert "This is a simple text" in rewritten
+        assert "[mathematics]" not in rewritten
+
+    def test_stream_rewrite_text_uses_fake_server(self):
+        """Test streamed rewrite yields tokens from the API, then the full result"""
+        from backend.services.fake_llm_server import create_fake_llm_app
+
+        fake_app = create_fake_llm_app()
+        service = self._make_service(fake_app)
+
+        async def collect():
+            return [event async for event in service.astream_rewrite_text(
+                "This is a simple text.", ["mathematics", "algebra"]
+            )]
+
+        events = asyncio.run(collect())
+        tokens = [data for event, data in events if event == "token"]
+
+        assert len(tokens) > 1
+        assert "".join(tokens) == "This is a simple text. [mathematics, algebra]"
+        assert events[-1] == ("done", ("This is a simple text. [mathematics, algebra]", ["mathematics", "algebra"]))
+
+
+class TestRewriterServiceLifecycle:
+    """Test app-scoped rewriter service injection"""
+    
+    def test_rewriter_is_reused_across_requests(self, client, admin_user, sample_curriculum):
+        """Test the same RewriterService instance serves every request"""
+        from backend.services.rewriter import RewriterService
+        
+        headers = {"Authorization": f"Bearer {admin_user}"}
+        client.post("/api/rewrite", headers=headers, json={"text": "First text"})
+        rewriter = app.state.rewriter
+        
+        with patch.object(RewriterService, '__init__', side_effect=AssertionError("should not be rebuilt")):
+            response = client.post("/api/rewrite", headers=headers, json={"text": "Second text"})
+        
+        assert response.status_code == 200
+        assert isinstance(rewriter, RewriterService)
+        assert app.state.rewriter is rewriter
+    
+    def test_rewriter_backend_can_be_swapped(self, client, admin_user, sample_curriculum):
+        """Test a different LLM backend can be injected without touching routers"""
+        from backend.services.rewriter import RewriterService
+        from backend.utils.dependencies import get_rewriter_service
+        
+        class EchoLLMService:
+            async def arewrite_text(self, original_text, keywords, keyword_index=None, report_fallback=False):
+                return original_text.upper(), []
+        
+        swapped = RewriterService(llm_service=EchoLLMService(), cache=RewriteCache(max_size=10))
+        app.dependency_overrides[get_rewriter_service] = lambda: swapped
+        try:
+            response = client.post(
+                "/api/rewrite",
+                headers={"Authorization": f"Bearer {admin_user}"},
+                json={"text": "Swapped backend"}
+            )
+        finally:
+            del app.dependency_overrides[get_rewriter_service]
+        
+        assert response.json()["rewritten_text"] == "SWAPPED BACKEND"
+
+
+class TestKeywordMatcher:
+    """Test Aho–Corasick keyword matcher"""
+    
+    def test_find_all_overlapping_matches_with_positions(self):
+        """Test all overlapping matches are returned with positions"""
+        from backend.services.keyword_matcher import KeywordMatcher
+        
+        matcher = KeywordMatcher(["he", "she", "his", "hers"])
+        matches = matcher.find_all("ushers")
+        
+        assert sorted(matches) == [("he", 2, 4), ("hers", 2, 6), ("she", 1, 4)]
+    
+    def test_case_insensitive_and_chinese(self):
+        """Test matching is case-insensitive and handles Chinese text"""
+        from backend.services.keyword_matcher import KeywordMatcher
+        
+        matcher = KeywordMatcher(["algebra", "柳暗花明又一村", "熟能生巧"])
+        text = "ALGEBRA is fun, 真的是'柳暗花明又一村'"
+        
+        assert matcher.matched(text) == {"algebra", "柳暗花明又一村"}
+        assert matcher.contains_any(text)
+        assert not matcher.contains_any("geometry")
+    
+    def test_matches_agree_with_substring_search(self):
+        """Test matcher finds exactly the patterns a substring scan finds"""
+        import random
+        from backend.services.keyword_matcher import KeywordMatcher
+        
+        rng = random.Random(42)
+        patterns = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(30)]
+        matcher = KeywordMatcher(patterns)
+        for _ in range(50):
+            text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 40)))
+            assert matcher.matched(text) == {p for p in patterns if p in text}
+    
+    def test_get_matcher_reuses_automaton(self):
+        """Test the same keyword list reuses the compiled matcher"""
+        from backend.services.keyword_matcher import get_matcher
+        
+        assert get_matcher(["algebra", "geometry"]) is get_matcher(["algebra", "geometry"])
+    
+    def test_extract_used_keywords_matches_words(self):
+        """Test used keywords include whole keywords and partial word matches"""
+        from backend.services.llm_service import LLMService
+        
+        service = LLMService()
+        used = service._extract_used_keywords(
+            "We studied linear Algebra and cells today.",
+            ["algebra", "cell biology", "geometry"]
+        )
+        
+        assert used == ["algebra", "cell biology"]
+    
+    def test_keyword_index_round_trip(self):
+        """Test a stored keyword index loads and matches like a freshly built one"""
+        import json
+        from backend.services.keyword_index import KeywordIndex, build_keyword_index, get_keyword_index
+        
+        keywords = ["Algebra", "cell biology", "柳暗花明又一村", "the"]
+        stored = json.loads(json.dumps(build_keyword_index(keywords)))
+        index = KeywordIndex.from_stored(stored, keywords)
+        text = "Cells and ALGEBRA: 柳暗花明又一村"
+        
+        assert index.keywords == keywords
+        assert index.matched(text) == get_keyword_index(keywords).matched(text)
+        assert [entry["language"] for entry in index.entries] == ["en", "en", "zh", "en"]
+        assert index.entries[3]["is_stopword"]
+        # Missing or outdated indexes are rebuilt from the keywords
+        assert KeywordIndex.from_stored({"version": 0}, keywords).keywords == keywords
+    
+    def test_merged_index_keeps_curriculum_order(self):
+        """Test preference keywords are appended after curriculum keywords without duplicates"""
+        from backend.services.keyword_index import get_keyword_index
+        
+        merged = get_keyword_index(["algebra", "geometry"]).merge(get_keyword_index(["geometry", "learning"]))
+        
+        assert merged.keywords == ["algebra", "geometry", "learning"]
+        assert merged.matched("learning geometry") == {"geometry", "learning"}
+
+
+class TestStreamRewriteEndpoint:
+    """Test Server-Sent Events rewrite endpoint"""
+    
+    @staticmethod
+    def _parse_events(body):
+        import json
+        
+        events = []
+        for message in body.strip().split("\n\n"):
+            lines = dict(line.split(": ", 1) for line in message.split("\n"))
+            events.append((lines["event"], json.loads(lines["data"])))
+        return events
+    
+    def test_stream_endpoint_emits_tokens_then_done(self, client, admin_user, sample_curriculum):
+        """Test streamed tokens add up to the rewritten text in the final event"""
+        response = client.post(
+            "/api/rewrite/stream",
+            headers={"Authorization": f"Bearer {admin_user}"},
+            json={"text": "学习数学很有趣，我们每天都练习。"}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = self._parse_events(response.text)
+        tokens = [data["text"] for event, data in events if event == "token"]
+        done = events[-1]
+        
+        assert done[0] == "done"
+        assert len(tokens) > 1
+        assert "".join(tokens) == done[1]["rewritten_text"]
+        assert done[1]["original_text"] == "学习数学很有趣，我们每天都练习。"
+        assert isinstance(done[1]["keywords_used"], list)
+    
+    def test_stream_endpoint_matches_rewrite_endpoint(self, client, admin_user, sample_curriculum, fake_llm):
+        """Test the stream returns the same rewrite as POST /api/rewrite (served from cache)"""
+        headers = {"Authorization": f"Bearer {admin_user}"}
+        rewrite = client.post("/api/rewrite", headers=headers, json={"text": "Simple text"}).json()
+        
+        response = client.post("/api/rewrite/stream", headers=headers, json={"text": "Simple text"})
+        events = self._parse_events(response.text)
+        
+        assert events == [
+            ("token", {"text": rewrite["rewritten_text"]}),
+            ("done", rewrite),
+        ]
+    
+    def test_stream_has_no_get_route(self, client, admin_user):
+        """Test the stream is POST only (a browser EventSource cannot send the Authorization header)"""
+        response = client.get(
+            "/api/rewrite/stream",
+            headers={"Authorization": f"Bearer {admin_user}"},
+            params={"text": "Simple text"}
+        )
+        
+        assert response.status_code == 405
+    
+    def test_stream_endpoint_requires_curriculum(self, client, admin_user):
+        """Test missing curriculum is reported before the stream starts"""
+        response = client.post(
+            "/api/rewrite/stream",
+            headers={"Authorization": f"Bearer {admin_user}"},
+            json={"text": "Simple text"}
+        )
+        
+        assert response.status_code == 404
+
+
+class TestActiveConfig:
+    """Test the in-process active curriculum/preferences snapshot"""
+    
+    def test_steady_state_rewrites_skip_config_queries(self, client, admin_user, sample_curriculum, sample_preferences):
+        """Test curricula and preferences are only read on the first rewrite"""
+        from sqlalchemy import event
+        
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        # Routes use the async engine
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            headers = {"Authorization": f"Bearer {admin_user}"}
+            client.post("/api/rewrite", headers=headers, json={"text": "First text"})
+            first = [s for s in statements if "FROM curricula" in s or "FROM preferences" in s]
+            statements.clear()
+            response = client.post("/api/rewrite", headers=headers, json={"text": "Second text"})
+            second = [s for s in statements if "FROM curricula" in s or "FROM preferences" in s]
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+        
+        assert response.status_code == 200
+        assert len(first) == 2
+        assert second == []
+    
+    def test_preferences_write_refreshes_snapshot(self, client, admin_user, sample_curriculum, db_session):
+        """Test the preferences router invalidates the snapshot"""
+        assert active_config.get(db_session).preference_keywords == []
+        
+        client.post(
+            "/api/preferences",
+            headers={"Authorization": f"Bearer {admin_user}"},
+            json={"focus_areas": [], "keywords": ["geometry", "learning"], "subject_preferences": []}
+        )
+        config = active_config.get(db_session)
+        
+        assert config.preference_keywords == ["geometry", "learning"]
+        # Merged set keeps curriculum order and drops the duplicate
+        assert config.keywords == ["mathematics", "algebra", "geometry", "equations", "learning"]
+
+    def test_rewrite_uses_snapshot_keyword_index(self, client, admin_user, sample_curriculum, db_session):
+        """Test rewrites use the snapshot's merged keyword index instead of re-merging"""
+        config = active_config.get(db_session)
+
+        with patch.object(RewriterService, "_combine_keywords", wraps=RewriterService._combine_keywords) as combine:
+            response = client.post(
+                "/api/rewrite",
+                headers={"Authorization": f"Bearer {admin_user}"},
+                json={"text": "Snapshot index text"}
+            )
+
+        assert response.status_code == 200
+        assert combine.call_count == 1
+        assert combine.call_args.args[3] is config.keyword_index
+
+    def test_snapshot_expires_after_ttl(self, db_session, sample_curriculum):
+        """Test snapshots are reloaded after ttl_seconds"""
+        from backend.services.active_config import ActiveConfigCache
+        
+        now = [0.0]
+        cache = ActiveConfigCache(ttl_seconds=10, clock=lambda: now[0])
+        first = cache.get(db_session)
+        now[0] = 5.0
+        assert cache.get(db_session) is first
+        now[0] = 11.0
+        assert cache.get(db_session) is not first
+        assert cache.get(db_session, curriculum_id=999) is None
@@ -0,0 +1,147 @@
+"""
+Login load benchmark: bursts of concurrent POST /api/auth/login requests
+against the app (in-process ASGI), with bcrypt running inline on the event
+loop (the old behaviour) and in the PasswordHasher pool with 1..N workers.
+
+For each configuration it reports login throughput and the latency of
+/health requests made during the burst (how much logins stall the worker).
+It also times access token decoding with and without the decoded token cache.
+
+Usage (from project root):
+    python -m tests.benchmarks.bench_auth [--output results.json] [--compare baseline.json] [--quick]
+"""
+
+import asyncio
+import os
+import time
+from typing import List
+
+import httpx
+
+from backend.main import app
+from backend.utils.dependencies import get_password_hasher
+from backend.utils.security import (
+    PasswordHasher, create_access_token, decode_access_token, decoded_token_cache,
+    get_password_hash, verify_password
+)
+from tests.benchmarks.common import BenchmarkRun, parse_args, summarize, temporary_database
+
+BURST_SIZE = 16
+USERNAME = "bench_student"
+PASSWORD = "benchpass123"
+
+
+class InlineHasher(PasswordHasher):
+    """Runs bcrypt directly on the event loop (how login worked before the pool)"""
+
+    async def hash(self, password: str) -> str:
+        return get_password_hash(password, self.rounds)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return verify_password(plain_password, hashed_password)
+
+
+def worker_counts() -> List[int]:
+    """1, 2, 4, ... up to (and including) the number of CPUs"""
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cpus:
+        counts.append(counts[-1] * 2)
+    if cpus > 1:
+        counts.append(cpus)
+    return counts
+
+
+async def login_burst(client: httpx.AsyncClient, health_latencies: List[float]) -> None:
+    """Send BURST_SIZE logins at once while polling /health"""
+    done = asyncio.Event()
+
+    async def poll_health():
+        # Latency is measured from when the poll was due, so time the loop
+        # spent blocked before the request could even start is included
+        while not done.is_set():
+            due = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            await client.get("/health")
+            health_latencies.append(time.perf_counter() - due)
+
+    poller = asyncio.create_task(poll_health())
+    responses = await asyncio.gather(*[
+        client.post("/api/auth/login", json={"username": USERNAME, "password": PASSWORD})
+        for _ in range(BURST_SIZE)
+    ])
+    done.set()
+    await poller
+    assert all(response.status_code == 200 for response in responses)
+
+
+async def bench_login_async(run: BenchmarkRun) -> None:
+    """
+    Run every configuration on one event loop (like a uvicorn worker;
+    the async database pool is bound to the loop it first waits on)
+    """
+    configurations = [("inline", InlineHasher())]
+    configurations += [(f"workers={count}", PasswordHasher(max_workers=count)) for count in worker_counts()]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post(
+            "/api/auth/register",
+            json={"username": USERNAME, "password": PASSWORD, "role": "Student"}
+        )
+        for name, hasher in configurations:
+            if not run.wants(f"login_burst[{name}]"):
+                continue
+            app.dependency_overrides[get_password_hasher] = provide(hasher)
+
+            await login_burst(client, [])  # Warmup
+            burst_latencies: List[float] = []
+            health_latencies: List[float] = []
+            for _ in range(run.iterations(5)):
+                start = time.perf_counter()
+                await login_burst(client, health_latencies)
+                burst_latencies.append(time.perf_counter() - start)
+
+            run.record(f"login_burst[{name}]", summarize(burst_latencies, batch_size=BURST_SIZE))
+            run.record(f"health_during_login_burst[{name}]", summarize(health_latencies))
+            hasher.shutdown()
+
+
+def bench_login(run: BenchmarkRun) -> None:
+    """Login bursts with bcrypt inline and in pools of increasing size"""
+    with temporary_database(app, prefix="bench_auth_"):
+        try:
+            asyncio.run(bench_login_async(run))
+        finally:
+            app.dependency_overrides.pop(get_password_hasher, None)
+
+
+def bench_token_decode(run: BenchmarkRun) -> None:
+    """decode_access_token on a token seen before (cached) vs. a signature check every time"""
+    token = create_access_token(data={"sub": USERNAME, "uid": 1, "role": "Student"})
+
+    def uncached(_):
+        decoded_token_cache.clear()
+        decode_access_token(token)
+
+    run.run("decode_access_token[uncached]", uncached, iterations=20000)
+    run.run("decode_access_token[cached]", lambda _: decode_access_token(token), iterations=20000)
+    decoded_token_cache.clear()
+
+
+def provide(hasher: PasswordHasher):
+    """Dependency override returning a fixed hasher"""
+    return lambda: hasher
+
+
+def main() -> None:
+    args = parse_args("Login load benchmark")
+    run = BenchmarkRun("auth", args)
+    print(f"{os.cpu_count() or 1} CPUs, {BURST_SIZE} concurrent logins per burst")
+    bench_token_decode(run)
+    bench_login(run)
+    run.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Curriculum parsing benchmarks: keyword extraction from synthetic markdown
+curricula of 1 MB and 10 MB, parsed as one string and streamed in upload
+sized chunks, plus the full POST /api/curriculum/upload route.
+
+Peak memory of each parse is printed (and stored as peak_mb in --output).
+
+Usage (from project root):
+    python -m tests.benchmarks.bench_curriculum [--output results.json] [--compare baseline.json] [--quick]
+"""
+
+import os
+import random
+import tracemalloc
+from typing import Callable, Dict
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.routers.curriculum import UPLOAD_CHUNK_SIZE, UPLOAD_DIR
+from backend.services.curriculum_parser import KeywordParser, parse_markdown_keyword_entries
+from tests.benchmarks.common import BenchmarkRun, parse_args, synthetic_keywords, temporary_database
+
+SIZES_MB = [1, 10]
+
+
+def synthetic_curriculum(size_mb: int, seed: int = 0) -> str:
+    """Markdown curriculum of about size_mb MB: headings, bold terms, lists and prose"""
+    rng = random.Random(seed)
+    vocabulary = synthetic_keywords(2000, seed)
+    prose = "Students practise {0} and {1} through guided examples, then explain {2} in their own words."
+    lines = []
+    size = 0
+    section = 0
+    while size < size_mb * 1024 * 1024:
+        section += 1
+        block = [
+            f"# Unit {section}: {rng.choice(vocabulary)}",
+            f"## {rng.choice(vocabulary)}",
+            prose.format(*rng.sample(vocabulary, 3)) + f" Focus on **{rng.choice(vocabulary)}**.",
+            f"- **{rng.choice(vocabulary)}**: {', '.join(rng.sample(vocabulary, 4))}",
+            f"- {rng.choice(vocabulary)}",
+            f"* __{rng.choice(vocabulary)}__ with {rng.choice(vocabulary)}",
+            "### Assessment methods",
+            prose.format(*rng.sample(vocabulary, 3)),
+            "",
+        ]
+        lines.extend(block)
+        size += sum(len(line.encode("utf-8")) + 1 for line in block)
+    return "\n".join(lines)
+
+
+def parse_chunked(data: bytes):
+    """Parse UTF-8 bytes the way the upload route does (UPLOAD_CHUNK_SIZE chunks)"""
+    parser = KeywordParser()
+    for start in range(0, len(data), UPLOAD_CHUNK_SIZE):
+        parser.feed(data[start:start + UPLOAD_CHUNK_SIZE].decode("utf-8", errors="ignore"))
+    return parser.close()
+
+
+def peak_memory_mb(fn: Callable[[], object]) -> float:
+    """Peak Python memory allocated while fn runs, in MB"""
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+    finally:
+        tracemalloc.stop()
+
+
+def run_with_memory(run: BenchmarkRun, case: str, fn: Callable[[], object], iterations: int) -> None:
+    """Time fn like run.run, then record its peak memory"""
+    if not run.wants(case):
+        return
+    run.run(case, lambda _: fn(), iterations=iterations, warmup=1)
+    stats: Dict[str, float] = run.results[case]
+    stats["peak_mb"] = peak_memory_mb(fn)
+    print(f"{'':<48} peak memory {stats['peak_mb']:.2f} MB")
+
+
+def bench_parser(run: BenchmarkRun) -> None:
+    """parse_markdown_keyword_entries on the whole document vs. KeywordParser fed in chunks"""
+    for size_mb in SIZES_MB:
+        content = synthetic_curriculum(size_mb)
+        data = content.encode("utf-8")
+        # The upload route only ever holds raw bytes, so the whole-document
+        # case pays for the decode as the old route did
+        run_with_memory(
+            run, f"parse_whole[{size_mb}MB]",
+            lambda: parse_markdown_keyword_entries(data.decode("utf-8")),
+            iterations=5
+        )
+        run_with_memory(run, f"parse_chunked[{size_mb}MB]", lambda: parse_chunked(data), iterations=5)
+
+
+def bench_upload_route(run: BenchmarkRun) -> None:
+    """POST /api/curriculum/upload through TestClient against a temporary SQLite database"""
+    with temporary_database(app, prefix="bench_curriculum_"):
+        client = TestClient(app)
+        client.post(
+            "/api/auth/register",
+            json={"username": "bench_admin", "password": "benchpass123", "role": "Admin"}
+        )
+        token = client.post(
+            "/api/auth/login",
+            json={"username": "bench_admin", "password": "benchpass123"}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        for size_mb in SIZES_MB:
+            data = synthetic_curriculum(size_mb).encode("utf-8")
+            filename = f"bench_curriculum_{size_mb}mb.md"
+            try:
+                run.run(
+                    f"http_upload[{size_mb}MB]",
+                    lambda _: client.post(
+                        "/api/curriculum/upload",
+                        headers=headers,
+                        files={"file": (filename, data, "text/markdown")}
+                    ),
+                    iterations=3,
+                    warmup=1
+                )
+            finally:
+                if os.path.exists(UPLOAD_DIR / filename):
+                    os.remove(UPLOAD_DIR / filename)
+
+
+def main() -> None:
+    args = parse_args("Curriculum parsing benchmarks")
+    run = BenchmarkRun("curriculum", args)
+    bench_parser(run)
+    bench_upload_route(run)
+    run.finish()
+
+
+if __name__ == "__main__":
+    main()
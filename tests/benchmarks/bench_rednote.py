@@ -0,0 +1,90 @@
+"""
+RedNote adapter benchmarks: MockRedNoteAdapter.get_post and get_feed_page
+over synthetic feeds of 100 to 100,000 posts, next to the linear scan
+get_post used before the id index, plus GET /api/rednote/posts/{id}.
+
+Usage (from project root):
+    python -m tests.benchmarks.bench_rednote [--output results.json] [--compare baseline.json] [--quick]
+"""
+
+import random
+from typing import List
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.routers.rednote import get_adapter
+from backend.schemas.post import Post
+from backend.services.mock_rednote import MockRedNoteAdapter
+from backend.services.platform_adapter import SyncAdapterWrapper
+from tests.benchmarks.common import BenchmarkRun, parse_args
+
+FEED_SIZES = [100, 1000, 10000, 100000]
+
+
+def linear_scan(posts: List[Post], post_id: str) -> Post:
+    """How get_post looked posts up before the id index"""
+    for post in posts:
+        if post.id == post_id:
+            return post
+    raise ValueError(f"Post not found: {post_id}")
+
+
+def bench_adapter(run: BenchmarkRun) -> None:
+    """get_post (index vs. linear scan) and feed pages at the start and end of the feed"""
+    for size in FEED_SIZES:
+        adapter = MockRedNoteAdapter(feed_size=size)
+        posts = adapter.get_feed()
+        # Lookups at random positions (fixed seed) over the whole feed: the scan
+        # cost grows with position, and quick runs only use the first few ids
+        ids = [posts[index].id for index in random.Random(size).sample(range(size), min(size, 100))]
+        run.run(
+            f"get_post[{size}]",
+            lambda i: adapter.get_post(ids[i % len(ids)]),
+            iterations=20000
+        )
+        run.run(
+            f"get_post_linear_scan[{size}]",
+            lambda i: linear_scan(posts, ids[i % len(ids)]),
+            iterations=max(20, 2000000 // size)
+        )
+
+        first = adapter.get_feed_page(limit=20)
+        last_cursor = adapter.get_feed_page(limit=max(1, size - 20)).next_cursor
+        run.run(f"feed_first_page[{size}]", lambda i: adapter.get_feed_page(limit=20), iterations=5000)
+        run.run(
+            f"feed_last_page[{size}]",
+            lambda i: adapter.get_feed_page(last_cursor, limit=20),
+            iterations=5000
+        )
+        assert first.posts[0].id == posts[0].id
+
+
+def bench_http_route(run: BenchmarkRun) -> None:
+    """GET /api/rednote/posts/{id} through TestClient, on small and large feeds"""
+    client = TestClient(app)
+    try:
+        for size in (FEED_SIZES[0], FEED_SIZES[-1]):
+            adapter = MockRedNoteAdapter(feed_size=size)
+            wrapped = SyncAdapterWrapper(adapter)
+            app.dependency_overrides[get_adapter] = lambda: wrapped
+            post_id = adapter.get_feed()[-1].id
+            run.run(
+                f"http_get_post[{size}]",
+                lambda i: client.get(f"/api/rednote/posts/{post_id}"),
+                iterations=500
+            )
+    finally:
+        app.dependency_overrides.pop(get_adapter, None)
+
+
+def main() -> None:
+    args = parse_args("RedNote adapter benchmarks")
+    run = BenchmarkRun("rednote", args)
+    bench_adapter(run)
+    bench_http_route(run)
+    run.finish()
+
+
+if __name__ == "__main__":
+    main()
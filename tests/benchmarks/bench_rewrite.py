@@ -0,0 +1,196 @@
+"""
+Rewrite benchmarks: the mock rewrite, paraphrasing, RewriterService and the
+full /api/rewrite route, over synthetic Chinese and English posts of varying
+lengths and curriculum sizes (10 to 5,000 keywords).
+
+Usage (from project root):
+    python -m tests.benchmarks.bench_rewrite [--output results.json] [--compare baseline.json] [--quick]
+"""
+
+from typing import Any, Callable, List, Optional, Tuple
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.models.curriculum import Curriculum
+from backend.models.user import User
+from backend.services.keyword_index import KeywordIndex, build_keyword_index, get_keyword_index
+from backend.services.llm_service import LLMService
+from backend.services.rewrite_cache import RewriteCache
+from backend.services.rewriter import RewriterService
+from tests.benchmarks.common import (
+    POST_LENGTHS,
+    BenchmarkRun,
+    measure,
+    parse_args,
+    synthetic_keywords,
+    synthetic_post,
+    temporary_database,
+)
+
+KEYWORD_COUNTS = [10, 100, 1000, 5000]
+LANGUAGES = ["zh", "en"]
+
+
+class CacheableLLMStub:
+    """
+    LLM backend returning the mock rewrite as if the LLM had produced it
+
+    The default LLMService falls back to mock rewrites, which are never cached
+    or stored, so cache-hit cases need a backend whose output is kept.
+    """
+
+    def __init__(self):
+        self._service = LLMService()
+
+    def rewrite_text(
+        self,
+        original_text: str,
+        keywords: List[str],
+        keyword_index: Optional[KeywordIndex] = None,
+        report_fallback: bool = False
+    ) -> Tuple[str, List[str]]:
+        return self._service._mock_rewrite(original_text, keywords, keyword_index)
+
+    async def arewrite_text(
+        self,
+        original_text: str,
+        keywords: List[str],
+        keyword_index: Optional[KeywordIndex] = None,
+        report_fallback: bool = False
+    ) -> Tuple[str, List[str]]:
+        return self._service._mock_rewrite(original_text, keywords, keyword_index)
+
+
+def run_hit_case(
+    run: BenchmarkRun, case: str, cache: RewriteCache, fn: Callable[[int], Any], iterations: int
+) -> None:
+    """Warm the cache with fn, then measure it, reporting only if every timed call was a cache hit"""
+    if not run.wants(case):
+        return
+    fn(0)
+    hits = cache.stats()["hits"]
+    iterations = run.iterations(iterations)
+    stats = measure(fn, iterations)
+    served = cache.stats()["hits"] - hits
+    if served < iterations:
+        raise RuntimeError(f"{case}: only {served} of {iterations} timed calls were cache hits")
+    run.record(case, stats)
+
+
+def bench_llm_service(run: BenchmarkRun) -> None:
+    """LLMService._mock_rewrite and _paraphrase_with_keywords"""
+    service = LLMService()
+    for count in KEYWORD_COUNTS:
+        keywords = synthetic_keywords(count)
+        # Warm the keyword index, as a stored curriculum index would be
+        get_keyword_index(keywords)
+        for language in LANGUAGES:
+            for length_name, length in POST_LENGTHS.items():
+                posts = [synthetic_post(language, length, seed) for seed in range(20)]
+                case = f"{language}-{length_name}-{count}kw"
+                run.run(
+                    f"mock_rewrite[{case}]",
+                    lambda i: service._mock_rewrite(posts[i % len(posts)], keywords),
+                    iterations=200
+                )
+                run.run(
+                    f"paraphrase[{case}]",
+                    lambda i: service._paraphrase_with_keywords(posts[i % len(posts)], keywords),
+                    iterations=200
+                )
+
+
+def bench_rewriter_service(run: BenchmarkRun) -> None:
+    """RewriterService.rewrite with cache misses (unique texts) and verified cache hits"""
+    for count in KEYWORD_COUNTS:
+        keywords = synthetic_keywords(count)
+        preference_keywords = ["learning", "education", "problem-solving"]
+        for language in LANGUAGES:
+            post = synthetic_post(language, POST_LENGTHS["medium"])
+            cache = RewriteCache(max_size=100000)
+            rewriter = RewriterService(llm_service=CacheableLLMStub(), cache=cache)
+            run.run(
+                f"rewriter_miss[{language}-{count}kw]",
+                lambda i: rewriter.rewrite(f"{post} #{i}", keywords, preference_keywords),
+                iterations=200
+            )
+            run_hit_case(
+                run,
+                f"rewriter_hit[{language}-{count}kw]",
+                cache,
+                lambda i: rewriter.rewrite(post, keywords, preference_keywords),
+                iterations=500
+            )
+
+
+def bench_http_route(run: BenchmarkRun) -> None:
+    """POST /api/rewrite through TestClient against a temporary SQLite database"""
+    with temporary_database(app, prefix="bench_rewrite_") as SessionLocal:
+        cache = RewriteCache(max_size=100000)
+        app.state.rewriter = RewriterService(llm_service=CacheableLLMStub(), cache=cache)
+        try:
+            client = TestClient(app)
+            client.post(
+                "/api/auth/register",
+                json={"username": "bench_admin", "password": "benchpass123", "role": "Admin"}
+            )
+            token = client.post(
+                "/api/auth/login",
+                json={"username": "bench_admin", "password": "benchpass123"}
+            ).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            db = SessionLocal()
+            user = db.query(User).filter(User.username == "bench_admin").first()
+            for count in KEYWORD_COUNTS:
+                keywords = synthetic_keywords(count)
+                curriculum = Curriculum(
+                    user_id=user.id,
+                    filename=f"bench_{count}.md",
+                    file_path=f"/tmp/bench_{count}.md",
+                    keywords=keywords,
+                    keyword_index=build_keyword_index(keywords)
+                )
+                db.add(curriculum)
+                db.commit()
+                db.refresh(curriculum)
+
+                for language in LANGUAGES:
+                    post = synthetic_post(language, POST_LENGTHS["medium"])
+                    run.run(
+                        f"http_rewrite_miss[{language}-{count}kw]",
+                        lambda i: client.post(
+                            "/api/rewrite",
+                            headers=headers,
+                            json={"text": f"{post} #{language}{i}", "curriculum_id": curriculum.id}
+                        ),
+                        iterations=100
+                    )
+                    run_hit_case(
+                        run,
+                        f"http_rewrite_hit[{language}-{count}kw]",
+                        cache,
+                        lambda i: client.post(
+                            "/api/rewrite",
+                            headers=headers,
+                            json={"text": post, "curriculum_id": curriculum.id}
+                        ),
+                        iterations=200
+                    )
+            db.close()
+        finally:
+            app.state.rewriter = None
+
+
+def main() -> None:
+    args = parse_args("Rewrite benchmarks")
+    run = BenchmarkRun("rewrite", args)
+    bench_llm_service(run)
+    bench_rewriter_service(run)
+    bench_http_route(run)
+    run.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Shared helpers for the standalone benchmark runners in this folder.
+
+Each runner measures a set of named cases and prints ops/sec and latency
+percentiles. Results can be written as JSON (--output) and compared with a
+previous run (--compare), e.g. one run per commit:
+
+    python -m tests.benchmarks.bench_rewrite --output before.json
+    git checkout <other commit>
+    python -m tests.benchmarks.bench_rewrite --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base, async_database_url, get_async_db, get_db
+
+
+# Sentences used to build synthetic posts (same register as the mock RedNote feed)
+ZH_SENTENCES = [
+    "今天和好朋友一起做作业，我们互相帮助，真的体会到了学习的快乐！",
+    "这个学期我每天坚持练习，终于把数学题都做对了！",
+    "周末去了科学博物馆，看到了好多有趣的实验，太神奇了！",
+    "读完这本书，我明白了坚持的意义，你们有没有喜欢的书呢？",
+    "刚开始写作文的时候总是不知道写什么，后来发现多观察生活就有灵感了。",
+    "老师说分数其实就像分披萨，一下子就理解了！📚✨",
+    "我们小组一起做了一个关于植物生长的观察日记，每天记录变化。",
+    "学英语单词的时候，我会把它们编成小故事，记得特别快。",
+]
+
+EN_SENTENCES = [
+    "Today I finally understood how fractions work by sharing a pizza with friends.",
+    "We built a small volcano for the science fair and it actually erupted!",
+    "Reading every night before bed has made me so much faster at vocabulary quizzes.",
+    "Our class planted beans and measured how tall they grew every single day.",
+    "I used to hate writing stories, but now I keep a notebook full of ideas.",
+    "My brother showed me a trick for multiplying by nine on my fingers.",
+    "The museum had a huge dinosaur skeleton and a room full of real fossils.",
+    "We practiced our spelling words by turning them into a song.",
+]
+
+# Keywords that occur in (or relate to) the synthetic posts
+ZH_KEYWORDS = ["学习", "数学", "科学", "阅读", "写作", "分数", "观察", "熟能生巧", "助人为乐", "柳暗花明又一村"]
+EN_KEYWORDS = ["reading", "science", "fractions", "vocabulary", "writing", "multiplication", "fossils", "spelling", "learning", "education"]
+
+POST_LENGTHS = {"short": 60, "medium": 400, "long": 2000}
+
+
+def synthetic_post(language: str, length: int, seed: int = 0) -> str:
+    """
+    Build a synthetic post of roughly length characters
+
+    Args:
+        language: "zh" or "en"
+        length: Target length in characters
+        seed: Seed for sentence order
+
+    Returns:
+        Post text
+    """
+    rng = random.Random(seed)
+    sentences = ZH_SENTENCES if language == "zh" else EN_SENTENCES
+    separator = "" if language == "zh" else " "
+    parts: List[str] = []
+    while len(separator.join(parts)) < length:
+        parts.append(rng.choice(sentences))
+    return separator.join(parts)
+
+
+def synthetic_keywords(count: int, seed: int = 0) -> List[str]:
+    """
+    Build a curriculum-like keyword list of the given size
+    Starts with keywords related to the synthetic posts, padded with
+    generated Chinese and English topic names.
+
+    Args:
+        count: Number of keywords
+        seed: Seed for generated keywords
+
+    Returns:
+        List of unique keywords
+    """
+    rng = random.Random(seed)
+    keywords = list(dict.fromkeys(ZH_KEYWORDS + EN_KEYWORDS))
+    zh_chars = "天地人山水火木金土日月星云风雨花草鱼鸟书画诗词歌赋礼乐射御数理化生史"
+    en_words = ["unit", "topic", "concept", "skill", "lesson", "module", "theme", "project"]
+    index = 0
+    while len(keywords) < count:
+        if index % 2:
+            keyword = "".join(rng.choice(zh_chars) for _ in range(rng.randint(2, 4)))
+        else:
+            keyword = f"{rng.choice(en_words)} {index}"
+        if keyword not in keywords:
+            keywords.append(keyword)
+        index += 1
+    return keywords[:count]
+
+
+def percentile(sorted_samples: List[float], fraction: float) -> float:
+    """Linear-interpolated percentile of already sorted samples"""
+    if not sorted_samples:
+        return 0.0
+    position = (len(sorted_samples) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+
+def measure(
+    fn: Callable[[int], Any], iterations: int, warmup: int = 3, batch_size: int = 1
+) -> Dict[str, float]:
+    """
+    Time fn(iteration) repeatedly
+
+    Args:
+        fn: Callable taking the iteration number (use it to vary inputs)
+        iterations: Number of timed calls
+        warmup: Number of untimed calls first
+        batch_size: Operations performed by each call (e.g. concurrent requests
+            in a burst); ops_per_sec counts operations, latencies are per call
+
+    Returns:
+        Stats: iterations, ops_per_sec, mean/p50/p95/p99/max latency in ms
+    """
+    for iteration in range(warmup):
+        fn(-1 - iteration)
+
+    samples = []
+    for iteration in range(iterations):
+        start = time.perf_counter()
+        fn(iteration)
+        samples.append(time.perf_counter() - start)
+
+    return summarize(samples, batch_size)
+
+
+def summarize(samples: List[float], batch_size: int = 1) -> Dict[str, float]:
+    """
+    Stats for a list of per-call latencies in seconds
+
+    Args:
+        samples: Latencies in seconds
+        batch_size: Operations performed by each call
+
+    Returns:
+        Stats: iterations, ops_per_sec, mean/p50/p95/p99/max latency in ms
+    """
+    samples = sorted(samples)
+    total = sum(samples)
+    iterations = len(samples)
+    return {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations * batch_size / total, 2) if total else 0.0,
+        "mean_ms": round(total / iterations * 1000, 4) if iterations else 0.0,
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 4),
+        "max_ms": round(samples[-1] * 1000, 4) if samples else 0.0,
+    }
+
+
+@contextmanager
+def temporary_database(app, prefix: str = "bench_") -> Iterator[sessionmaker]:
+    """
+    Point the app's sync and async database dependencies at a fresh SQLite file
+
+    Args:
+        app: FastAPI app whose get_db/get_async_db are overridden
+        prefix: Prefix of the temporary directory
+
+    Yields:
+        Sync session factory for the temporary database (for setup data)
+    """
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix=prefix), 'bench.db')}"
+    engine = create_engine(database_url, connect_args={"check_same_thread": False})
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_engine = create_async_engine(async_database_url(database_url))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    Base.metadata.create_all(bind=engine)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        yield SessionLocal
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_async_db, None)
+        engine.dispose()
+
+
+def git_commit() -> Optional[str]:
+    """Current git commit, if available"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(description: str) -> argparse.Namespace:
+    """Common command line options for benchmark runners"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Compare with a previous JSON results file")
+    parser.add_argument("--quick", action="store_true", help="Run 10x fewer iterations (smoke test)")
+    parser.add_argument("--filter", help="Only run cases whose name contains this string")
+    return parser.parse_args()
+
+
+class BenchmarkRun:
+    """Collects benchmark cases for one runner and reports them"""
+
+    def __init__(self, name: str, args: argparse.Namespace):
+        self.name = name
+        self.args = args
+        self.results: Dict[str, Dict[str, float]] = {}
+
+    def iterations(self, count: int) -> int:
+        """Scale an iteration count for --quick runs"""
+        return max(1, count // 10) if self.args.quick else count
+
+    def run(
+        self, case: str, fn: Callable[[int], Any], iterations: int, warmup: int = 3, batch_size: int = 1
+    ) -> None:
+        """Measure one case (skipped if it does not match --filter) and print its stats"""
+        if not self.wants(case):
+            return
+        self.record(case, measure(fn, self.iterations(iterations), warmup, batch_size))
+
+    def wants(self, case: str) -> bool:
+        """Whether a case matches --filter"""
+        return not self.args.filter or self.args.filter in case
+
+    def record(self, case: str, stats: Dict[str, float]) -> None:
+        """Store and print stats measured by the caller (see summarize)"""
+        self.results[case] = stats
+        print(
+            f"{case:<48} {stats['ops_per_sec']:>12.1f} ops/s"
+            f"  p50 {stats['p50_ms']:>9.3f} ms  p95 {stats['p95_ms']:>9.3f} ms  p99 {stats['p99_ms']:>9.3f} ms"
+        )
+
+    def finish(self) -> Dict[str, Any]:
+        """Write --output and print the --compare table"""
+        report = {
+            "benchmark": self.name,
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "quick": bool(self.args.quick),
+            "results": self.results,
+        }
+        if self.args.output:
+            with open(self.args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write("\n")
+        if self.args.compare:
+            with open(self.args.compare, encoding="utf-8") as f:
+                print_comparison(json.load(f), report)
+        return report
+
+
+def print_comparison(baseline: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """Print ops/sec and p95 changes between two result files"""
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    for case, stats in current["results"].items():
+        before = baseline.get("results", {}).get(case)
+        if not before:
+            print(f"{case:<48} (new)")
+            continue
+        speedup = stats["ops_per_sec"] / before["ops_per_sec"] if before["ops_per_sec"] else 0.0
+        print(
+            f"{case:<48} {before['ops_per_sec']:>12.1f} -> {stats['ops_per_sec']:>12.1f} ops/s"
+            f"  ({speedup:.2f}x)  p95 {before['p95_ms']:.3f} -> {stats['p95_ms']:.3f} ms"
+        )
@@ -11,12 +11,15 @@ Tests complete user flows across the entire application:
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from backend.main import app
-from backend.database import get_db, Base
+from backend.database import get_db, get_async_db, Base, async_database_url
+from backend.services.active_config import active_config
 from backend.models.user import User
 from backend.models.curriculum import Curriculum
 from backend.models.preferences import Preferences
+from backend.services.user_cache import user_cache
 import io
 
 
@@ -39,10 +42,25 @@ def override_get_db():
 app.dependency_overrides[get_db] = override_get_db
 
 
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL))
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app.dependency_overrides[get_async_db] = override_get_async_db
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database for each test"""
     Base.metadata.create_all(bind=engine)
+    # Snapshots of the previous test's curricula/preferences are stale
+    active_config.invalidate()
+    user_cache.invalidate()
     db = TestingSessionLocal()
     try:
         yield db